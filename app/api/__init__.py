@@ -5,7 +5,6 @@ Fornece endpoints para acesso às funcionalidades do sistema.
 
 from fastapi import APIRouter
 
-from .auth import router as auth_router
 from .users import router as users_router
 from .documents import router as documents_router
 from .analysis import router as analysis_router
@@ -15,8 +14,7 @@ from .qrcode import router as qrcode_router
 # Criar o router principal
 api_router = APIRouter()
 
-# Incluir todos os routers
-api_router.include_router(auth_router)
+# Incluir todos os routers (a autenticação fica em app.routers.auth_router)
 api_router.include_router(users_router)
 api_router.include_router(documents_router)
 api_router.include_router(analysis_router)
@@ -24,7 +22,6 @@ api_router.include_router(reports_router)
 api_router.include_router(qrcode_router)
 
 __all__ = [
-    'auth_router',
     'users_router',
     'documents_router',
     'analysis_router',
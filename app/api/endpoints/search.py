@@ -1,10 +1,15 @@
 """
 Endpoints para busca semântica na base de conhecimento.
 """
-from typing import List, Optional, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
+import time
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 
+from app.core.auth import get_current_admin, get_current_user
 from app.core.search_engine import SearchEngine
 
 # Cria o roteador
@@ -17,6 +22,14 @@ class SearchQuery(BaseModel):
     limit: int = Field(5, description="Número máximo de resultados", ge=1, le=20)
     tipo: Optional[str] = Field(None, description="Filtro por tipo de documento")
     min_score: float = Field(0.7, description="Pontuação mínima de similaridade", ge=0, le=1)
+    diversity: float = Field(
+        0.0, description="Peso da diversidade entre os resultados (0 desabilita)", ge=0, le=1
+    )
+    paginate: bool = Field(False, description="Retorna next_cursor para buscar as próximas páginas")
+    cursor: Optional[str] = Field(None, description="Cursor da próxima página (next_cursor da resposta anterior)")
+    fields: Optional[List[str]] = Field(
+        None, description="Campos do payload a retornar (todos se omitido); ex.: [\"tipo\", \"metadata\"]"
+    )
 
 class MultiSearchQuery(BaseModel):
     """Modelo para consulta múltipla."""
@@ -24,28 +37,126 @@ class MultiSearchQuery(BaseModel):
     limit_per_query: int = Field(3, description="Número máximo de resultados por consulta", ge=1, le=10)
 
 class SearchResult(BaseModel):
-    """Modelo para resultado de busca."""
+    """
+    Modelo para resultado de busca.
+    Os campos do payload são opcionais porque a projeção (fields) pode omiti-los;
+    id e score estão sempre presentes.
+    """
     id: str = Field(..., description="Identificador do documento")
-    tipo: str = Field(..., description="Tipo do documento")
-    conteudo: str = Field(..., description="Conteúdo do documento")
+    tipo: Optional[str] = Field(None, description="Tipo do documento")
+    conteudo: Optional[str] = Field(None, description="Conteúdo do documento")
     score: float = Field(..., description="Pontuação de similaridade")
-    metadata: Dict[str, Any] = Field(..., description="Metadados do documento")
+    metadata: Optional[Dict[str, Any]] = Field(None, description="Metadados do documento")
 
 class SearchResponse(BaseModel):
     """Modelo para resposta de busca."""
     results: List[SearchResult] = Field([], description="Resultados da busca")
     count: int = Field(0, description="Número de resultados")
     query: str = Field(..., description="Consulta original")
+    next_cursor: Optional[str] = Field(None, description="Cursor da próxima página, se houver")
+    depth_limit_reached: bool = Field(
+        False, description="A paginação parou no limite de resultados alcançáveis (SEARCH_PAGE_DEPTH), "
+                           "não no fim dos resultados"
+    )
+
+class BrowseResponse(BaseModel):
+    """Modelo para listagem de documentos."""
+    results: List[Dict[str, Any]] = Field([], description="Documentos da página")
+    count: int = Field(0, description="Número de documentos na página")
+    next_cursor: Optional[str] = Field(None, description="Cursor da próxima página, se houver")
 
 # Dependência para obter o motor de busca
-def get_search_engine():
-    """Retorna uma instância do motor de busca."""
-    return SearchEngine()
+def get_search_engine(request: Request) -> SearchEngine:
+    """
+    Retorna o motor de busca compartilhado pelo processo.
+    
+    A instância é criada no lifespan da aplicação (app/main.py), de modo
+    que todas as requisições reutilizam o mesmo pool de conexões do Qdrant.
+    """
+    search_engine = getattr(request.app.state, "search_engine", None)
+    if search_engine is None:
+        raise HTTPException(status_code=503, detail="Motor de busca indisponível")
+    return search_engine
+
+# Formatos das respostas em streaming
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream"
+}
+
+def encode_event(event: str, data: Dict[str, Any], stream_format: str) -> str:
+    """
+    Serializa um evento de uma resposta em streaming.
+    
+    Em NDJSON, cada evento é uma linha JSON com o campo "event"; em
+    Server-Sent Events, segue o formato "event: ...\ndata: ...".
+    
+    Args:
+        event: Tipo do evento ("result", "reranked" ou "done")
+        data: Conteúdo do evento
+        stream_format: "ndjson" ou "sse"
+        
+    Returns:
+        Evento serializado
+    """
+    if stream_format == "sse":
+        return f"event: {event}\ndata: {orjson.dumps(data, default=str).decode()}\n\n"
+    return orjson.dumps({"event": event, **data}, default=str).decode() + "\n"
+
+def fast_response(content: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> ORJSONResponse:
+    """
+    Serializa uma resposta com orjson, sem revalidá-la contra o response_model.
+    
+    Os resultados são montados pelo próprio motor de busca, então a validação
+    item a item do FastAPI só repetiria trabalho; o response_model das rotas
+    continua documentando o formato no OpenAPI.
+    """
+    return ORJSONResponse(content=content, headers=headers)
+
+async def first_stage_search(search_query: SearchQuery, search_engine: SearchEngine) -> List[Dict[str, Any]]:
+    """
+    Executa a busca e a diversificação opcional de uma consulta, antes do reranking.
+    
+    Returns:
+        Candidatos do reranking, na ordem da busca
+    """
+    if search_query.diversity > 0:
+        return await search_engine.search_diverse(
+            query=search_query.query,
+            limit=search_engine.rerank_candidates(search_query.limit),
+            tipo_filtro=search_query.tipo,
+            min_score=search_query.min_score,
+            diversity=search_query.diversity,
+            fields=search_query.fields
+        )
+    return await search_engine.search(
+        query=search_query.query,
+        limit=search_engine.rerank_candidates(search_query.limit),
+        tipo_filtro=search_query.tipo,
+        min_score=search_query.min_score,
+        fields=search_query.fields
+    )
+
+async def run_search(search_query: SearchQuery, search_engine: SearchEngine) -> Tuple[List[Dict[str, Any]], str]:
+    """
+    Executa a busca, a diversificação opcional e o reranking de uma consulta.
+    
+    Returns:
+        Resultados e o valor do cabeçalho Server-Timing com a duração de cada etapa
+    """
+    started = time.perf_counter()
+    results = await first_stage_search(search_query, search_engine)
+    searched = time.perf_counter()
+    results = (await search_engine.rerank_results(search_query.query, results))[:search_query.limit]
+    reranked = time.perf_counter()
+    server_timing = f"search;dur={(searched - started) * 1000:.1f}, rerank;dur={(reranked - searched) * 1000:.1f}"
+    return results, server_timing
 
 @router.post("/query", response_model=SearchResponse, summary="Busca semântica")
 async def search(
     search_query: SearchQuery,
-    search_engine: SearchEngine = Depends(get_search_engine)
+    search_engine: SearchEngine = Depends(get_search_engine),
+    user_data: dict = Depends(get_current_user)
 ):
     """
     Realiza uma busca semântica na base de conhecimento.
@@ -53,31 +164,99 @@ async def search(
     A consulta é processada pelo motor de busca semântica, que:
     1. Gera embeddings para a consulta
     2. Busca documentos similares na base de conhecimento
-    3. Retorna os documentos ordenados por similaridade
+    3. Reordena os primeiros resultados com o reranker configurado
+    4. Retorna os documentos ordenados por relevância
+    
+    Os resultados podem ser filtrados por tipo e pontuação mínima. Com
+    diversity > 0, trechos quase idênticos dão lugar a resultados diversos
+    (maximal marginal relevance).
+    A duração de cada etapa é informada no cabeçalho Server-Timing.
+    
+    Com paginate (ou cursor), os resultados seguem a ordem da busca, sem
+    diversificação nem reranking, e next_cursor dá acesso à próxima página.
+    A paginação alcança até SEARCH_PAGE_DEPTH resultados; se parar nesse
+    limite, a última página vem sem next_cursor e com depth_limit_reached.
     
-    Os resultados podem ser filtrados por tipo e pontuação mínima.
+    Com fields, apenas os campos pedidos do payload são lidos e retornados
+    (o "conteudo" completo só é trafegado se pedido; sem ele, o reranking
+    lexical mantém a ordem da busca).
     """
-    results = await search_engine.search(
-        query=search_query.query,
-        limit=search_query.limit,
-        tipo_filtro=search_query.tipo,
-        min_score=search_query.min_score
-    )
+    started = time.perf_counter()
+    next_cursor = None
+    depth_limit_reached = False
+    headers = None
+    if search_query.paginate or search_query.cursor:
+        try:
+            results, next_cursor, depth_limit_reached = await search_engine.search_page(
+                query=search_query.query,
+                limit=search_query.limit,
+                tipo_filtro=search_query.tipo,
+                min_score=search_query.min_score,
+                cursor=search_query.cursor,
+                fields=search_query.fields
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    else:
+        results, server_timing = await run_search(search_query, search_engine)
+        headers = {"Server-Timing": server_timing}
     
     # Registra a busca para análise futura
-    search_engine.log_search(search_query.query, results)
+    search_engine.log_search(
+        search_query.query, results,
+        latency_ms=(time.perf_counter() - started) * 1000,
+        tipo_filtro=search_query.tipo
+    )
     
     # Formata a resposta
-    return SearchResponse(
-        results=results,
-        count=len(results),
-        query=search_query.query
-    )
+    return fast_response({
+        "results": results,
+        "count": len(results),
+        "query": search_query.query,
+        "next_cursor": next_cursor,
+        "depth_limit_reached": depth_limit_reached
+    }, headers=headers)
+
+@router.post("/query/stream", summary="Busca semântica em streaming")
+async def search_stream(
+    search_query: SearchQuery,
+    stream_format: str = Query("ndjson", alias="format", pattern="^(ndjson|sse)$",
+                               description="Formato do streaming: ndjson ou sse"),
+    search_engine: SearchEngine = Depends(get_search_engine),
+    user_data: dict = Depends(get_current_user)
+):
+    """
+    Realiza uma busca semântica, enviando os resultados antes do reranking.
+    
+    Mesma busca de /query, mas sem montar a resposta inteira em memória nem
+    validar cada resultado: um evento "result" por documento assim que a
+    busca termina, na ordem da busca; um evento "reranked" com a lista
+    final, se o reranking mudar os resultados; e um evento "done" final
+    com a contagem.
+    """
+    async def events() -> AsyncIterator[str]:
+        started = time.perf_counter()
+        candidates = await first_stage_search(search_query, search_engine)
+        first_stage = [result.get("id") for result in candidates[:search_query.limit]]
+        for result in candidates[:search_query.limit]:
+            yield encode_event("result", result, stream_format)
+        results = (await search_engine.rerank_results(search_query.query, candidates))[:search_query.limit]
+        if [result.get("id") for result in results] != first_stage:
+            yield encode_event("reranked", {"results": results}, stream_format)
+        yield encode_event("done", {"count": len(results), "query": search_query.query}, stream_format)
+        search_engine.log_search(
+            search_query.query, results,
+            latency_ms=(time.perf_counter() - started) * 1000,
+            tipo_filtro=search_query.tipo
+        )
+    
+    return StreamingResponse(events(), media_type=STREAM_MEDIA_TYPES[stream_format])
 
 @router.post("/multi-query", response_model=SearchResponse, summary="Busca múltipla")
 async def multi_search(
     multi_query: MultiSearchQuery,
-    search_engine: SearchEngine = Depends(get_search_engine)
+    search_engine: SearchEngine = Depends(get_search_engine),
+    user_data: dict = Depends(get_current_user)
 ):
     """
     Realiza múltiplas consultas e combina os resultados.
@@ -85,34 +264,194 @@ async def multi_search(
     Útil para consultas complexas que podem ser divididas em
     sub-consultas mais específicas.
     """
-    results = search_engine.search_multi_query(
+    started = time.perf_counter()
+    results = await search_engine.search_multi_query(
         queries=multi_query.queries,
         limit_per_query=multi_query.limit_per_query
     )
     
     # Registra a busca para análise futura
     query_str = " | ".join(multi_query.queries)
-    search_engine.log_search(query_str, results)
+    search_engine.log_search(query_str, results, latency_ms=(time.perf_counter() - started) * 1000)
     
     # Formata a resposta
-    return SearchResponse(
-        results=results,
-        count=len(results),
-        query=query_str
-    )
+    return fast_response({
+        "results": results,
+        "count": len(results),
+        "query": query_str,
+        "next_cursor": None
+    })
+
+@router.post("/multi-query/stream", summary="Busca múltipla em streaming")
+async def multi_search_stream(
+    multi_query: MultiSearchQuery,
+    stream_format: str = Query("ndjson", alias="format", pattern="^(ndjson|sse)$",
+                               description="Formato do streaming: ndjson ou sse"),
+    search_engine: SearchEngine = Depends(get_search_engine),
+    user_data: dict = Depends(get_current_user)
+):
+    """
+    Realiza múltiplas consultas, enviando os resultados de cada uma assim que termina.
+    
+    Cada documento é enviado uma única vez (na primeira consulta que o
+    encontrar), com o campo "query" indicando essa consulta. Como os
+    resultados são enviados antes de todas as consultas terminarem, não há
+    combinação por RRF; use /multi-query para a lista combinada.
+    """
+    async def events() -> AsyncIterator[str]:
+        started = time.perf_counter()
+        seen = set()
+        results = []
+        async for index, query_results in search_engine.search_multi_query_stream(
+            multi_query.queries, limit_per_query=multi_query.limit_per_query
+        ):
+            for result in query_results:
+                if result.get("id") in seen:
+                    continue
+                seen.add(result.get("id"))
+                results.append(result)
+                yield encode_event("result", {**result, "query": multi_query.queries[index]}, stream_format)
+        query_str = " | ".join(multi_query.queries)
+        yield encode_event("done", {"count": len(results), "query": query_str}, stream_format)
+        search_engine.log_search(query_str, results, latency_ms=(time.perf_counter() - started) * 1000)
+    
+    return StreamingResponse(events(), media_type=STREAM_MEDIA_TYPES[stream_format])
+
+@router.get("/browse", response_model=BrowseResponse, summary="Lista documentos")
+async def browse(
+    tipo: Optional[str] = Query(None, description="Filtro por tipo de documento"),
+    limit: int = Query(20, description="Documentos por página", ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Cursor da próxima página"),
+    search_engine: SearchEngine = Depends(get_search_engine),
+    user_data: dict = Depends(get_current_user)
+):
+    """
+    Lista os documentos da base de conhecimento, opcionalmente por tipo.
+    
+    A paginação usa o cursor do scroll do Qdrant, então cada página custa
+    o mesmo que a primeira.
+    """
+    try:
+        results, next_cursor = await search_engine.browse(tipo_filtro=tipo, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return fast_response({"results": results, "count": len(results), "next_cursor": next_cursor})
+
+# Tipos retornados quando a contagem na coleção não está disponível
+DEFAULT_TYPES = [
+    "adulto", "adolescente", "infantil", "gerontologico", 
+    "personalidade", "inteligencia", "comportamento", 
+    "projetivo", "objetivo", "neuropsicologico"
+]
 
 @router.get("/types", response_model=List[str], summary="Tipos de documentos")
 async def get_types(
-    search_engine: SearchEngine = Depends(get_search_engine)
+    search_engine: SearchEngine = Depends(get_search_engine),
+    user_data: dict = Depends(get_current_user)
 ):
     """
     Retorna a lista de todos os tipos de documentos disponíveis.
     
     Útil para filtrar buscas por tipo específico de documento.
+    Os tipos são obtidos da própria coleção (com cache).
+    """
+    counts = await search_engine.type_counts()
+    if not counts:
+        return DEFAULT_TYPES
+    return sorted(counts)
+
+@router.get("/types/counts", response_model=Dict[str, int], summary="Documentos por tipo")
+async def get_type_counts(
+    search_engine: SearchEngine = Depends(get_search_engine),
+    user_data: dict = Depends(get_current_user)
+):
+    """
+    Retorna o número de documentos de cada tipo na base de conhecimento.
+    """
+    counts = await search_engine.type_counts()
+    if not counts:
+        raise HTTPException(status_code=503, detail="Contagem por tipo indisponível")
+    return counts
+
+@router.get("/stats", response_model=Dict[str, Any], summary="Métricas da busca")
+async def get_stats(
+    search_engine: SearchEngine = Depends(get_search_engine),
+    user_data: dict = Depends(get_current_user)
+):
+    """
+    Retorna as métricas do motor de busca.
+    
+    Inclui os acertos do cache de embeddings, o tamanho médio dos lotes
+    e o atraso de fila do agrupamento de buscas concorrentes e as latências
+    (p50/p95/p99) de cada etapa da busca.
+    """
+    return search_engine.stats()
+
+def require_search_log(search_engine: SearchEngine):
+    """Retorna o registro de buscas do motor, ou 404 se estiver desabilitado."""
+    if search_engine.search_log is None:
+        raise HTTPException(status_code=404, detail="Registro de buscas desabilitado")
+    return search_engine.search_log
+
+@router.get("/analytics/top-queries", response_model=List[Dict[str, Any]], summary="Consultas mais frequentes")
+async def get_top_queries(
+    limit: int = Query(20, description="Número de consultas", ge=1, le=200),
+    hours: float = Query(24.0, description="Janela de análise (horas)", gt=0),
+    search_engine: SearchEngine = Depends(get_search_engine),
+    user_data: dict = Depends(get_current_user)
+):
+    """
+    Retorna as consultas mais frequentes na janela, agrupadas pelo texto
+    normalizado, com a média de resultados e de latência de cada uma.
+    """
+    return await require_search_log(search_engine).top_queries(limit=limit, hours=hours)
+
+@router.get("/analytics/zero-results", response_model=List[Dict[str, Any]], summary="Consultas sem resultados")
+async def get_zero_result_queries(
+    limit: int = Query(20, description="Número de consultas", ge=1, le=200),
+    hours: float = Query(24.0, description="Janela de análise (horas)", gt=0),
+    search_engine: SearchEngine = Depends(get_search_engine),
+    user_data: dict = Depends(get_current_user)
+):
+    """
+    Retorna as consultas que mais ficaram sem resultados na janela.
+    
+    Úteis para identificar lacunas da base de conhecimento.
+    """
+    return await require_search_log(search_engine).zero_result_queries(limit=limit, hours=hours)
+
+@router.get("/analytics/latency", response_model=Dict[str, Any], summary="Latência das buscas")
+async def get_search_latency(
+    hours: float = Query(24.0, description="Janela de análise (horas)", gt=0),
+    search_engine: SearchEngine = Depends(get_search_engine),
+    user_data: dict = Depends(get_current_user)
+):
+    """
+    Retorna os percentis (p50/p90/p95/p99) da latência das buscas registradas na janela.
+    
+    Diferente de /stats, que cobre só as medições recentes deste processo,
+    inclui todas as buscas gravadas no registro.
+    """
+    return await require_search_log(search_engine).latency_percentiles(hours=hours)
+
+@router.delete("/cache", summary="Limpa o cache de respostas")
+async def purge_cache(
+    search_engine: SearchEngine = Depends(get_search_engine),
+    admin: Any = Depends(get_current_admin)
+):
+    """
+    Invalida todas as respostas de busca em cache (apenas administradores).
+    
+    Limpa o cache semântico e incrementa a geração da coleção, o que
+    invalida as entradas de todos os processos que compartilham o cache.
+    Usado pela ingestão quando a geração não é compartilhada pelo Redis.
     """
-    # Implementação básica - será expandida para buscar do banco de dados
-    return [
-        "adulto", "adolescente", "infantil", "gerontologico", 
-        "personalidade", "inteligencia", "comportamento", 
-        "projetivo", "objetivo", "neuropsicologico"
-    ] 
\ No newline at end of file
+    if search_engine.response_cache is None and search_engine.semantic_cache is None:
+        raise HTTPException(status_code=404, detail="Caches de busca desabilitados")
+    if search_engine.semantic_cache is not None:
+        search_engine.semantic_cache.clear()
+    if search_engine.response_cache is not None:
+        generation = await search_engine.response_cache.purge()
+    else:
+        generation = await search_engine.generation.bump()
+    return {"message": "Cache de respostas invalidado", "generation": generation}
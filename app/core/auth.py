@@ -17,6 +17,7 @@ from app.models.user import User
 from app.repositories.user_repository import UserRepository
 from app.schemas.user import GoogleUser, UserCreate, TokenData
 from app.core.sms_auth import validate_phone_token
+from app.core.metrics import track_external
 
 GOOGLE_AUTH_URL = "https://accounts.google.com/o/oauth2/v2/auth"
 GOOGLE_TOKEN_URL = "https://oauth2.googleapis.com/token"
@@ -51,17 +52,18 @@ async def get_google_token(code: str) -> dict:
     """
     async with AsyncClient() as client:
         try:
-            response = await client.post(
-                GOOGLE_TOKEN_URL,
-                data={
-                    "client_id": settings.GOOGLE_CLIENT_ID,
-                    "client_secret": settings.GOOGLE_CLIENT_SECRET,
-                    "code": code,
-                    "redirect_uri": settings.GOOGLE_REDIRECT_URI,
-                    "grant_type": "authorization_code",
-                }
-            )
-            response.raise_for_status()
+            with track_external("google", "token"):
+                response = await client.post(
+                    GOOGLE_TOKEN_URL,
+                    data={
+                        "client_id": settings.GOOGLE_CLIENT_ID,
+                        "client_secret": settings.GOOGLE_CLIENT_SECRET,
+                        "code": code,
+                        "redirect_uri": settings.GOOGLE_REDIRECT_URI,
+                        "grant_type": "authorization_code",
+                    }
+                )
+                response.raise_for_status()
             return response.json()
         except HTTPError as e:
             logger.error(f"Erro ao obter token do Google: {str(e)}")
@@ -76,11 +78,12 @@ async def get_google_user_info(access_token: str) -> dict:
     """
     async with AsyncClient() as client:
         try:
-            response = await client.get(
-                GOOGLE_USERINFO_URL,
-                headers={"Authorization": f"Bearer {access_token}"}
-            )
-            response.raise_for_status()
+            with track_external("google", "userinfo"):
+                response = await client.get(
+                    GOOGLE_USERINFO_URL,
+                    headers={"Authorization": f"Bearer {access_token}"}
+                )
+                response.raise_for_status()
             return response.json()
         except HTTPError as e:
             logger.error(f"Erro ao obter informações do usuário do Google: {str(e)}")
@@ -194,4 +197,26 @@ async def get_current_user(token: Optional[str] = Depends(oauth2_scheme)) -> Uni
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token inválido",
             headers={"WWW-Authenticate": "Bearer"},
-        ) 
\ No newline at end of file
+        )
+
+
+async def get_current_admin(
+    user_data: Union[User, dict] = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> User:
+    """
+    Obtém o usuário atual e exige que seja administrador (is_superuser).
+    Tokens de telefone não identificam um usuário cadastrado e são recusados.
+    """
+    user = None
+    if isinstance(user_data, User):
+        user = user_data
+    elif isinstance(user_data, dict) and user_data.get("type") == "google":
+        user = UserRepository.get_by_email(db, user_data["email"])
+
+    if user is None or not user.is_active or not user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Acesso restrito a administradores"
+        )
+    return user
@@ -0,0 +1,426 @@
+"""
+Benchmark offline da busca do PsiCollab.
+Mede QPS, latência (p50/p95/p99) e recall@k de SearchEngine.search contra
+a busca exata, sobre corpora sintéticos ou reaproveitados de um
+armazenamento vetorial local, com e sem filtro por tipo e variando
+hnsw_ef, busca exata e quantização.
+
+Roda sem servidor, no modo local do Qdrant (que sempre faz busca exata,
+então hnsw_ef e quantização só têm efeito contra um servidor; cada linha
+do relatório informa o backend usado).
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+import asyncio
+import logging
+import tempfile
+import time
+import warnings
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.http import models
+
+from app.core.collection_manager import create_knowledge_base, quantization_search_params
+from app.core.config import settings
+from app.core.embedding_cache import EmbeddingCache
+from app.core.embeddings import EmbeddingProvider
+from app.core.local_vector_store import LocalVectorStore
+from app.core.search_engine import SearchEngine
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+# Tipos de documento dos corpora sintéticos, do mais ao menos frequente
+BENCHMARK_TYPES = (
+    "adulto", "infantil", "adolescente", "personalidade", "inteligencia",
+    "comportamento", "projetivo", "neuropsicologico", "objetivo", "gerontologico"
+)
+
+class Corpus:
+    """Vetores normalizados de um corpus de benchmark e o tipo de cada um."""
+
+    def __init__(self, name: str, vectors: np.ndarray, tipos: Sequence[Optional[str]]):
+        """
+        Inicializa o corpus.
+
+        Args:
+            name: Nome do corpus no relatório
+            vectors: Matriz (N x D) de vetores
+            tipos: Tipo de documento de cada vetor
+        """
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        self.name = name
+        self.vectors = (vectors / np.maximum(norms, 1e-12)).astype(np.float32)
+        self.tipos = np.asarray(tipos, dtype=object)
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def type_frequencies(self) -> Dict[str, int]:
+        """Número de documentos de cada tipo, do mais ao menos frequente."""
+        values, counts = np.unique(self.tipos[self.tipos != None].astype(str), return_counts=True)  # noqa: E711
+        order = np.argsort(-counts, kind="stable")
+        return {str(values[i]): int(counts[i]) for i in order}
+
+def synthetic_corpus(size: int, dim: Optional[int] = None, clusters: int = 64, seed: int = 0) -> Corpus:
+    """
+    Gera um corpus sintético agrupado, semelhante a embeddings reais.
+
+    Os vetores são sorteados em torno de centros aleatórios (documentos de um
+    mesmo assunto) e os tipos seguem uma distribuição desigual (poucos tipos
+    concentram a maior parte dos documentos), para que os filtros tenham
+    seletividades diferentes.
+
+    Args:
+        size: Número de vetores
+        dim: Dimensão (padrão: settings.VECTOR_SIZE)
+        clusters: Número de agrupamentos
+        seed: Semente do gerador aleatório
+
+    Returns:
+        Corpus gerado
+    """
+    dim = dim or settings.VECTOR_SIZE
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    assignment = rng.integers(0, clusters, size)
+    vectors = centers[assignment] + 0.5 * rng.standard_normal((size, dim)).astype(np.float32)
+    weights = 1 / np.arange(1, len(BENCHMARK_TYPES) + 1)
+    tipos = rng.choice(BENCHMARK_TYPES, size=size, p=weights / weights.sum())
+    return Corpus(f"synthetic-{size}", vectors, tipos)
+
+def replayed_corpus(path: Path, size: Optional[int] = None, jitter: float = 0.01, seed: int = 0) -> Corpus:
+    """
+    Carrega um corpus a partir de um armazenamento vetorial local.
+
+    O armazenamento é o exportado da coleção de produção (ver
+    app/scripts/local_vector_store.py). Para tamanhos maiores que o
+    armazenamento, os vetores são repetidos com uma pequena perturbação.
+
+    Args:
+        path: Diretório do armazenamento
+        size: Número de vetores (padrão: todos)
+        jitter: Desvio da perturbação das cópias
+        seed: Semente do gerador aleatório
+
+    Returns:
+        Corpus carregado
+    """
+    store = LocalVectorStore(path)
+    try:
+        vectors = np.asarray(store.vectors, dtype=np.float32)
+        tipos = np.empty(len(store), dtype=object)
+        for tipo, rows in store.type_rows.items():
+            tipos[rows] = tipo
+    finally:
+        store.close()
+
+    size = size or len(vectors)
+    rng = np.random.default_rng(seed)
+    rows = np.arange(size) % len(vectors) if size > len(vectors) else rng.choice(len(vectors), size, replace=False)
+    sampled = vectors[rows]
+    copies = np.arange(size) >= len(vectors)
+    sampled[copies] += jitter * rng.standard_normal((int(copies.sum()), sampled.shape[1])).astype(np.float32)
+    return Corpus(f"replayed-{size}", sampled, tipos[rows])
+
+def make_queries(corpus: Corpus, count: int, noise: float = 0.1, seed: int = 1) -> np.ndarray:
+    """
+    Gera consultas próximas a documentos do corpus (sem coincidir com eles).
+
+    Args:
+        corpus: Corpus de referência
+        count: Número de consultas
+        noise: Desvio da perturbação, relativo à norma dos vetores
+        seed: Semente do gerador aleatório
+
+    Returns:
+        Matriz (count x D) de consultas normalizadas
+    """
+    rng = np.random.default_rng(seed)
+    base = corpus.vectors[rng.choice(len(corpus), count, replace=count > len(corpus))]
+    dim = corpus.vectors.shape[1]
+    queries = base + noise / np.sqrt(dim) * rng.standard_normal(base.shape).astype(np.float32)
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+def exact_top_k(corpus: Corpus, queries: np.ndarray, k: int, tipo: Optional[str] = None) -> List[List[str]]:
+    """
+    Calcula a verdade de referência por força bruta (similaridade de cosseno).
+
+    Args:
+        corpus: Corpus pesquisado
+        queries: Consultas normalizadas
+        k: Número de resultados
+        tipo: Filtro opcional por tipo
+
+    Returns:
+        Ids ("doc-<linha>") dos k documentos mais similares de cada consulta
+    """
+    rows = np.flatnonzero(corpus.tipos == tipo) if tipo is not None else np.arange(len(corpus))
+    if not len(rows):
+        return [[] for _ in queries]
+    scores = queries @ corpus.vectors[rows].T
+    k = min(k, len(rows))
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    expected = []
+    for query_scores, candidates in zip(scores, top):
+        ordered = candidates[np.argsort(-query_scores[candidates], kind="stable")]
+        expected.append([f"doc-{rows[i]}" for i in ordered if query_scores[i] >= 0])
+    return expected
+
+def load_corpus(client: QdrantClient, collection_name: str, corpus: Corpus, quantization: str = "none",
+                batch_size: int = 512) -> None:
+    """
+    Cria a coleção do benchmark e insere o corpus.
+
+    Args:
+        client: Cliente do Qdrant
+        collection_name: Nome da coleção (recriada se já existir)
+        corpus: Corpus a inserir
+        quantization: Modo de quantização da coleção
+        batch_size: Pontos por requisição
+    """
+    if client.collection_exists(collection_name):
+        client.delete_collection(collection_name)
+    create_knowledge_base(client, collection_name, vector_size=corpus.vectors.shape[1], quantization=quantization)
+    for start in range(0, len(corpus), batch_size):
+        end = min(start + batch_size, len(corpus))
+        client.upsert(
+            collection_name=collection_name,
+            points=[
+                models.PointStruct(
+                    id=row,
+                    vector=corpus.vectors[row].tolist(),
+                    payload={"id": f"doc-{row}", "tipo": corpus.tipos[row], "conteudo": ""}
+                )
+                for row in range(start, end)
+            ],
+            wait=True
+        )
+
+class ReplayEmbeddingGenerator(EmbeddingProvider):
+    """Provedor de embeddings que devolve vetores pré-calculados ("q<i>" -> consulta i)."""
+
+    name = "replay"
+
+    def __init__(self, queries: np.ndarray):
+        super().__init__("benchmark", queries.shape[1])
+        self.queries = queries
+
+    async def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        return [self.queries[int(text[1:])].tolist() for text in texts]
+
+def create_benchmark_engine(client: AsyncQdrantClient, collection_name: str, queries: np.ndarray) -> SearchEngine:
+    """
+    Cria um motor de busca só com a busca vetorial no Qdrant, sem caches de
+    respostas, busca híbrida, reranking, agrupamento de buscas, registro de
+    buscas nem armazenamento local, para medir apenas a configuração do índice.
+    """
+    engine = SearchEngine(
+        client=client,
+        embedding_generator=ReplayEmbeddingGenerator(queries),
+        embedding_cache=EmbeddingCache(model="benchmark", redis_client=None),
+        optional_layers=False
+    )
+    engine.collection_name = collection_name
+    engine.vector_backend = "qdrant"
+    engine.full_vector_name = None
+    return engine
+
+async def measure_engine(
+    engine: SearchEngine,
+    count: int,
+    expected: List[List[str]],
+    k: int,
+    tipo: Optional[str] = None,
+    concurrency: int = 1
+) -> Dict[str, Any]:
+    """
+    Executa as consultas "q0".."q<count-1>" no motor e mede latência, QPS e recall@k.
+
+    Args:
+        engine: Motor de busca (ver create_benchmark_engine)
+        count: Número de consultas
+        expected: Verdade de referência de cada consulta (ver exact_top_k)
+        k: Resultados por consulta
+        tipo: Filtro opcional por tipo
+        concurrency: Consultas simultâneas
+
+    Returns:
+        QPS, latências p50/p95/p99 (ms) e recall@k
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = np.zeros(count)
+    found: List[List[str]] = [[] for _ in range(count)]
+
+    async def run(i: int) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            results = await engine.search(f"q{i}", limit=k, tipo_filtro=tipo, min_score=0.0)
+            latencies[i] = (time.perf_counter() - started) * 1000
+            found[i] = [str(result.get("id")) for result in results]
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run(i) for i in range(count)))
+    elapsed = time.perf_counter() - started
+    recall = np.mean([
+        len(set(ids) & set(truth)) / len(truth) if truth else 1.0
+        for ids, truth in zip(found, expected)
+    ])
+    return {
+        "queries": count,
+        "qps": round(count / elapsed, 1) if elapsed else None,
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        f"recall@{k}": round(float(recall), 4)
+    }
+
+def search_configs(
+    ef_values: Sequence[int] = (32, 64, 128, 256),
+    quantizations: Sequence[str] = ("none",),
+    oversampling: float = 2.0
+) -> List[Dict[str, Any]]:
+    """
+    Monta as configurações de busca avaliadas.
+
+    Args:
+        ef_values: Valores de hnsw_ef
+        quantizations: Modos de quantização da coleção
+        oversampling: Oversampling da busca quantizada (com rescore)
+
+    Returns:
+        Uma configuração exata e uma por (quantização, hnsw_ef)
+    """
+    configs = [{"config": "exact", "quantization": "none", "exact": True, "hnsw_ef": None}]
+    for quantization in quantizations:
+        for ef in ef_values:
+            configs.append({"config": "hnsw", "quantization": quantization, "exact": False, "hnsw_ef": ef})
+    for config in configs:
+        config["params"] = models.SearchParams(
+            hnsw_ef=config["hnsw_ef"],
+            exact=config["exact"],
+            quantization=quantization_search_params(config["quantization"], oversampling=oversampling)
+        )
+    return configs
+
+async def run_benchmark(
+    corpora: Sequence[Corpus],
+    configs: Sequence[Dict[str, Any]],
+    query_count: int = 100,
+    k: int = 10,
+    concurrency: int = 1,
+    qdrant_url: Optional[str] = None,
+    qdrant_path: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Executa o benchmark de cada corpus e configuração.
+
+    Cada corpus é medido sem filtro, com o tipo mais frequente e com o tipo
+    menos frequente. Uma primeira passada (não medida) aquece o cache de
+    embeddings, para que a latência medida seja a da busca.
+
+    Args:
+        corpora: Corpora avaliados
+        configs: Configurações de busca (ver search_configs)
+        query_count: Consultas por medição
+        k: Resultados por consulta
+        concurrency: Consultas simultâneas
+        qdrant_url: Servidor do Qdrant (padrão: modo local)
+        qdrant_path: Diretório do modo local (padrão: diretório temporário)
+
+    Returns:
+        Uma linha por (corpus, filtro, configuração)
+    """
+    backend = "server" if qdrant_url else "local"
+    if backend == "local":
+        logger.warning("Modo local do Qdrant: busca sempre exata, hnsw_ef e quantização não têm efeito")
+    qdrant_path = qdrant_path or tempfile.mkdtemp(prefix="psicollab-benchmark-")
+    report = []
+
+    for corpus in corpora:
+        queries = make_queries(corpus, query_count)
+        frequencies = corpus.type_frequencies()
+        filters = [("none", None)]
+        if frequencies:
+            filters += [("common", next(iter(frequencies))), ("rare", list(frequencies)[-1])]
+        expected = {tipo: exact_top_k(corpus, queries, k, tipo) for _, tipo in filters}
+
+        for quantization in dict.fromkeys(config["quantization"] for config in configs):
+            collection_name = f"benchmark_{corpus.name}_{quantization}".replace("-", "_")
+            client = QdrantClient(url=qdrant_url) if qdrant_url else QdrantClient(path=qdrant_path)
+            try:
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore", UserWarning)
+                    load_corpus(client, collection_name, corpus, quantization)
+            finally:
+                client.close()
+
+            async_client = AsyncQdrantClient(url=qdrant_url) if qdrant_url else AsyncQdrantClient(path=qdrant_path)
+            engine = create_benchmark_engine(async_client, collection_name, queries)
+            try:
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore", UserWarning)
+                    await measure_engine(engine, query_count, expected[None], k, concurrency=concurrency)
+                    for config in configs:
+                        if config["quantization"] != quantization:
+                            continue
+                        engine.search_params = config["params"]
+                        for filter_name, tipo in filters:
+                            row = {
+                                "corpus": corpus.name,
+                                "size": len(corpus),
+                                "dim": int(corpus.vectors.shape[1]),
+                                "backend": backend,
+                                "filter": filter_name if tipo is None else f"{filter_name}:{tipo}",
+                                **{key: value for key, value in config.items() if key != "params"},
+                                "concurrency": concurrency
+                            }
+                            row.update(await measure_engine(
+                                engine, query_count, expected[tipo], k, tipo=tipo, concurrency=concurrency
+                            ))
+                            report.append(row)
+                            logger.info(f"Benchmark: {row}")
+            finally:
+                await engine.close()
+    return report
+
+def compare_reports(
+    baseline: Sequence[Dict[str, Any]],
+    current: Sequence[Dict[str, Any]],
+    max_recall_drop: float = 0.01,
+    max_latency_ratio: float = 1.2
+) -> List[Dict[str, Any]]:
+    """
+    Compara dois relatórios e lista as regressões.
+
+    Linhas são pareadas por corpus, filtro, configuração, quantização,
+    hnsw_ef e concorrência; linhas sem par são ignoradas.
+
+    Args:
+        baseline: Relatório de referência
+        current: Relatório atual
+        max_recall_drop: Queda máxima tolerada do recall@k
+        max_latency_ratio: Aumento máximo tolerado da latência p95
+
+    Returns:
+        Uma linha por regressão encontrada
+    """
+    def key(row: Dict[str, Any]) -> tuple:
+        return tuple(row.get(field) for field in
+                     ("corpus", "backend", "filter", "config", "quantization", "hnsw_ef", "concurrency"))
+
+    reference = {key(row): row for row in baseline}
+    regressions = []
+    for row in current:
+        previous = reference.get(key(row))
+        if previous is None:
+            continue
+        for metric in (name for name in row if name.startswith("recall@")):
+            if metric in previous and previous[metric] - row[metric] > max_recall_drop:
+                regressions.append({"key": key(row), "metric": metric,
+                                    "baseline": previous[metric], "current": row[metric]})
+        if previous.get("p95_ms") and row["p95_ms"] > previous["p95_ms"] * max_latency_ratio:
+            regressions.append({"key": key(row), "metric": "p95_ms",
+                                "baseline": previous["p95_ms"], "current": row["p95_ms"]})
+    return regressions
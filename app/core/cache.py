@@ -0,0 +1,116 @@
+"""
+Utilitários de cache do PsiCollab.
+Fornece um cache LRU em memória com expiração (TTL) e a criação do
+cliente Redis assíncrono compartilhado pelos caches distribuídos.
+"""
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+import logging
+import threading
+import time
+
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+class LRUCache:
+    """
+    Cache LRU limitado em memória com expiração por entrada.
+    Seguro para uso concorrente entre threads; as operações são O(1).
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        """
+        Inicializa o cache.
+
+        Args:
+            maxsize: Número máximo de entradas antes de descartar as menos usadas
+            ttl: Tempo de vida das entradas em segundos (None para não expirar)
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Retorna o valor associado à chave, ou None se ausente ou expirado.
+
+        Args:
+            key: Chave da entrada
+
+        Returns:
+            Valor armazenado ou None
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Armazena um valor no cache.
+
+        Args:
+            key: Chave da entrada
+            value: Valor a armazenar
+            ttl: Tempo de vida específico da entrada (usa o padrão se omitido)
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove todas as entradas do cache."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna os contadores de uso do cache."""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+def create_redis_client() -> aioredis.Redis:
+    """
+    Cria o cliente Redis assíncrono usado pelos caches.
+
+    Usa timeouts curtos para que uma indisponibilidade do Redis não
+    aumente a latência das buscas; os caches tratam as falhas como miss.
+
+    Returns:
+        Cliente Redis assíncrono
+    """
+    return aioredis.Redis(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        db=settings.REDIS_CACHE_DB,
+        socket_timeout=settings.REDIS_CACHE_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_CACHE_TIMEOUT
+    )
@@ -0,0 +1,255 @@
+"""
+Divisão de documentos em trechos para a base de conhecimento do PsiCollab.
+Documentos longos são divididos em trechos com um número alvo de tokens e
+sobreposição, cortados de preferência em seções, depois parágrafos e
+frases (com as abreviações comuns em textos clínicos em português), para
+caber no limite do modelo de embeddings e melhorar a precisão da busca.
+Os trechos trazem as posições no texto original, usadas para destacar os
+resultados.
+
+A divisão trabalha com posições e estimativas de tokens por caracteres, sem
+copiar o texto, e só recorre ao tokenizador exato (tiktoken, se instalado)
+para trechos próximos do limite do modelo.
+"""
+from typing import Any, Dict, List, Optional
+import hashlib
+import logging
+import re
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+# Caracteres por token na estimativa rápida (conservadora para português,
+# que gera mais tokens por palavra que o inglês)
+CHARS_PER_TOKEN = 3.5
+
+# Um trecho termina na melhor fronteira da sua parte final: a partir desta
+# fração do alvo
+_MIN_FILL = 0.5
+
+# Uma nova seção inicia um trecho se o atual já tiver esta fração do alvo
+_SECTION_MIN_FILL = 0.25
+
+# Trechos com estimativa acima desta fração do limite do modelo são contados
+# com o tokenizador exato
+_EXACT_MARGIN = 0.8
+
+# Títulos de seção: markdown, numerados ("2.1 Anamnese") ou em maiúsculas
+# ("HIPÓTESE DIAGNÓSTICA:"), no início de uma linha
+_HEADING = (
+    r"#{1,6}\s+\S"
+    r"|\d+(?:\.\d+)*[.)]?\s+[A-ZÀ-ÖØ-Þ][^\n]{0,80}(?:\n|$)"
+    r"|[A-ZÀ-ÖØ-Þ][A-ZÀ-ÖØ-Þ0-9 ()/,\-]{2,80}:?[ \t]*(?:\n|$)"
+)
+_SECTION_PATTERN = re.compile(r"\n\s*(?=" + _HEADING + ")")
+
+# Quebra de parágrafo (linha em branco)
+_PARAGRAPH_PATTERN = re.compile(r"\n[ \t]*\n\s*")
+
+# Fim de frase seguido do início de outra (maiúscula, número, aspas,
+# travessão ou marcador) ou de uma quebra de linha
+_SENTENCE_PATTERN = re.compile(
+    r"[.!?…]+[\"'”»)\]]*(?:\s*\n\s*|\s+(?=[\"'“«(\[\-–—•]?[A-ZÀ-ÖØ-Þ0-9]))"
+)
+
+# Título mais longo reconhecido, para que a busca de seções veja a linha inteira
+_HEADING_LOOKAHEAD = 100
+
+# Abreviações seguidas de ponto que não encerram a frase
+_ABBREVIATIONS = frozenset((
+    "dr", "dra", "drs", "sr", "sra", "srs", "srta", "prof", "profa", "psic", "enf", "fisiot",
+    "p", "pp", "pág", "págs", "fl", "fls", "art", "arts", "inc", "cap", "vol", "ed", "ref",
+    "n", "nº", "núm", "obs", "ex", "aprox", "cf", "vs", "séc", "tel", "av", "r",
+    "jan", "fev", "mar", "abr", "mai", "jun", "jul", "ago", "set", "out", "nov", "dez",
+    "crp", "crm", "cid", "dsm", "ltda", "cia", "min", "máx", "mín", "hab", "id", "pt", "sp", "rj"
+))
+
+# Contagens exatas já calculadas, por hash do texto
+_exact_counts = LRUCache(maxsize=4096)
+_tokenizer: List[Any] = []
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estima o número de tokens de um texto pelo número de caracteres.
+
+    Args:
+        text: Texto original
+
+    Returns:
+        Número estimado de tokens
+    """
+    return _estimate(len(text))
+
+def _estimate(chars: int) -> int:
+    """Estimativa de tokens para um texto de chars caracteres."""
+    return max(1, int(chars / CHARS_PER_TOKEN + 0.999))
+
+def get_tokenizer() -> Optional[Any]:
+    """
+    Tokenizador do modelo de embeddings, carregado na primeira chamada.
+
+    Returns:
+        Codificação do tiktoken, ou None se o pacote não estiver instalado
+    """
+    if not _tokenizer:
+        try:
+            import tiktoken
+            try:
+                encoding = tiktoken.encoding_for_model(settings.EMBEDDING_MODEL)
+            except KeyError:
+                encoding = tiktoken.get_encoding("cl100k_base")
+        except ImportError:
+            logger.warning("tiktoken não instalado; usando a estimativa de tokens por caracteres")
+            encoding = None
+        _tokenizer.append(encoding)
+    return _tokenizer[0]
+
+def count_tokens(text: str, exact: bool = False) -> int:
+    """
+    Conta os tokens de um texto.
+
+    Args:
+        text: Texto original
+        exact: Usa o tokenizador do modelo (com cache); sem ele, a estimativa
+
+    Returns:
+        Número de tokens
+    """
+    if not exact:
+        return estimate_tokens(text)
+    tokenizer = get_tokenizer()
+    if tokenizer is None:
+        return estimate_tokens(text)
+    key = hashlib.sha1(text.encode("utf-8")).digest()
+    count = _exact_counts.get(key)
+    if count is None:
+        count = len(tokenizer.encode(text, disallowed_special=()))
+        _exact_counts.set(key, count)
+    return count
+
+def _is_sentence_end(text: str, match: re.Match) -> bool:
+    """Descarta pontos de abreviações ("Dr. Silva", "p. 12") e iniciais ("J. Souza")."""
+    if match.group()[0] != "." or "\n" in match.group():
+        return True
+    word = text[max(0, match.start() - 12):match.start()].rsplit(None, 1)[-1:]
+    return not word or (len(word[0]) > 1 and word[0].lower() not in _ABBREVIATIONS)
+
+def _last_boundary(text: str, start: int, end: int) -> Optional[int]:
+    """Fim da última quebra de parágrafo, ou senão de frase, entre start e end."""
+    last = None
+    for match in _PARAGRAPH_PATTERN.finditer(text, start, end):
+        last = match.end()
+    if last is not None:
+        return last
+    # A frase seguinte precisa ser visível para confirmar o fim da frase
+    for match in reversed(list(_SENTENCE_PATTERN.finditer(text, start, min(len(text), end + 2)))):
+        if match.end() <= end and _is_sentence_end(text, match):
+            return match.end()
+    return None
+
+def _first_sentence(text: str, start: int, end: int) -> Optional[int]:
+    """Início da primeira frase que começa entre start e end."""
+    for match in _SENTENCE_PATTERN.finditer(text, start, min(len(text), end + 2)):
+        if match.end() >= end:
+            return None
+        if _is_sentence_end(text, match):
+            return match.end()
+    return None
+
+def split_text(text: str, target_tokens: Optional[int] = None, overlap_tokens: Optional[int] = None,
+               max_tokens: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Divide um texto em trechos de cerca de target_tokens tokens.
+
+    Cada trecho termina de preferência numa quebra de parágrafo da sua
+    segunda metade, senão num fim de frase, senão entre palavras, e um novo
+    título de seção inicia um novo trecho. Cada trecho começa com as últimas
+    frases do anterior, até overlap_tokens tokens, exceto no início de uma
+    seção. A busca por fronteiras só examina o fim de cada trecho.
+
+    Args:
+        text: Texto do documento
+        target_tokens: Tokens por trecho (padrão: settings.INGEST_CHUNK_SIZE)
+        overlap_tokens: Sobreposição entre trechos (padrão: settings.INGEST_CHUNK_OVERLAP)
+        max_tokens: Limite do modelo de embeddings; trechos próximos dele são
+            contados com o tokenizador exato e divididos se o excederem
+            (padrão: settings.INGEST_CHUNK_MAX_TOKENS)
+
+    Returns:
+        Trechos com "text", "start" e "end" (posições no texto original, sem
+        os espaços das pontas) e "tokens"
+    """
+    target_tokens = target_tokens or settings.INGEST_CHUNK_SIZE
+    overlap_tokens = settings.INGEST_CHUNK_OVERLAP if overlap_tokens is None else overlap_tokens
+    max_tokens = max_tokens or settings.INGEST_CHUNK_MAX_TOKENS
+    max_chars = max(2, int(target_tokens * CHARS_PER_TOKEN))
+    overlap_chars = min(int(overlap_tokens * CHARS_PER_TOKEN), max_chars // 2)
+    length = len(text)
+
+    chunks: List[Dict[str, Any]] = []
+    position = 0
+    while position < length:
+        while position < length and text[position].isspace():
+            position += 1
+        if position >= length:
+            break
+        limit = position + max_chars
+        fill = position + int(max_chars * _MIN_FILL)
+
+        section = _SECTION_PATTERN.search(
+            text, position + int(max_chars * _SECTION_MIN_FILL), min(length, limit + _HEADING_LOOKAHEAD)
+        )
+        if section is not None and section.start() < limit:
+            cut, overlap = section.start(), False
+        elif limit >= length:
+            cut, overlap = length, False
+        else:
+            cut = _last_boundary(text, fill, limit)
+            if cut is None:
+                space = max(text.rfind(" ", fill, limit), text.rfind("\n", fill, limit))
+                cut = space + 1 if space > position else limit
+            overlap = True
+
+        end = cut
+        while end > position and text[end - 1].isspace():
+            end -= 1
+        chunks.extend(_fit(text, position, end, max_tokens))
+
+        next_position = cut
+        if overlap and overlap_chars > 0:
+            start = _first_sentence(text, max(position + 1, cut - overlap_chars), cut)
+            if start is not None:
+                next_position = start
+        position = next_position
+    return chunks
+
+def _fit(text: str, start: int, end: int, max_tokens: int) -> List[Dict[str, Any]]:
+    """Confirma com o tokenizador exato que o trecho cabe no limite; se não couber, divide ao meio."""
+    tokens = _estimate(end - start)
+    if tokens >= max_tokens * _EXACT_MARGIN:
+        tokens = count_tokens(text[start:end], exact=True)
+        if tokens > max_tokens and end - start > 1:
+            space = text.rfind(" ", start + 1, (start + end) // 2)
+            middle = space if space > start else (start + end) // 2
+            left = text[start:middle].rstrip()
+            right = text[middle:end].lstrip()
+            return (_fit(text, start, start + len(left), max_tokens)
+                    + _fit(text, end - len(right), end, max_tokens))
+    return [{"text": text[start:end], "start": start, "end": end, "tokens": tokens}]
+
+def chunk_text(text: str, target_tokens: Optional[int] = None, overlap_tokens: Optional[int] = None) -> List[str]:
+    """
+    Divide um texto em trechos (ver split_text).
+
+    Args:
+        text: Texto do documento
+        target_tokens: Tokens por trecho
+        overlap_tokens: Sobreposição entre trechos
+
+    Returns:
+        Textos dos trechos
+    """
+    return [chunk["text"] for chunk in split_text(text, target_tokens, overlap_tokens)]
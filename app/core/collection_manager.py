@@ -0,0 +1,695 @@
+"""
+Administração das coleções do Qdrant do PsiCollab.
+Criação da coleção da base de conhecimento, migração da quantização dos
+vetores, migração para vetores nomeados da busca em dois estágios,
+construção de índices HNSW, otimização de segmentos e relatórios de
+recall/latência.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+import logging
+import random
+import time
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from app.core.config import settings
+from app.core.projection import DimensionReducer
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+# Modos de quantização suportados e bytes por dimensão de cada um
+QUANTIZATION_MODES = {"none": 4.0, "scalar": 1.0, "binary": 1 / 8}
+
+# Campos do payload usados em filtros e o tipo do índice de cada um
+PAYLOAD_INDEXES = {
+    "tipo": models.PayloadSchemaType.KEYWORD
+}
+
+def quantization_config(mode: str, always_ram: bool = True) -> Optional[models.QuantizationConfig]:
+    """
+    Monta a configuração de quantização do Qdrant.
+
+    Args:
+        mode: "none", "scalar" (int8) ou "binary" (1 bit por dimensão)
+        always_ram: Mantém os vetores quantizados sempre em RAM
+
+    Returns:
+        Configuração de quantização, ou None para "none"
+    """
+    if mode == "none":
+        return None
+    if mode == "scalar":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8,
+                quantile=0.99,
+                always_ram=always_ram
+            )
+        )
+    if mode == "binary":
+        return models.BinaryQuantization(
+            binary=models.BinaryQuantizationConfig(always_ram=always_ram)
+        )
+    raise ValueError(f"Modo de quantização inválido: {mode}")
+
+def quantization_search_params(
+    mode: str,
+    oversampling: float,
+    rescore: bool = True
+) -> Optional[models.QuantizationSearchParams]:
+    """
+    Monta os parâmetros de busca quantizada.
+
+    A busca recupera oversampling * limit candidatos pelos vetores quantizados
+    e, com rescore, reordena esses candidatos pelos vetores originais.
+
+    Args:
+        mode: Modo de quantização da coleção
+        oversampling: Fator de candidatos extras recuperados
+        rescore: Se deve reordenar os candidatos com os vetores originais
+
+    Returns:
+        Parâmetros de busca, ou None se a coleção não é quantizada
+    """
+    if mode == "none":
+        return None
+    return models.QuantizationSearchParams(
+        ignore=False,
+        rescore=rescore,
+        oversampling=oversampling
+    )
+
+def create_knowledge_base(
+    client: QdrantClient,
+    collection_name: Optional[str] = None,
+    vector_size: Optional[int] = None,
+    quantization: Optional[str] = None,
+    compact_size: Optional[int] = None
+) -> bool:
+    """
+    Cria a coleção da base de conhecimento, se ainda não existir.
+
+    Com compact_size, a coleção recebe dois vetores nomeados para a busca em
+    dois estágios: o compacto, em RAM e com índice HNSW, e o completo, em
+    disco e sem grafo HNSW, lido apenas para reordenar os candidatos.
+
+    Args:
+        client: Cliente do Qdrant
+        collection_name: Nome da coleção (padrão: settings.COLLECTION_NAME)
+        vector_size: Dimensão dos vetores (padrão: settings.VECTOR_SIZE)
+        quantization: Modo de quantização (padrão: settings.QDRANT_QUANTIZATION)
+        compact_size: Dimensão do vetor compacto (None cria um único vetor)
+
+    Returns:
+        True se a coleção foi criada, False se já existia
+    """
+    collection_name = collection_name or settings.COLLECTION_NAME
+    quantization = quantization or settings.QDRANT_QUANTIZATION
+    if client.collection_exists(collection_name):
+        logger.info(f"Coleção '{collection_name}' já existe")
+        return False
+
+    vectors_config = models.VectorParams(
+        size=vector_size or settings.VECTOR_SIZE,
+        distance=models.Distance.COSINE,
+        on_disk=quantization != "none"
+    )
+    if compact_size:
+        vectors_config = {
+            settings.FULL_VECTOR_NAME: models.VectorParams(
+                size=vector_size or settings.VECTOR_SIZE,
+                distance=models.Distance.COSINE,
+                on_disk=True,
+                hnsw_config=models.HnswConfigDiff(m=0)
+            ),
+            settings.COMPACT_VECTOR_NAME: models.VectorParams(
+                size=compact_size,
+                distance=models.Distance.COSINE
+            )
+        }
+
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=vectors_config,
+        hnsw_config=models.HnswConfigDiff(
+            m=settings.QDRANT_HNSW_M,
+            ef_construct=settings.QDRANT_HNSW_EF_CONSTRUCT
+        ),
+        optimizers_config=models.OptimizersConfigDiff(
+            indexing_threshold=settings.QDRANT_INDEXING_THRESHOLD,
+            default_segment_number=settings.QDRANT_SEGMENT_NUMBER
+        ),
+        quantization_config=quantization_config(quantization)
+    )
+    create_payload_indexes(client, collection_name)
+    logger.info(f"Coleção '{collection_name}' criada (quantização: {quantization})")
+    return True
+
+def create_payload_indexes(client: QdrantClient, collection_name: str) -> List[str]:
+    """
+    Cria os índices de payload dos campos usados em filtros (ver PAYLOAD_INDEXES).
+
+    Sem índice, um filtro por "tipo" obriga o Qdrant a ler o payload de cada
+    candidato; com o índice, o planejador do Qdrant conhece a cardinalidade
+    do filtro e as contagens por tipo podem ser obtidas com facet.
+
+    Args:
+        client: Cliente do Qdrant
+        collection_name: Nome da coleção
+
+    Returns:
+        Campos que receberam um índice novo
+    """
+    existing = client.get_collection(collection_name).payload_schema or {}
+    created = []
+    for field, schema in PAYLOAD_INDEXES.items():
+        if field in existing:
+            continue
+        client.create_payload_index(
+            collection_name=collection_name,
+            field_name=field,
+            field_schema=schema,
+            wait=True
+        )
+        created.append(field)
+        logger.info(f"Índice de payload criado em '{collection_name}.{field}' ({schema.value})")
+    return created
+
+def migrate_quantization(client: QdrantClient, collection_name: str, mode: str) -> None:
+    """
+    Altera a quantização de uma coleção existente.
+
+    Com quantização, os vetores originais passam para o disco (são lidos
+    apenas no rescore) e os quantizados ficam em RAM. O Qdrant reconstrói
+    os segmentos em segundo plano.
+
+    Args:
+        client: Cliente do Qdrant
+        collection_name: Nome da coleção
+        mode: Novo modo de quantização
+    """
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Modo de quantização inválido: {mode}")
+
+    client.update_collection(
+        collection_name=collection_name,
+        vectors_config={"": models.VectorParamsDiff(on_disk=mode != "none")},
+        quantization_config=quantization_config(mode) or models.Disabled.DISABLED
+    )
+    logger.info(f"Quantização da coleção '{collection_name}' alterada para '{mode}'")
+
+def estimate_vector_memory(count: int, dim: int, mode: str) -> Dict[str, Any]:
+    """
+    Estima a memória ocupada pelos vetores em RAM.
+
+    Args:
+        count: Número de vetores
+        dim: Dimensão dos vetores
+        mode: Modo de quantização
+
+    Returns:
+        Bytes em RAM com e sem quantização e o fator de redução
+    """
+    original = count * dim * QUANTIZATION_MODES["none"]
+    in_ram = count * dim * QUANTIZATION_MODES[mode]
+    return {
+        "mode": mode,
+        "original_bytes": int(original),
+        "ram_bytes": int(in_ram),
+        "reduction": round(original / in_ram, 1) if in_ram else None
+    }
+
+def estimate_two_stage_memory(count: int, full_dim: int, compact_dim: int) -> Dict[str, Any]:
+    """
+    Estima a memória em RAM economizada pela busca em dois estágios.
+
+    Na busca em dois estágios apenas os vetores compactos ficam em RAM; os
+    completos ficam em disco e são lidos somente para os candidatos.
+
+    Args:
+        count: Número de vetores
+        full_dim: Dimensão do vetor completo
+        compact_dim: Dimensão do vetor compacto
+
+    Returns:
+        Bytes em RAM com vetores completos e com vetores compactos e o fator de redução
+    """
+    original = count * full_dim * QUANTIZATION_MODES["none"]
+    in_ram = count * compact_dim * QUANTIZATION_MODES["none"]
+    return {
+        "original_bytes": int(original),
+        "ram_bytes": int(in_ram),
+        "saved_bytes": int(original - in_ram),
+        "reduction": round(original / in_ram, 1) if in_ram else None
+    }
+
+def _sample_ids(
+    client: QdrantClient,
+    collection_name: str,
+    sample_size: int,
+    seed: Optional[int] = None,
+    batch_size: int = 10000
+) -> List[Any]:
+    """
+    Sorteia ids de pontos da coleção com probabilidade uniforme.
+
+    Lê apenas os ids (sem payloads nem vetores) e mantém só a amostra em
+    memória (reservoir sampling), em vez de usar os primeiros pontos do
+    scroll, que seguem a ordem de inserção.
+    """
+    rng = random.Random(seed)
+    sample: List[Any] = []
+    seen = 0
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            limit=batch_size,
+            offset=offset,
+            with_payload=False,
+            with_vectors=False
+        )
+        for point in points:
+            seen += 1
+            if len(sample) < sample_size:
+                sample.append(point.id)
+            else:
+                position = rng.randrange(seen)
+                if position < sample_size:
+                    sample[position] = point.id
+        if offset is None:
+            return sample
+
+def _sample_vectors(
+    client: QdrantClient,
+    collection_name: str,
+    sample_size: int,
+    using: Optional[str] = None,
+    seed: Optional[int] = None
+) -> List[List[float]]:
+    """Lê os vetores (ou o vetor nomeado using) de uma amostra aleatória da coleção (ver _sample_ids)."""
+    ids = _sample_ids(client, collection_name, sample_size, seed=seed)
+    if not ids:
+        return []
+    points = client.retrieve(
+        collection_name=collection_name,
+        ids=ids,
+        with_payload=False,
+        with_vectors=[using] if using else True
+    )
+    return [point.vector[using] if using else point.vector for point in points]
+
+def _summarize_report_row(
+    name: str,
+    ids: List[List[Any]],
+    expected_ids: List[List[Any]],
+    latencies: np.ndarray,
+    k: int,
+    **extra: Any
+) -> Dict[str, Any]:
+    """Resume uma configuração dos relatórios: recall@k contra a busca exata e latências p50/p95 (ms)."""
+    recall = np.mean([
+        len(set(found) & set(expected)) / max(1, len(expected))
+        for found, expected in zip(ids, expected_ids)
+    ])
+    return {
+        "config": name,
+        **extra,
+        f"recall@{k}": round(float(recall), 4),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 3)
+    }
+
+def _run_queries(
+    client: QdrantClient,
+    collection_name: str,
+    queries: List[List[float]],
+    k: int,
+    search_params: Optional[models.SearchParams],
+    using: Optional[str] = None,
+    prefetches: Optional[List[models.Prefetch]] = None
+) -> tuple:
+    """Executa as consultas uma a uma, retornando os ids encontrados e as latências (ms)."""
+    ids, latencies = [], []
+    for position, query in enumerate(queries):
+        started = time.perf_counter()
+        response = client.query_points(
+            collection_name=collection_name,
+            query=query,
+            using=using,
+            prefetch=prefetches[position] if prefetches else None,
+            limit=k,
+            search_params=search_params,
+            with_payload=False
+        )
+        latencies.append((time.perf_counter() - started) * 1000)
+        ids.append([point.id for point in response.points])
+    return ids, np.array(latencies)
+
+def measure_search_latency(
+    client: QdrantClient,
+    collection_name: str,
+    sample_size: int = 100,
+    k: int = 10,
+    hnsw_ef: int = 128
+) -> Dict[str, Any]:
+    """
+    Mede a latência da busca aproximada na coleção.
+
+    Args:
+        client: Cliente do Qdrant
+        collection_name: Nome da coleção
+        sample_size: Número de consultas (vetores da própria coleção)
+        k: Resultados por consulta
+        hnsw_ef: Parâmetro ef do HNSW
+
+    Returns:
+        Latências p50/p95/p99 (ms) e número de consultas
+    """
+    queries = _sample_vectors(client, collection_name, sample_size)
+    if not queries:
+        return {"queries": 0}
+    _, latencies = _run_queries(client, collection_name, queries, k, models.SearchParams(hnsw_ef=hnsw_ef))
+    return {
+        "queries": len(queries),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3)
+    }
+
+def inspect_collection(client: QdrantClient, collection_name: str) -> Dict[str, Any]:
+    """
+    Resume o estado dos segmentos e índices de uma coleção.
+
+    Uma coleção com indexed_vectors_count abaixo de points_count ainda tem
+    segmentos com índice "plain", ou seja, buscados por força bruta.
+
+    Args:
+        client: Cliente do Qdrant
+        collection_name: Nome da coleção
+
+    Returns:
+        Estado da coleção, contagens e configurações de HNSW e do otimizador
+    """
+    info = client.get_collection(collection_name)
+    points = info.points_count or 0
+    indexed = info.indexed_vectors_count or 0
+    return {
+        "status": str(info.status.value if hasattr(info.status, "value") else info.status),
+        "optimizer_status": str(info.optimizer_status),
+        "segments_count": info.segments_count,
+        "points_count": points,
+        "indexed_vectors_count": indexed,
+        "unindexed_vectors": max(0, points - indexed),
+        "hnsw": {
+            "m": info.config.hnsw_config.m,
+            "ef_construct": info.config.hnsw_config.ef_construct
+        },
+        "optimizer": {
+            "indexing_threshold": info.config.optimizer_config.indexing_threshold,
+            "default_segment_number": info.config.optimizer_config.default_segment_number
+        },
+        "payload_schema": {
+            field: str(schema.data_type.value if hasattr(schema.data_type, "value") else schema.data_type)
+            for field, schema in (info.payload_schema or {}).items()
+        }
+    }
+
+def optimize_collection(
+    client: QdrantClient,
+    collection_name: str,
+    m: Optional[int] = None,
+    ef_construct: Optional[int] = None,
+    segment_number: Optional[int] = None,
+    indexing_threshold: Optional[int] = None
+) -> None:
+    """
+    Dispara a construção do índice HNSW e a fusão de segmentos pequenos.
+
+    Reduz o indexing_threshold para que segmentos pequenos também recebam
+    índice HNSW e define o número alvo de segmentos; o otimizador do Qdrant
+    funde os segmentos excedentes e constrói os índices em segundo plano
+    (ver wait_for_optimizer).
+
+    Args:
+        client: Cliente do Qdrant
+        collection_name: Nome da coleção
+        m: Arestas por nó do grafo HNSW
+        ef_construct: Tamanho da lista de candidatos na construção do HNSW
+        segment_number: Número alvo de segmentos
+        indexing_threshold: Tamanho (KB) a partir do qual um segmento é indexado
+    """
+    client.update_collection(
+        collection_name=collection_name,
+        hnsw_config=models.HnswConfigDiff(
+            m=m or settings.QDRANT_HNSW_M,
+            ef_construct=ef_construct or settings.QDRANT_HNSW_EF_CONSTRUCT
+        ),
+        optimizers_config=models.OptimizersConfigDiff(
+            indexing_threshold=indexing_threshold or settings.QDRANT_INDEXING_THRESHOLD,
+            default_segment_number=segment_number or settings.QDRANT_SEGMENT_NUMBER
+        )
+    )
+    logger.info(
+        f"Otimização da coleção '{collection_name}' solicitada "
+        f"(m={m or settings.QDRANT_HNSW_M}, ef_construct={ef_construct or settings.QDRANT_HNSW_EF_CONSTRUCT})"
+    )
+
+def wait_for_optimizer(
+    client: QdrantClient,
+    collection_name: str,
+    timeout: float = 600.0,
+    poll_interval: float = 1.0
+) -> Dict[str, Any]:
+    """
+    Aguarda o otimizador do Qdrant ficar ocioso.
+
+    A coleção é considerada pronta quando o status é "green" e o otimizador
+    está "ok". Não se exige que todos os vetores estejam indexados: segmentos
+    abaixo do indexing_threshold e vetores nomeados com m=0 nunca recebem
+    índice HNSW, e unindexed_vectors continua acima de zero nesses casos.
+
+    Args:
+        client: Cliente do Qdrant
+        collection_name: Nome da coleção
+        timeout: Tempo máximo de espera (segundos)
+        poll_interval: Intervalo entre verificações (segundos)
+
+    Returns:
+        Estado final da coleção (ver inspect_collection)
+
+    Raises:
+        TimeoutError: Se o otimizador não terminar dentro do timeout
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        state = inspect_collection(client, collection_name)
+        if state["status"] == "green" and state["optimizer_status"] == "ok":
+            return state
+        if time.monotonic() >= deadline:
+            raise TimeoutError(
+                f"Otimizador da coleção '{collection_name}' não terminou em {timeout}s "
+                f"(status {state['status']}, otimizador {state['optimizer_status']})"
+            )
+        time.sleep(poll_interval)
+
+def quantization_report(
+    client: QdrantClient,
+    collection_name: str,
+    sample_size: int = 100,
+    k: int = 10,
+    oversamplings: Sequence[float] = (1.0, 2.0, 4.0),
+    hnsw_ef: int = 128
+) -> List[Dict[str, Any]]:
+    """
+    Mede recall@k e latência da busca quantizada contra a busca exata.
+
+    A verdade de referência é a busca exata (força bruta) sobre os vetores
+    originais. Cada configuração de oversampling é medida com e sem rescore.
+
+    Args:
+        client: Cliente do Qdrant
+        collection_name: Nome da coleção
+        sample_size: Número de consultas (vetores da própria coleção)
+        k: Número de resultados avaliados
+        oversamplings: Fatores de oversampling a avaliar
+        hnsw_ef: Parâmetro ef do HNSW usado nas buscas aproximadas
+
+    Returns:
+        Uma linha por configuração, com recall@k e latências p50/p95 (ms)
+    """
+    queries = _sample_vectors(client, collection_name, sample_size)
+    if not queries:
+        return []
+
+    def run(search_params: models.SearchParams) -> tuple:
+        return _run_queries(client, collection_name, queries, k, search_params)
+
+    exact_ids, exact_latencies = run(models.SearchParams(exact=True))
+    report = [_summarize_report_row("exact", exact_ids, exact_ids, exact_latencies, k)]
+
+    ids, latencies = run(models.SearchParams(
+        hnsw_ef=hnsw_ef, quantization=models.QuantizationSearchParams(ignore=True)
+    ))
+    report.append(_summarize_report_row("hnsw_original", ids, exact_ids, latencies, k))
+
+    for oversampling in oversamplings:
+        for rescore in (False, True):
+            ids, latencies = run(models.SearchParams(
+                hnsw_ef=hnsw_ef,
+                quantization=models.QuantizationSearchParams(
+                    ignore=False, rescore=rescore, oversampling=oversampling
+                )
+            ))
+            report.append(_summarize_report_row(
+                "quantized", ids, exact_ids, latencies, k, oversampling=oversampling, rescore=rescore
+            ))
+    return report
+
+def fit_projection(
+    client: QdrantClient,
+    collection_name: str,
+    sample_size: int = 10000,
+    dim: Optional[int] = None,
+    using: Optional[str] = None,
+    seed: Optional[int] = None
+) -> DimensionReducer:
+    """
+    Ajusta a projeção PCA dos vetores compactos sobre uma amostra aleatória da coleção.
+
+    Args:
+        client: Cliente do Qdrant
+        collection_name: Nome da coleção
+        sample_size: Número de vetores da amostra
+        dim: Dimensão dos vetores compactos (padrão: settings.COMPACT_VECTOR_SIZE)
+        using: Vetor nomeado lido da coleção (None para coleções de vetor único)
+        seed: Semente do sorteio da amostra (None para um sorteio diferente a cada execução)
+
+    Returns:
+        Projeção ajustada
+    """
+    vectors = _sample_vectors(client, collection_name, sample_size, using=using, seed=seed)
+    return DimensionReducer.fit_pca(vectors, dim)
+
+def migrate_to_two_stage(
+    client: QdrantClient,
+    source_name: str,
+    target_name: str,
+    reducer: DimensionReducer,
+    batch_size: int = 256
+) -> int:
+    """
+    Copia uma coleção de vetor único para uma coleção com vetores nomeados.
+
+    Cada ponto é gravado com o vetor completo original e sua projeção
+    compacta, mantendo ids e payloads. A coleção de origem não é alterada;
+    ao final, aponte settings.COLLECTION_NAME para a nova coleção e habilite
+    settings.TWO_STAGE_SEARCH.
+
+    Args:
+        client: Cliente do Qdrant
+        source_name: Coleção de origem (vetor único)
+        target_name: Coleção de destino (criada se não existir)
+        reducer: Projeção dos vetores compactos
+        batch_size: Pontos lidos e gravados por lote
+
+    Returns:
+        Número de pontos copiados
+    """
+    info = client.get_collection(source_name)
+    create_knowledge_base(
+        client,
+        target_name,
+        vector_size=info.config.params.vectors.size,
+        quantization="none",
+        compact_size=reducer.dim
+    )
+
+    copied = 0
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=source_name,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True
+        )
+        if points:
+            vectors = reducer.named_vectors([point.vector for point in points])
+            client.upsert(
+                collection_name=target_name,
+                points=[
+                    models.PointStruct(id=point.id, vector=vector, payload=point.payload)
+                    for point, vector in zip(points, vectors)
+                ],
+                wait=True
+            )
+            copied += len(points)
+            logger.info(f"{copied} pontos copiados para '{target_name}'")
+        if offset is None:
+            return copied
+
+def two_stage_report(
+    client: QdrantClient,
+    collection_name: str,
+    reducer: DimensionReducer,
+    sample_size: int = 100,
+    k: int = 10,
+    candidate_limits: Sequence[int] = (50, 100, 200),
+    hnsw_ef: int = 128
+) -> List[Dict[str, Any]]:
+    """
+    Mede recall@k e latência da busca em dois estágios contra a busca exata.
+
+    A verdade de referência é a busca exata sobre os vetores completos. Para
+    cada número de candidatos, mede a busca apenas pelo vetor compacto e a
+    busca com reordenação pelo vetor completo.
+
+    Args:
+        client: Cliente do Qdrant
+        collection_name: Coleção com vetores nomeados
+        reducer: Projeção usada para gerar os vetores compactos das consultas
+        sample_size: Número de consultas (vetores da própria coleção)
+        k: Número de resultados avaliados
+        candidate_limits: Números de candidatos do primeiro estágio a avaliar
+        hnsw_ef: Parâmetro ef do HNSW do primeiro estágio
+
+    Returns:
+        Uma linha por configuração, com recall@k e latências p50/p95 (ms)
+    """
+    queries = _sample_vectors(client, collection_name, sample_size, using=settings.FULL_VECTOR_NAME)
+    if not queries:
+        return []
+    compact_queries = reducer.transform(queries).tolist()
+
+    exact_ids, exact_latencies = _run_queries(
+        client, collection_name, queries, k, models.SearchParams(exact=True), using=settings.FULL_VECTOR_NAME
+    )
+    report = [_summarize_report_row("exact_full", exact_ids, exact_ids, exact_latencies, k)]
+
+    ids, latencies = _run_queries(
+        client, collection_name, compact_queries, k, models.SearchParams(hnsw_ef=hnsw_ef),
+        using=settings.COMPACT_VECTOR_NAME
+    )
+    report.append(_summarize_report_row("compact_only", ids, exact_ids, latencies, k))
+
+    for candidates in candidate_limits:
+        prefetches = [
+            models.Prefetch(
+                query=compact_query,
+                using=settings.COMPACT_VECTOR_NAME,
+                limit=candidates,
+                params=models.SearchParams(hnsw_ef=max(hnsw_ef, candidates))
+            )
+            for compact_query in compact_queries
+        ]
+        ids, latencies = _run_queries(
+            client, collection_name, queries, k, None,
+            using=settings.FULL_VECTOR_NAME, prefetches=prefetches
+        )
+        report.append(_summarize_report_row("two_stage", ids, exact_ids, latencies, k, candidates=candidates))
+    return report
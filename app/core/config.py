@@ -39,6 +39,139 @@ class Settings(BaseSettings):
     COLLECTION_NAME: str = "knowledge_base"
     VECTOR_SIZE: int = 1536  # Tamanho do vetor para modelo GPT
     VECTOR_DB_URL: str = "http://localhost:6333"
+
+    # Backend vetorial da busca: "qdrant" ou "local" (matriz NumPy mapeada em memória)
+    VECTOR_BACKEND: str = "qdrant"
+    LOCAL_VECTOR_STORE_PATH: str = "data/vector_store"  # Um subdiretório por coleção
+    LOCAL_VECTOR_STORE_DTYPE: str = "float32"  # "float16" usa metade da memória, mas converte a cada busca
+    LOCAL_VECTOR_STORE_FALLBACK: bool = True  # Usa o armazenamento local se o Qdrant falhar
+    
+    # Índice HNSW e otimizador de segmentos da coleção
+    QDRANT_HNSW_M: int = 16  # Arestas por nó do grafo HNSW
+    QDRANT_HNSW_EF_CONSTRUCT: int = 128  # Candidatos avaliados na construção do índice
+    QDRANT_INDEXING_THRESHOLD: int = 1000  # KB; segmentos menores que isso ficam sem índice ("plain")
+    QDRANT_SEGMENT_NUMBER: int = 2  # Número alvo de segmentos após a fusão
+    
+    # Quantização dos vetores da coleção ("none", "scalar" int8 ou "binary")
+    QDRANT_QUANTIZATION: str = "none"
+    QDRANT_QUANTIZATION_OVERSAMPLING: float = 2.0  # Candidatos extras buscados nos vetores quantizados
+    QDRANT_QUANTIZATION_RESCORE: bool = True  # Reordena os candidatos com os vetores originais
+    
+    # Busca em dois estágios (candidatos pelo vetor compacto, reordenação pelo completo)
+    TWO_STAGE_SEARCH: bool = False  # Exige coleção com vetores nomeados (manage_collection.py two-stage)
+    FULL_VECTOR_NAME: str = "full"
+    COMPACT_VECTOR_NAME: str = "compact"
+    COMPACT_VECTOR_SIZE: int = 256
+    COMPACT_PROJECTION: str = "pca"  # "pca" (ajustada sobre o corpus) ou "truncate" (modelos Matryoshka)
+    COMPACT_PROJECTION_PATH: str = "data/projections/knowledge_base.npz"
+    TWO_STAGE_CANDIDATES: int = 100  # Candidatos do primeiro estágio reordenados pelo vetor completo
+    
+    # Pool de conexões e timeouts do Qdrant
+    QDRANT_POOL_SIZE: int = 32  # Máximo de conexões simultâneas
+    QDRANT_KEEPALIVE_CONNECTIONS: int = 16  # Conexões mantidas abertas entre requisições
+    QDRANT_KEEPALIVE_EXPIRY: float = 30.0  # Segundos até fechar uma conexão ociosa
+    QDRANT_TIMEOUT: int = 10  # Timeout padrão do cliente (segundos)
+    QDRANT_SEARCH_TIMEOUT: float = 2.0  # Timeout por chamada de busca (segundos)
+    RRF_K: int = 60  # Constante do reciprocal rank fusion usado para combinar buscas
+    
+    # Planejamento de buscas filtradas por tipo
+    SEARCH_EXACT_MAX_POINTS: int = 5000  # Filtros com até esse número de documentos usam busca exata
+    SEARCH_FILTERED_HNSW_EF: int = 256  # ef do HNSW para filtros amplos
+    SEARCH_TYPE_COUNTS_TTL: float = 60.0  # Segundos de cache das contagens por tipo
+    SEARCH_MAX_TYPES: int = 100  # Número máximo de tipos retornados nas contagens
+    
+    # Busca híbrida (BM25 em memória sobre "conteudo" combinado à busca vetorial por RRF)
+    HYBRID_SEARCH: bool = False
+    HYBRID_CANDIDATES: int = 20  # Resultados de cada busca considerados na combinação
+    BM25_K1: float = 1.2  # Saturação da frequência dos termos
+    BM25_B: float = 0.75  # Normalização pelo tamanho do documento
+    LEXICAL_INDEX_REFRESH_INTERVAL: float = 5.0  # Segundos entre verificações da geração da coleção (atualização do índice)
+    LEXICAL_INDEX_DELTA_MAX: int = 10000  # Pontos alterados por geração aplicados um a um; acima disso, o índice é recarregado
+    LEXICAL_INDEX_DELTA_TTL: int = 60 * 60  # Tempo de vida da lista de pontos alterados de cada geração (segundos)
+    
+    # Reranking dos primeiros resultados da busca
+    RERANKER: str = "lexical"  # "lexical" (local, CPU) ou "none"; outros via register_reranker
+    RERANK_TOP_N: int = 20  # Resultados da primeira etapa reordenados
+    RERANK_BATCH_SIZE: int = 32  # Pares (consulta, documento) pontuados por lote
+    RERANK_BUDGET_MS: float = 50.0  # Acima disso, mantém a ordem da primeira etapa
+    RERANK_LEXICAL_WEIGHT: float = 0.3  # Peso da sobreposição lexical no reranker "lexical"
+    
+    # Cache semântico (reaproveita a resposta de consultas parecidas com os mesmos filtros)
+    SEMANTIC_CACHE_ENABLED: bool = False  # Paráfrases passam a receber a resposta da consulta original
+    SEMANTIC_CACHE_THRESHOLD: float = 0.95  # Similaridade de cosseno mínima entre as consultas
+    SEMANTIC_CACHE_SIZE: int = 1024  # Consultas mantidas na matriz de embeddings
+    SEMANTIC_CACHE_TTL: float = 60 * 10  # 10 minutos
+    
+    # Paginação por cursor
+    SEARCH_PAGE_DEPTH: int = 200  # Resultados ranqueados alcançáveis pela paginação de uma busca
+    
+    # Diversificação dos resultados por maximal marginal relevance (MMR)
+    MMR_POOL_FACTOR: int = 4  # Candidatos buscados por resultado pedido
+    
+    # Registro das buscas para análise (fila em memória gravada em lotes no SQLite)
+    SEARCH_LOG_ENABLED: bool = True
+    SEARCH_LOG_PATH: str = "data/search_log.db"
+    SEARCH_LOG_QUEUE_SIZE: int = 10000  # Registros acima disso são descartados (e contados)
+    SEARCH_LOG_BATCH_SIZE: int = 500  # Registros gravados por transação
+    SEARCH_LOG_FLUSH_INTERVAL: float = 1.0  # Espera máxima (segundos) antes de gravar um lote incompleto
+    
+    # Métricas no formato do Prometheus
+    METRICS_ENABLED: bool = True  # Expõe /metrics e mede a latência de cada rota
+    
+    # Agrupamento de buscas concorrentes (micro-batching)
+    SEARCH_BATCHING_ENABLED: bool = True
+    SEARCH_BATCH_WINDOW_MS: float = 3.0  # Espera máxima por outras buscas enquanto um lote está em execução
+    SEARCH_BATCH_MAX_SIZE: int = 32  # Executa o lote imediatamente ao atingir este tamanho
+
+    # Configurações de embeddings
+    EMBEDDING_PROVIDER: str = os.getenv("EMBEDDING_PROVIDER", "openai")  # "openai" ou "hashing" (local, sem rede)
+    EMBEDDING_MODEL: str = "text-embedding-ada-002"
+    EMBEDDING_API_URL: str = "https://api.openai.com/v1"
+    EMBEDDING_BATCH_SIZE: int = 256  # Textos por requisição de embeddings (limite do provedor: 2048)
+    EMBEDDING_BATCH_MAX_TOKENS: int = 100000  # Tokens estimados por requisição
+    EMBEDDING_CONCURRENCY: int = 8  # Requisições simultâneas à API
+    EMBEDDING_REQUESTS_PER_MINUTE: int = 3000  # Limites de taxa da conta
+    EMBEDDING_TOKENS_PER_MINUTE: int = 1000000
+    EMBEDDING_MAX_RETRIES: int = 6  # Novas tentativas em erros temporários (429, 5xx, rede)
+    EMBEDDING_RETRY_BASE_DELAY: float = 0.5  # Espera base (s) da espera exponencial com jitter
+    EMBEDDING_TIMEOUT: float = 30.0  # Prazo de cada requisição (s)
+    
+    # Ingestão em lote da base de conhecimento
+    INGEST_CHUNK_SIZE: int = 400  # Tokens por trecho (alvo)
+    INGEST_CHUNK_OVERLAP: int = 60  # Tokens repetidos entre trechos consecutivos
+    INGEST_CHUNK_MAX_TOKENS: int = 8191  # Limite de tokens por texto do modelo de embeddings
+    INGEST_EMBED_CONCURRENCY: int = 4  # Requisições de embeddings simultâneas
+    INGEST_UPSERT_CONCURRENCY: int = 4  # Gravações simultâneas no Qdrant
+    INGEST_QUEUE_SIZE: int = 8  # Lotes aguardando entre as etapas (contrapressão)
+    INGEST_MANIFEST_ENABLED: bool = True  # Reingere apenas trechos novos ou alterados
+    INGEST_MANIFEST_PATH: str = "ingest_manifest.db"  # SQLite ao lado de psicollab.db
+    INGEST_CHECKPOINT_ENABLED: bool = True  # Grava o progresso para retomar ingestões interrompidas
+    INGEST_CHECKPOINT_PATH: str = "ingest_checkpoint.db"
+    INGEST_MAX_RETRIES: int = 3  # Novas tentativas de um lote com falha ao retomar
+    
+    # Cache de embeddings de consultas (LRU local + Redis compartilhado)
+    EMBEDDING_CACHE_SIZE: int = 10000  # Entradas no cache local de cada processo
+    EMBEDDING_CACHE_TTL: float = 60 * 60  # 1 hora
+    EMBEDDING_CACHE_REDIS: bool = True  # Habilita o nível compartilhado no Redis
+    EMBEDDING_CACHE_REDIS_TTL: int = 60 * 60 * 24 * 7  # 7 dias
+    
+    # Cache de respostas de busca, invalidado pela geração da coleção
+    SEARCH_CACHE_ENABLED: bool = True
+    SEARCH_CACHE_BACKEND: str = "memory"  # Onde ficam as entradas: "memory" ou "redis"
+    SEARCH_CACHE_SIZE: int = 2048  # Entradas no backend em memória
+    SEARCH_CACHE_TTL: int = 60 * 5  # 5 minutos
+    # Geração no Redis, compartilhada com a ingestão (que roda em outro processo)
+    # com qualquer backend; sem ela, a ingestão limpa o cache pela API
+    SEARCH_CACHE_SHARED_GENERATION: bool = True
+    SEARCH_CACHE_GENERATION_TTL: float = 1.0  # Segundos em que a geração lida do Redis é reaproveitada (atraso máximo para ver escritas de outro processo)
+    SEARCH_CACHE_PURGE_URL: Optional[str] = os.getenv("SEARCH_CACHE_PURGE_URL")  # Ex.: http://api:8080/api/v1/search/cache
+    SEARCH_CACHE_PURGE_TOKEN: Optional[str] = os.getenv("SEARCH_CACHE_PURGE_TOKEN")  # Token de um administrador
+    
+    # Configurações do Redis usado pelos caches
+    REDIS_HOST: str = "redis"
+    REDIS_PORT: int = 6379
+    REDIS_CACHE_DB: int = 1  # Banco separado do usado pela autenticação por SMS
+    REDIS_CACHE_TIMEOUT: float = 0.05  # Segundos; falhas do cache são tratadas como miss
     
     # Configurações de logging
     LOG_LEVEL: str = "INFO"
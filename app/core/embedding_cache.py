@@ -0,0 +1,165 @@
+"""
+Cache de embeddings de consultas do PsiCollab.
+Combina um cache LRU em memória (por processo) com um cache Redis
+compartilhado entre os workers, evitando gerar novamente o embedding
+de consultas repetidas.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+import hashlib
+import logging
+import time
+import unicodedata
+
+import numpy as np
+import redis.asyncio as aioredis
+
+from app.core.cache import LRUCache, create_redis_client
+from app.core.config import settings
+from app.core.metrics import track_external
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+# Tempo (segundos) sem consultar o Redis após uma falha de conexão
+REDIS_RETRY_INTERVAL = 30.0
+
+def normalize_query(text: str) -> str:
+    """
+    Normaliza o texto de uma consulta para uso como chave de cache.
+    Aplica normalização Unicode (NFC), ignora maiúsculas/minúsculas e
+    colapsa espaços em branco.
+
+    Args:
+        text: Texto da consulta
+
+    Returns:
+        Texto normalizado
+    """
+    return " ".join(unicodedata.normalize("NFC", text).casefold().split())
+
+class EmbeddingCache:
+    """
+    Cache de embeddings em dois níveis: LRU local com TTL na frente de um Redis compartilhado.
+    As chaves combinam o nome do modelo com o texto normalizado da consulta.
+    """
+
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        redis_client: Optional[aioredis.Redis] = None,
+        maxsize: Optional[int] = None,
+        ttl: Optional[float] = None,
+        redis_ttl: Optional[int] = None
+    ):
+        """
+        Inicializa o cache.
+
+        Args:
+            model: Nome do modelo de embeddings (faz parte da chave)
+            redis_client: Cliente Redis para o nível compartilhado (None desativa o nível)
+            maxsize: Número máximo de embeddings no cache local
+            ttl: Tempo de vida no cache local (segundos)
+            redis_ttl: Tempo de vida no Redis (segundos)
+        """
+        self.model = model or settings.EMBEDDING_MODEL
+        self.local = LRUCache(
+            maxsize=maxsize or settings.EMBEDDING_CACHE_SIZE,
+            ttl=ttl or settings.EMBEDDING_CACHE_TTL
+        )
+        self.redis = redis_client
+        self.redis_ttl = redis_ttl or settings.EMBEDDING_CACHE_REDIS_TTL
+        self._redis_retry_at = 0.0
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.redis_errors = 0
+
+    @classmethod
+    def from_settings(cls, model: Optional[str] = None) -> "EmbeddingCache":
+        """Cria o cache conforme as configurações, com o nível Redis se habilitado."""
+        redis_client = create_redis_client() if settings.EMBEDDING_CACHE_REDIS else None
+        return cls(model=model, redis_client=redis_client)
+
+    def _key(self, text: str) -> str:
+        """Chave de cache para um texto de consulta."""
+        digest = hashlib.sha1(normalize_query(text).encode("utf-8")).hexdigest()
+        return f"emb:{self.model}:{digest}"
+
+    def _redis_available(self) -> bool:
+        return self.redis is not None and time.monotonic() >= self._redis_retry_at
+
+    def _redis_failed(self, error: Exception) -> None:
+        self.redis_errors += 1
+        self._redis_retry_at = time.monotonic() + REDIS_RETRY_INTERVAL
+        logger.warning(f"Cache Redis de embeddings indisponível: {str(error)}")
+
+    async def get_many(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """
+        Busca os embeddings de vários textos, primeiro localmente e depois no Redis.
+
+        Args:
+            texts: Textos das consultas
+
+        Returns:
+            Lista alinhada com os textos, com None para cada miss
+        """
+        keys = [self._key(text) for text in texts]
+        found: List[Optional[List[float]]] = [self.local.get(key) for key in keys]
+        self.local_hits += sum(1 for value in found if value is not None)
+
+        pending = [i for i, value in enumerate(found) if value is None]
+        if pending and self._redis_available():
+            try:
+                with track_external("redis", "mget"):
+                    raw_values = await self.redis.mget([keys[i] for i in pending])
+                for i, raw in zip(pending, raw_values):
+                    if raw is not None:
+                        vector = np.frombuffer(raw, dtype=np.float32).tolist()
+                        found[i] = vector
+                        self.local.set(keys[i], vector)
+                        self.redis_hits += 1
+            except aioredis.RedisError as e:
+                self._redis_failed(e)
+
+        self.misses += sum(1 for value in found if value is None)
+        return found
+
+    async def set_many(self, texts: Sequence[str], vectors: Sequence[List[float]]) -> None:
+        """
+        Armazena embeddings nos dois níveis do cache.
+
+        Args:
+            texts: Textos das consultas
+            vectors: Embeddings correspondentes
+        """
+        keys = [self._key(text) for text in texts]
+        for key, vector in zip(keys, vectors):
+            self.local.set(key, list(vector))
+
+        if keys and self._redis_available():
+            try:
+                with track_external("redis", "pipeline"):
+                    async with self.redis.pipeline(transaction=False) as pipe:
+                        for key, vector in zip(keys, vectors):
+                            pipe.set(key, np.asarray(vector, dtype=np.float32).tobytes(), ex=self.redis_ttl)
+                        await pipe.execute()
+            except aioredis.RedisError as e:
+                self._redis_failed(e)
+
+    async def close(self) -> None:
+        """Fecha a conexão com o Redis, se houver."""
+        if self.redis is not None:
+            await self.redis.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna os contadores de hits e misses de cada nível."""
+        total = self.local_hits + self.redis_hits + self.misses
+        return {
+            "model": self.model,
+            "local_size": len(self.local),
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "redis_errors": self.redis_errors,
+            "hit_rate": (self.local_hits + self.redis_hits) / total if total else 0.0
+        }
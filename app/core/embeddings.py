@@ -1,22 +1,442 @@
 """
-Geração de embeddings.
+Geração de embeddings do PsiCollab.
+Define a interface assíncrona comum dos provedores de embeddings e os
+provedores disponíveis em settings.EMBEDDING_PROVIDER:
+
+- "openai": API de embeddings da OpenAI, com lotes de tamanho adaptativo,
+  limite de requisições e de tokens por minuto (token bucket), requisições
+  simultâneas limitadas e novas tentativas com espera exponencial e jitter;
+- "hashing": projeção local e determinística de palavras e n-gramas de
+  caracteres em VECTOR_SIZE dimensões, sem rede, para testar a busca e a
+  ingestão em carga na velocidade máxima.
 """
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import logging
+import random
+import re
+import time
+import unicodedata
+import zlib
+
+import httpx
+import numpy as np
+
+from app.core.chunking import estimate_tokens
+from app.core.config import settings
+from app.core.metrics import track_external
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+# Respostas da API que justificam uma nova tentativa
+_RETRY_STATUS = frozenset((408, 409, 429, 500, 502, 503, 504))
+
+# Palavras do texto já sem acentos (provedor local)
+_WORD_PATTERN = re.compile(r"[0-9a-z]+")
+
+# Mensagens de erro da API para lotes acima do limite de tokens
+_TOO_LARGE_PATTERN = re.compile(r"maximum context length|too many tokens|max.*tokens per request", re.IGNORECASE)
+
+class EmbeddingProvider:
+    """
+    Interface dos provedores de embeddings.
+    As subclasses implementam embed, que gera os vetores de vários textos de
+    uma vez, na mesma ordem.
+    """
+
+    name = "base"
+
+    def __init__(self, model: str, dimension: int):
+        """
+        Inicializa o provedor.
+
+        Args:
+            model: Nome do modelo (separa as entradas dos caches de embeddings
+                e do manifesto de ingestão por modelo)
+            dimension: Dimensão dos vetores gerados
+        """
+        self.model = model
+        self.dimension = dimension
+
+    async def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        """
+        Gera os embeddings de vários textos.
+
+        Args:
+            texts: Textos originais
+
+        Returns:
+            Um vetor por texto, na mesma ordem
+        """
+        raise NotImplementedError
+
+    async def embed_query(self, text: str) -> List[float]:
+        """
+        Gera o embedding de um único texto.
+
+        Args:
+            text: Texto original
+
+        Returns:
+            Vetor do texto
+        """
+        return (await self.embed([text]))[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna as métricas do provedor."""
+        return {"provider": self.name, "model": self.model, "dimension": self.dimension}
+
+    async def close(self) -> None:
+        """Libera os recursos do provedor."""
+
+class TokenBucket:
+    """
+    Limite de taxa por token bucket: a capacidade se recompõe continuamente
+    à taxa configurada, e quem pede mais do que há disponível espera, na
+    ordem de chegada.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Inicializa o bucket cheio.
+
+        Args:
+            rate: Unidades recompostas por segundo
+            capacity: Máximo acumulado (padrão: um minuto de taxa)
+        """
+        self.rate = rate
+        self.capacity = capacity or rate * 60
+        self._available = self.capacity
+        self._updated = time.monotonic()
+        # Criado no primeiro uso, dentro do event loop (ver _get_lock)
+        self._lock: Optional[asyncio.Lock] = None
+        self.waited = 0.0
+
+    def _get_lock(self) -> asyncio.Lock:
+        """Lock do bucket, criado no event loop em execução (no Python 3.9, o Lock se liga ao loop da criação)."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        """
+        Consome unidades do bucket, esperando se necessário.
+
+        Args:
+            amount: Unidades a consumir (limitadas à capacidade)
+        """
+        amount = min(amount, self.capacity)
+        async with self._get_lock():
+            while True:
+                now = time.monotonic()
+                self._available = min(self.capacity, self._available + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._available >= amount:
+                    self._available -= amount
+                    return
+                wait = (amount - self._available) / self.rate
+                self.waited += wait
+                await asyncio.sleep(wait)
 
-class EmbeddingGenerator:
-    """Gerador de embeddings."""
-    
-    def __init__(self):
-        """Inicializa o gerador de embeddings."""
-        pass
-    
-    def generate_embedding(self, text: str) -> list[float]:
+class _BatchTooLarge(Exception):
+    """O lote excede o limite de tokens por requisição do modelo."""
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """
+    Provedor da API de embeddings da OpenAI.
+
+    Os textos são divididos em lotes por número de textos e de tokens
+    estimados. O tamanho do lote cai pela metade quando a API recusa um lote
+    grande demais ou demora além do prazo, e volta a crescer aos poucos a
+    cada requisição bem-sucedida.
+    """
+
+    name = "openai"
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model: Optional[str] = None,
+        dimension: Optional[int] = None,
+        base_url: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        max_batch_tokens: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        retry_base_delay: Optional[float] = None,
+        timeout: Optional[float] = None,
+        client: Optional[httpx.AsyncClient] = None
+    ):
+        """
+        Inicializa o provedor.
+
+        Args:
+            api_key: Chave da API (padrão: settings.OPENAI_API_KEY)
+            model: Modelo de embeddings (padrão: settings.EMBEDDING_MODEL)
+            dimension: Dimensão dos vetores (padrão: settings.VECTOR_SIZE; enviada
+                à API apenas para os modelos text-embedding-3)
+            base_url: URL da API (padrão: settings.EMBEDDING_API_URL)
+            batch_size: Máximo de textos por requisição (padrão: settings.EMBEDDING_BATCH_SIZE)
+            max_batch_tokens: Tokens estimados por requisição (padrão: settings.EMBEDDING_BATCH_MAX_TOKENS)
+            concurrency: Requisições simultâneas (padrão: settings.EMBEDDING_CONCURRENCY)
+            requests_per_minute: Limite de requisições por minuto da conta
+            tokens_per_minute: Limite de tokens por minuto da conta
+            max_retries: Novas tentativas de uma requisição que falhou
+            retry_base_delay: Espera base entre tentativas, em segundos
+            timeout: Prazo de cada requisição, em segundos
+            client: Cliente HTTP (criado a partir das configurações se omitido)
+        """
+        super().__init__(model or settings.EMBEDDING_MODEL, dimension or settings.VECTOR_SIZE)
+        self.max_batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+        self.batch_size = self.max_batch_size
+        self.max_batch_tokens = max_batch_tokens or settings.EMBEDDING_BATCH_MAX_TOKENS
+        self.max_retries = settings.EMBEDDING_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_base_delay = settings.EMBEDDING_RETRY_BASE_DELAY if retry_base_delay is None else retry_base_delay
+        self.concurrency = concurrency or settings.EMBEDDING_CONCURRENCY
+        # Criado no primeiro uso, dentro do event loop (ver _get_semaphore)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._requests = TokenBucket((requests_per_minute or settings.EMBEDDING_REQUESTS_PER_MINUTE) / 60)
+        self._tokens = TokenBucket((tokens_per_minute or settings.EMBEDDING_TOKENS_PER_MINUTE) / 60)
+        self._owns_client = client is None
+        self.client = client or httpx.AsyncClient(
+            base_url=base_url or settings.EMBEDDING_API_URL,
+            headers={"Authorization": f"Bearer {api_key or settings.OPENAI_API_KEY}"},
+            timeout=timeout or settings.EMBEDDING_TIMEOUT
+        )
+        self.requests = 0
+        self.retries = 0
+        self.split_batches = 0
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Limite de requisições simultâneas, criado no event loop em execução."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    def _batches(self, texts: Sequence[str]) -> List[List[int]]:
+        """Divide os índices dos textos em lotes pelo tamanho atual e pelo limite de tokens."""
+        batches: List[List[int]] = []
+        batch: List[int] = []
+        tokens = 0
+        for index, text in enumerate(texts):
+            text_tokens = estimate_tokens(text)
+            if batch and (len(batch) >= self.batch_size or tokens + text_tokens > self.max_batch_tokens):
+                batches.append(batch)
+                batch, tokens = [], 0
+            batch.append(index)
+            tokens += text_tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _shrink(self) -> None:
+        """Reduz o tamanho dos lotes pela metade."""
+        self.batch_size = max(1, self.batch_size // 2)
+
+    def _grow(self) -> None:
+        """Aumenta o tamanho dos lotes aos poucos, até o máximo configurado."""
+        if self.batch_size < self.max_batch_size:
+            self.batch_size = min(self.max_batch_size, self.batch_size + max(1, self.max_batch_size // 16))
+
+    async def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+
+        async def run(indices: List[int]) -> None:
+            for index, vector in zip(indices, await self._embed_batch([texts[i] for i in indices])):
+                vectors[index] = vector
+
+        await asyncio.gather(*(run(indices) for indices in self._batches(texts)))
+        return vectors
+
+    async def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Gera os embeddings de um lote, dividindo-o se a API o recusar por tamanho."""
+        try:
+            return await self._request(texts)
+        except _BatchTooLarge:
+            if len(texts) == 1:
+                raise ValueError("Texto excede o limite de tokens do modelo de embeddings")
+            self._shrink()
+            self.split_batches += 1
+            middle = len(texts) // 2
+            first, second = await asyncio.gather(self._embed_batch(texts[:middle]), self._embed_batch(texts[middle:]))
+            return first + second
+
+    async def _request(self, texts: List[str]) -> List[List[float]]:
+        """Envia uma requisição de embeddings, com novas tentativas para falhas temporárias."""
+        body: Dict[str, Any] = {"model": self.model, "input": [text or " " for text in texts]}
+        if self.model.startswith("text-embedding-3"):
+            body["dimensions"] = self.dimension
+        tokens = sum(estimate_tokens(text) for text in texts)
+
+        for attempt in range(self.max_retries + 1):
+            await self._requests.acquire()
+            await self._tokens.acquire(tokens)
+            retry_after = None
+            async with self._get_semaphore():
+                self.requests += 1
+                try:
+                    with track_external("openai", "embeddings"):
+                        response = await self.client.post("/embeddings", json=body)
+                except httpx.TimeoutException as e:
+                    error: Exception = e
+                    self._shrink()
+                except httpx.TransportError as e:
+                    error = e
+                else:
+                    if response.status_code == 200:
+                        self._grow()
+                        data = sorted(response.json()["data"], key=lambda item: item["index"])
+                        return [item["embedding"] for item in data]
+                    if response.status_code in (400, 413) and (
+                        response.status_code == 413 or _TOO_LARGE_PATTERN.search(response.text)
+                    ):
+                        raise _BatchTooLarge()
+                    if response.status_code not in _RETRY_STATUS:
+                        response.raise_for_status()
+                    error = httpx.HTTPStatusError(
+                        f"HTTP {response.status_code}: {response.text[:200]}",
+                        request=response.request, response=response
+                    )
+                    retry_after = response.headers.get("retry-after")
+
+            if attempt == self.max_retries:
+                raise error
+            self.retries += 1
+            try:
+                delay = float(retry_after)
+            except (TypeError, ValueError):
+                # Espera exponencial com jitter completo
+                delay = random.uniform(0, min(60.0, self.retry_base_delay * 2 ** attempt))
+            logger.warning(f"Erro na API de embeddings ({str(error)}); nova tentativa em {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **super().stats(),
+            "batch_size": self.batch_size,
+            "requests": self.requests,
+            "retries": self.retries,
+            "split_batches": self.split_batches,
+            "rate_limited_s": round(self._requests.waited + self._tokens.waited, 3)
+        }
+
+    async def close(self) -> None:
+        if self._owns_client:
+            await self.client.aclose()
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """
+    Provedor local e determinístico: cada palavra e cada n-grama de
+    caracteres das palavras é projetado por hashing (CRC32) numa dimensão,
+    com sinal, e o vetor é normalizado. Textos com vocabulário parecido
+    ficam próximos; os vetores são os mesmos em qualquer processo.
+    """
+
+    name = "hashing"
+
+    # Peso das palavras inteiras em relação aos n-gramas de caracteres
+    WORD_WEIGHT = 2.0
+
+    # Palavras com as dimensões já calculadas (o vocabulário se repete muito)
+    CACHE_SIZE = 100000
+
+    def __init__(self, dimension: Optional[int] = None, ngram: int = 3):
         """
-        Gera um embedding para um texto.
-        
+        Inicializa o provedor.
+
         Args:
-            text: Texto para gerar o embedding
-        
+            dimension: Dimensão dos vetores (padrão: settings.VECTOR_SIZE)
+            ngram: Tamanho dos n-gramas de caracteres
+        """
+        dimension = dimension or settings.VECTOR_SIZE
+        super().__init__(f"hashing-{ngram}gram-{dimension}", dimension)
+        self.ngram = ngram
+        self._cache: Dict[str, Tuple[List[int], List[float]]] = {}
+
+    def _word_features(self, word: str) -> Tuple[List[int], List[float]]:
+        """Dimensões e pesos (com sinal) da palavra e dos seus n-gramas, com cache."""
+        cached = self._cache.get(word)
+        if cached is None:
+            padded = f"<{word}>".encode("ascii")
+            features = [b"w:" + padded] + [
+                padded[i:i + self.ngram] for i in range(max(1, len(padded) - self.ngram + 1))
+            ]
+            hashes = [zlib.crc32(feature) for feature in features]
+            weights = [self.WORD_WEIGHT] + [1.0] * (len(features) - 1)
+            cached = (
+                [value % self.dimension for value in hashes],
+                [-weight if value & 0x80000000 else weight for value, weight in zip(hashes, weights)]
+            )
+            if len(self._cache) >= self.CACHE_SIZE:
+                self._cache.clear()
+            self._cache[word] = cached
+        return cached
+
+    def embed_sync(self, texts: Sequence[str]) -> List[List[float]]:
+        """
+        Gera os embeddings de vários textos no thread atual.
+
+        Args:
+            texts: Textos originais
+
         Returns:
-            Lista de números representando o embedding
+            Um vetor normalizado por texto (nulo para textos sem palavras)
         """
-        return [] 
\ No newline at end of file
+        vectors = []
+        for text in texts:
+            folded = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii").lower()
+            dimensions: List[int] = []
+            weights: List[float] = []
+            for word in _WORD_PATTERN.findall(folded):
+                word_dimensions, word_weights = self._word_features(word)
+                dimensions += word_dimensions
+                weights += word_weights
+            vector = np.bincount(dimensions, weights=weights, minlength=self.dimension) if dimensions \
+                else np.zeros(self.dimension)
+            norm = np.linalg.norm(vector)
+            vectors.append((vector / norm if norm else vector).tolist())
+        return vectors
+
+    async def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        if len(texts) <= 8:
+            return self.embed_sync(texts)
+        return await asyncio.to_thread(self.embed_sync, texts)
+
+# Provedores disponíveis em settings.EMBEDDING_PROVIDER
+_PROVIDERS: Dict[str, Callable[[], EmbeddingProvider]] = {
+    OpenAIEmbeddingProvider.name: OpenAIEmbeddingProvider,
+    HashingEmbeddingProvider.name: HashingEmbeddingProvider
+}
+
+def register_embedding_provider(name: str, factory: Callable[[], EmbeddingProvider]) -> None:
+    """
+    Registra um provedor de embeddings, selecionável por settings.EMBEDDING_PROVIDER.
+
+    Args:
+        name: Nome do provedor
+        factory: Função que cria o provedor
+    """
+    _PROVIDERS[name] = factory
+
+def create_embedding_provider(name: Optional[str] = None) -> EmbeddingProvider:
+    """
+    Cria o provedor de embeddings configurado.
+
+    Args:
+        name: Nome do provedor (padrão: settings.EMBEDDING_PROVIDER)
+
+    Returns:
+        Provedor de embeddings
+
+    Raises:
+        ValueError: Se o provedor não estiver registrado
+    """
+    name = name or settings.EMBEDDING_PROVIDER
+    if name not in _PROVIDERS:
+        raise ValueError(f"Provedor de embeddings desconhecido: {name} (disponíveis: {', '.join(_PROVIDERS)})")
+    return _PROVIDERS[name]()
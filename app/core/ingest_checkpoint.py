@@ -0,0 +1,219 @@
+"""
+Ponto de controle da ingestão em lote da base de conhecimento.
+Guarda, por arquivo de origem, quantos documentos já foram gravados (todos
+os lotes anteriores concluídos) e os lotes que falharam, com o motivo, o
+número de novas tentativas e os trechos necessários para refazê-los. Uma
+ingestão retomada continua de onde a anterior parou.
+"""
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import hashlib
+import json
+import logging
+import sqlite3
+
+from app.core.config import settings
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS progress (
+    collection TEXT NOT NULL,
+    source TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    completed INTEGER NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (collection, source)
+);
+CREATE TABLE IF NOT EXISTS failures (
+    collection TEXT NOT NULL,
+    batch_id TEXT NOT NULL,
+    source TEXT,
+    chunks TEXT NOT NULL,
+    error TEXT NOT NULL,
+    retries INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (collection, batch_id)
+);
+"""
+
+def batch_id(chunks: Sequence[Dict[str, Any]]) -> str:
+    """
+    Id de um lote, derivado dos pontos que ele grava.
+
+    Args:
+        chunks: Trechos do lote (ver chunk_document)
+
+    Returns:
+        Id estável entre execuções
+    """
+    digest = hashlib.sha1("\n".join(chunk["point_id"] for chunk in chunks).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+class IngestCheckpoint:
+    """
+    Ponto de controle persistido em SQLite.
+    Cada operação abre a própria conexão, então pode ser chamada de
+    qualquer thread (ver asyncio.to_thread no pipeline de ingestão).
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        """
+        Inicializa o ponto de controle.
+
+        Args:
+            path: Arquivo SQLite (padrão: settings.INGEST_CHECKPOINT_PATH)
+        """
+        self.path = Path(path or settings.INGEST_CHECKPOINT_PATH)
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """Abre uma conexão com o banco, criando as tabelas na primeira vez."""
+        if not self._initialized:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30.0)
+        if not self._initialized:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            self._initialized = True
+        return connection
+
+    def reset(self, collection: str, sources: Sequence[str]) -> None:
+        """
+        Descarta o progresso e as falhas de arquivos que serão ingeridos do início.
+
+        Args:
+            collection: Nome da coleção
+            sources: Arquivos de origem
+        """
+        connection = self._connect()
+        try:
+            with connection:
+                for table in ("progress", "failures"):
+                    connection.executemany(
+                        f"DELETE FROM {table} WHERE collection = ? AND source = ?",
+                        [(collection, source) for source in sources]
+                    )
+        finally:
+            connection.close()
+
+    def progress(self, collection: str, sources: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Lê o progresso gravado de arquivos de origem.
+
+        Args:
+            collection: Nome da coleção
+            sources: Arquivos de origem
+
+        Returns:
+            Para cada arquivo com progresso, "offset" (documentos já gravados)
+            e "completed" (arquivo inteiro gravado)
+        """
+        connection = self._connect()
+        try:
+            found = {}
+            for source in sources:
+                row = connection.execute(
+                    "SELECT position, completed FROM progress WHERE collection = ? AND source = ?",
+                    (collection, source)
+                ).fetchone()
+                if row is not None:
+                    found[source] = {"offset": row[0], "completed": bool(row[1])}
+            return found
+        finally:
+            connection.close()
+
+    def save_progress(self, collection: str, marks: Dict[str, Tuple[int, bool]]) -> None:
+        """
+        Avança o progresso de arquivos de origem (nunca retrocede).
+
+        Args:
+            collection: Nome da coleção
+            marks: Para cada arquivo, (documentos já gravados, arquivo concluído)
+        """
+        now = datetime.now().isoformat()
+        connection = self._connect()
+        try:
+            with connection:
+                connection.executemany(
+                    "INSERT INTO progress (collection, source, position, completed, updated_at) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (collection, source) DO UPDATE SET position = MAX(position, excluded.position), "
+                    "completed = MAX(completed, excluded.completed), updated_at = excluded.updated_at",
+                    [(collection, source, offset, int(completed), now) for source, (offset, completed) in marks.items()]
+                )
+        finally:
+            connection.close()
+
+    def record_failure(self, collection: str, chunks: List[Dict[str, Any]], error: str,
+                       source: Optional[str] = None) -> str:
+        """
+        Registra a falha de um lote; se ele já tinha falhado, conta mais uma tentativa.
+
+        Args:
+            collection: Nome da coleção
+            chunks: Trechos do lote
+            error: Motivo da falha
+            source: Arquivo de origem do lote
+
+        Returns:
+            Id do lote
+        """
+        identifier = batch_id(chunks)
+        now = datetime.now().isoformat()
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(
+                    "INSERT INTO failures (collection, batch_id, source, chunks, error, retries, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, 0, ?, ?) ON CONFLICT (collection, batch_id) DO UPDATE SET "
+                    "error = excluded.error, retries = retries + 1, updated_at = excluded.updated_at",
+                    (collection, identifier, source, json.dumps(chunks, ensure_ascii=False), error, now, now)
+                )
+        finally:
+            connection.close()
+        return identifier
+
+    def resolve_failure(self, collection: str, identifier: str) -> None:
+        """Remove um lote refeito com sucesso da lista de falhas."""
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(
+                    "DELETE FROM failures WHERE collection = ? AND batch_id = ?", (collection, identifier)
+                )
+        finally:
+            connection.close()
+
+    def failures(self, collection: str, max_retries: Optional[int] = None,
+                 include_chunks: bool = True) -> List[Dict[str, Any]]:
+        """
+        Lista os lotes que falharam.
+
+        Args:
+            collection: Nome da coleção
+            max_retries: Omite os lotes que já tiveram este número de novas tentativas
+            include_chunks: Inclui os trechos de cada lote
+
+        Returns:
+            Lotes com batch_id, source, error, retries e, opcionalmente, chunks
+        """
+        query = "SELECT batch_id, source, error, retries, chunks FROM failures WHERE collection = ?"
+        params: List[Any] = [collection]
+        if max_retries is not None:
+            query += " AND retries < ?"
+            params.append(max_retries)
+        connection = self._connect()
+        try:
+            rows = connection.execute(query + " ORDER BY created_at", params).fetchall()
+        finally:
+            connection.close()
+        failures = []
+        for identifier, source, error, retries, chunks in rows:
+            failure = {"batch_id": identifier, "source": source, "error": error, "retries": retries}
+            if include_chunks:
+                failure["chunks"] = json.loads(chunks)
+            failures.append(failure)
+        return failures
@@ -0,0 +1,172 @@
+"""
+Manifesto da ingestão da base de conhecimento do PsiCollab.
+Registra, para cada trecho gravado (documento de origem + posição), o hash
+do conteúdo, o modelo de embeddings e o id do ponto no Qdrant. Com ele, a
+reingestão gera embeddings apenas dos trechos novos ou alterados e remove
+os trechos que deixaram de existir.
+"""
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import hashlib
+import json
+import logging
+import sqlite3
+
+from app.core.config import settings
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    collection TEXT NOT NULL,
+    source_id TEXT NOT NULL,
+    chunk_index INTEGER NOT NULL,
+    chunk_id TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    embedding_model TEXT NOT NULL,
+    point_id TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (collection, source_id, chunk_index)
+);
+"""
+
+# Máximo de parâmetros por consulta IN (limite do SQLite)
+_MAX_PARAMS = 900
+
+def content_hash(payload: Dict[str, Any]) -> str:
+    """
+    Hash do payload de um trecho (texto, tipo e metadados).
+
+    Args:
+        payload: Payload gravado no Qdrant
+
+    Returns:
+        Hash SHA-256 em hexadecimal
+    """
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class IngestManifest:
+    """
+    Manifesto persistido em SQLite (ao lado de psicollab.db).
+    Cada operação abre a própria conexão, então pode ser chamada de
+    qualquer thread (ver asyncio.to_thread no pipeline de ingestão).
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        """
+        Inicializa o manifesto.
+
+        Args:
+            path: Arquivo SQLite (padrão: settings.INGEST_MANIFEST_PATH)
+        """
+        self.path = Path(path or settings.INGEST_MANIFEST_PATH)
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """Abre uma conexão com o banco, criando a tabela na primeira vez."""
+        if not self._initialized:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30.0)
+        if not self._initialized:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            self._initialized = True
+        return connection
+
+    def lookup(self, collection: str, source_ids: Sequence[str]) -> Dict[str, Dict[int, Dict[str, str]]]:
+        """
+        Lê os trechos registrados de vários documentos.
+
+        Args:
+            collection: Nome da coleção
+            source_ids: Ids dos documentos de origem
+
+        Returns:
+            Para cada documento registrado, os trechos por posição (chunk_id,
+            content_hash, embedding_model e point_id)
+        """
+        found: Dict[str, Dict[int, Dict[str, str]]] = {}
+        connection = self._connect()
+        try:
+            for start in range(0, len(source_ids), _MAX_PARAMS):
+                batch = list(source_ids[start:start + _MAX_PARAMS])
+                rows = connection.execute(
+                    "SELECT source_id, chunk_index, chunk_id, content_hash, embedding_model, point_id FROM chunks "
+                    f"WHERE collection = ? AND source_id IN ({', '.join('?' for _ in batch)})",
+                    [collection, *batch]
+                ).fetchall()
+                for source_id, chunk_index, chunk_id, digest, model, point_id in rows:
+                    found.setdefault(source_id, {})[chunk_index] = {
+                        "chunk_id": chunk_id, "content_hash": digest,
+                        "embedding_model": model, "point_id": point_id
+                    }
+        finally:
+            connection.close()
+        return found
+
+    def record(self, collection: str, chunks: Iterable[Tuple[str, int, str, str, str, str]]) -> None:
+        """
+        Registra trechos gravados no Qdrant.
+
+        Args:
+            collection: Nome da coleção
+            chunks: Tuplas (source_id, chunk_index, chunk_id, content_hash, embedding_model, point_id)
+        """
+        now = datetime.now().isoformat()
+        connection = self._connect()
+        try:
+            with connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO chunks (collection, source_id, chunk_index, chunk_id, content_hash, "
+                    "embedding_model, point_id, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(collection, *chunk, now) for chunk in chunks]
+                )
+        finally:
+            connection.close()
+
+    def remove(self, collection: str, chunks: Iterable[Tuple[str, int]]) -> None:
+        """
+        Remove trechos do manifesto.
+
+        Args:
+            collection: Nome da coleção
+            chunks: Pares (source_id, chunk_index)
+        """
+        connection = self._connect()
+        try:
+            with connection:
+                connection.executemany(
+                    "DELETE FROM chunks WHERE collection = ? AND source_id = ? AND chunk_index = ?",
+                    [(collection, source_id, chunk_index) for source_id, chunk_index in chunks]
+                )
+        finally:
+            connection.close()
+
+    def source_ids(self, collection: str) -> Set[str]:
+        """Ids de todos os documentos registrados na coleção."""
+        connection = self._connect()
+        try:
+            rows = connection.execute("SELECT DISTINCT source_id FROM chunks WHERE collection = ?", (collection,))
+            return {row[0] for row in rows}
+        finally:
+            connection.close()
+
+    def chunks_of(self, collection: str, source_ids: Sequence[str]) -> List[Dict[str, Any]]:
+        """
+        Lista os trechos registrados de vários documentos.
+
+        Args:
+            collection: Nome da coleção
+            source_ids: Ids dos documentos de origem
+
+        Returns:
+            Trechos com source_id, chunk_index, chunk_id e point_id
+        """
+        return [
+            {"source_id": source_id, "chunk_index": chunk_index, **entry}
+            for source_id, entries in self.lookup(collection, list(source_ids)).items()
+            for chunk_index, entry in entries.items()
+        ]
@@ -0,0 +1,641 @@
+"""
+Ingestão em lote da base de conhecimento do PsiCollab.
+Lê documentos de arquivos JSON/JSONL em streaming, divide cada um em
+trechos, gera os embeddings em lotes do tamanho aceito pelo provedor e
+grava os pontos no Qdrant com várias requisições em paralelo. Filas
+limitadas entre as etapas aplicam contrapressão: a leitura para quando os
+embeddings ou a gravação ficam para trás, e a memória não cresce com o
+tamanho do corpus. Com o manifesto de ingestão, trechos inalterados são
+pulados e trechos removidos do documento são apagados da coleção; com o
+ponto de controle, uma ingestão interrompida pode ser retomada.
+"""
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import asyncio
+import hashlib
+import itertools
+import json
+import logging
+import time
+import uuid
+
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http import models
+
+from app.core.chunking import split_text
+from app.core.config import settings
+from app.core.embeddings import EmbeddingProvider, create_embedding_provider
+from app.core.ingest_checkpoint import IngestCheckpoint, batch_id
+from app.core.ingest_manifest import IngestManifest, content_hash
+from app.core.lexical_index import LexicalIndex
+from app.core.projection import DimensionReducer
+from app.core.search_cache import CollectionGeneration
+from app.core.vector_db import create_async_client
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+# Campos do documento de origem que não vão para "metadata"
+_DOCUMENT_FIELDS = ("id", "conteudo", "content", "text", "tipo", "metadata")
+
+# Namespace dos ids dos pontos, derivados do id do trecho
+_POINT_NAMESPACE = uuid.UUID("7f1d9a52-3c1e-4f4e-9a51-5d3c2b8e6a10")
+
+# Documentos lidos do arquivo por vez, fora do event loop
+_READ_BATCH = 64
+
+# Ids de documentos listados por categoria no relatório de simulação
+_DIFF_SAMPLE = 100
+
+def _iter_json_array(file, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """Lê os elementos de um array JSON aos poucos, sem carregar o arquivo inteiro."""
+    decoder = json.JSONDecoder()
+    buffer = file.read(chunk_size).lstrip()
+    if not buffer:
+        return
+    if buffer[0] != "[":
+        # Um único documento (objeto) no arquivo
+        yield json.loads(buffer + file.read())
+        return
+    position = 1
+    eof = False
+    while True:
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+        if position < len(buffer) and buffer[position] == "]":
+            return
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise ValueError("Array JSON incompleto ou inválido")
+            data = file.read(chunk_size)
+            eof = not data
+            buffer = buffer[position:] + data
+            position = 0
+            continue
+        yield item
+
+def iter_documents(path: Path) -> Iterator[Dict[str, Any]]:
+    """
+    Lê os documentos de um arquivo em streaming.
+
+    Arquivos .jsonl/.ndjson têm um documento por linha; arquivos .json têm
+    um array de documentos (ou um único documento).
+
+    Args:
+        path: Arquivo de documentos
+
+    Returns:
+        Iterador dos documentos (objetos JSON)
+    """
+    path = Path(path)
+    with open(path, "r", encoding="utf-8") as file:
+        if path.suffix.lower() in (".jsonl", ".ndjson"):
+            for line_number, line in enumerate(file, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    logger.error(f"Linha {line_number} inválida em {path}: {str(e)}")
+        else:
+            yield from _iter_json_array(file)
+
+def chunk_point_id(source_id: str, chunk_index: int) -> str:
+    """
+    Id do ponto de um trecho, estável entre execuções.
+
+    Reingerir o mesmo documento sobrescreve os mesmos pontos em vez de
+    duplicá-los.
+
+    Args:
+        source_id: Id do documento de origem
+        chunk_index: Posição do trecho no documento
+
+    Returns:
+        UUID do ponto
+    """
+    return str(uuid.uuid5(_POINT_NAMESPACE, f"{source_id}#{chunk_index}"))
+
+def normalize_document(raw: Any, source: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Converte um documento de origem para o formato da base de conhecimento.
+
+    Args:
+        raw: Documento lido do arquivo ("conteudo", "content" ou "text"; "id",
+            "tipo" e "metadata" opcionais; demais campos vão para "metadata")
+        source: Nome do arquivo de origem
+
+    Returns:
+        Documento com "id", "tipo", "conteudo" e "metadata", ou None se não tiver texto
+    """
+    if not isinstance(raw, dict):
+        return None
+    content = raw.get("conteudo") or raw.get("content") or raw.get("text")
+    if not isinstance(content, str) or not content.strip():
+        return None
+    metadata = dict(raw.get("metadata") or {})
+    metadata.update({key: value for key, value in raw.items() if key not in _DOCUMENT_FIELDS})
+    if source is not None:
+        metadata.setdefault("source", source)
+    doc_id = raw.get("id")
+    if doc_id is None:
+        doc_id = hashlib.sha1(content.encode("utf-8")).hexdigest()
+    return {"id": str(doc_id), "tipo": raw.get("tipo"), "conteudo": content, "metadata": metadata}
+
+def chunk_document(document: Dict[str, Any], target_tokens: Optional[int] = None,
+                   overlap_tokens: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Divide um documento normalizado em trechos prontos para gravação.
+
+    Args:
+        document: Documento (ver normalize_document)
+        target_tokens: Tokens por trecho
+        overlap_tokens: Sobreposição entre trechos
+
+    Returns:
+        Trechos com "point_id", "tokens" e o "payload" gravado no Qdrant; as
+        posições do trecho no documento ficam em "char_start"/"char_end" dos
+        metadados, para destacar o trecho encontrado
+    """
+    pieces = split_text(document["conteudo"], target_tokens, overlap_tokens)
+    chunks = []
+    for index, piece in enumerate(pieces):
+        chunk_id = document["id"] if len(pieces) == 1 else f"{document['id']}#{index}"
+        chunks.append({
+            "point_id": chunk_point_id(document["id"], index),
+            "tokens": piece["tokens"],
+            "payload": {
+                "id": chunk_id,
+                "tipo": document["tipo"],
+                "conteudo": piece["text"],
+                "metadata": {
+                    **document["metadata"],
+                    "source_id": document["id"],
+                    "chunk_index": index,
+                    "chunk_count": len(pieces),
+                    "char_start": piece["start"],
+                    "char_end": piece["end"]
+                }
+            }
+        })
+    return chunks
+
+class IngestionPipeline:
+    """
+    Pipeline de ingestão em três etapas concorrentes:
+    leitura e divisão em trechos -> embeddings em lotes -> gravação no Qdrant.
+    """
+
+    def __init__(
+        self,
+        client: Optional[AsyncQdrantClient] = None,
+        embedding_generator: Optional[EmbeddingProvider] = None,
+        collection_name: Optional[str] = None,
+        lexical_index: Optional[LexicalIndex] = None,
+        generation: Optional[CollectionGeneration] = None,
+        reducer: Optional[DimensionReducer] = None,
+        batch_size: Optional[int] = None,
+        max_batch_tokens: Optional[int] = None,
+        embed_concurrency: Optional[int] = None,
+        upsert_concurrency: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        manifest: Optional[IngestManifest] = None,
+        checkpoint: Optional[IngestCheckpoint] = None,
+        dry_run: bool = False,
+        prune: bool = False
+    ):
+        """
+        Inicializa o pipeline.
+
+        Args:
+            client: Cliente assíncrono do Qdrant (criado a partir das configurações se omitido)
+            embedding_generator: Provedor de embeddings (criado a partir de settings.EMBEDDING_PROVIDER se omitido)
+            collection_name: Coleção de destino (padrão: settings.COLLECTION_NAME)
+            lexical_index: Índice BM25 atualizado com os trechos gravados
+            generation: Contador de geração incrementado ao fim da ingestão
+            reducer: Projeção dos vetores compactos (coleções em dois estágios)
+            batch_size: Trechos por requisição de embeddings (padrão: settings.EMBEDDING_BATCH_SIZE)
+            max_batch_tokens: Tokens estimados por requisição (padrão: settings.EMBEDDING_BATCH_MAX_TOKENS)
+            embed_concurrency: Requisições de embeddings simultâneas
+            upsert_concurrency: Gravações simultâneas no Qdrant
+            queue_size: Lotes aguardando entre uma etapa e a seguinte
+            manifest: Manifesto dos trechos já gravados; sem ele, todos os trechos
+                são reprocessados
+            checkpoint: Ponto de controle com o progresso por arquivo e os lotes
+                que falharam, usado para retomar a ingestão
+            dry_run: Apenas compara os documentos com o manifesto e informa a
+                diferença, sem gerar embeddings nem alterar a coleção
+            prune: Apaga também os documentos do manifesto ausentes desta
+                ingestão (use só quando ela cobre o corpus inteiro)
+        """
+        self.client = client or create_async_client()
+        self.embedding_generator = embedding_generator or create_embedding_provider()
+        self.collection_name = collection_name or settings.COLLECTION_NAME
+        self.lexical_index = lexical_index
+        self.generation = generation
+        self.reducer = reducer
+        self.batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+        self.max_batch_tokens = max_batch_tokens or settings.EMBEDDING_BATCH_MAX_TOKENS
+        self.embed_concurrency = embed_concurrency or settings.INGEST_EMBED_CONCURRENCY
+        self.upsert_concurrency = upsert_concurrency or settings.INGEST_UPSERT_CONCURRENCY
+        self.queue_size = queue_size or settings.INGEST_QUEUE_SIZE
+        self.manifest = manifest
+        self.checkpoint = checkpoint
+        self.dry_run = dry_run
+        self.prune = prune
+        self.embedding_model = getattr(self.embedding_generator, "model", None) or settings.EMBEDDING_MODEL
+
+    async def ingest_files(self, paths: Sequence[Path], resume: bool = False) -> Dict[str, Any]:
+        """
+        Ingere os documentos de arquivos JSON/JSONL (ver iter_documents).
+
+        Com o ponto de controle, o progresso de cada arquivo é gravado à
+        medida que os lotes terminam. Uma ingestão retomada refaz os lotes que
+        falharam e continua cada arquivo do primeiro documento não gravado; os
+        ids dos pontos são estáveis, então regravar um trecho não o duplica.
+        Sem resume, o progresso anterior desses arquivos é descartado.
+
+        Args:
+            paths: Arquivos de documentos
+            resume: Retoma a partir do ponto de controle
+
+        Returns:
+            Estatísticas da ingestão (ver run)
+
+        Raises:
+            ValueError: Se resume for combinado com prune, que exige ler o corpus inteiro
+        """
+        if resume and self.prune:
+            raise ValueError("prune não pode ser combinado com resume")
+        sources = [str(Path(path).resolve()) for path in paths]
+        progress: Dict[str, Dict[str, Any]] = {}
+        if self.checkpoint is not None and not self.dry_run:
+            if resume:
+                progress = await asyncio.to_thread(self.checkpoint.progress, self.collection_name, sources)
+            else:
+                await asyncio.to_thread(self.checkpoint.reset, self.collection_name, sources)
+
+        def entries() -> Iterator[Tuple[str, Optional[int], Optional[Dict[str, Any]]]]:
+            for path, source in zip(paths, sources):
+                state = progress.get(source, {"offset": 0, "completed": False})
+                if state["completed"]:
+                    continue
+                raws = itertools.islice(iter_documents(path), state["offset"], None)
+                for position, raw in enumerate(raws, start=state["offset"]):
+                    yield source, position, normalize_document(raw, Path(path).name)
+                yield source, None, None
+
+        stats = await self._run(entries(), resume)
+        if resume:
+            stats["resumed_from"] = {Path(source).name: state for source, state in progress.items()}
+        return stats
+
+    async def _embed(self, chunks: List[Dict[str, Any]]) -> List[Any]:
+        """Gera os embeddings de um lote de trechos."""
+        vectors = await self.embedding_generator.embed([chunk["payload"]["conteudo"] for chunk in chunks])
+        if len(vectors) != len(chunks):
+            raise ValueError(f"{len(vectors)} embeddings recebidos para {len(chunks)} trechos")
+        if self.reducer is not None:
+            return self.reducer.named_vectors(vectors)
+        return [list(vector) for vector in vectors]
+
+    async def _upsert(self, chunks: List[Dict[str, Any]], vectors: List[Any]) -> None:
+        """Grava um lote de trechos no Qdrant e no índice lexical."""
+        await self.client.upsert(
+            collection_name=self.collection_name,
+            points=[
+                models.PointStruct(id=chunk["point_id"], vector=vector, payload=chunk["payload"])
+                for chunk, vector in zip(chunks, vectors)
+            ],
+            wait=True
+        )
+        if self.lexical_index is not None:
+            self.lexical_index.add_many(
+                (chunk["payload"]["id"], chunk["payload"], chunk["point_id"]) for chunk in chunks
+            )
+            for chunk in chunks:
+                if chunk.get("stale_id"):
+                    self.lexical_index.remove(chunk["stale_id"])
+
+    async def _record(self, chunks: List[Dict[str, Any]]) -> None:
+        """Registra no manifesto os trechos gravados."""
+        await asyncio.to_thread(self.manifest.record, self.collection_name, [
+            (
+                chunk["payload"]["metadata"]["source_id"], chunk["payload"]["metadata"]["chunk_index"],
+                chunk["payload"]["id"], chunk.get("content_hash") or content_hash(chunk["payload"]),
+                self.embedding_model, chunk["point_id"]
+            )
+            for chunk in chunks
+        ])
+
+    async def _delete(self, removed: List[Dict[str, Any]]) -> None:
+        """Apaga da coleção, do índice lexical e do manifesto os trechos que deixaram de existir."""
+        await self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=models.PointIdsList(points=[entry["point_id"] for entry in removed]),
+            wait=True
+        )
+        if self.lexical_index is not None:
+            for entry in removed:
+                self.lexical_index.remove(entry["chunk_id"])
+        await asyncio.to_thread(
+            self.manifest.remove, self.collection_name,
+            [(entry["source_id"], entry["chunk_index"]) for entry in removed]
+        )
+
+    def _diff(self, document: Dict[str, Any], chunks: List[Dict[str, Any]], known: Dict[int, Dict[str, str]],
+              stats: Dict[str, Any], removed: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Compara os trechos de um documento com os registrados no manifesto.
+
+        Args:
+            document: Documento normalizado
+            chunks: Trechos do documento (ver chunk_document)
+            known: Trechos registrados do documento, por posição
+            stats: Estatísticas da ingestão, atualizadas com a diferença
+            removed: Lista que recebe os trechos registrados que deixaram de existir
+
+        Returns:
+            Trechos novos ou alterados, que precisam de embeddings
+        """
+        pending = []
+        for index, chunk in enumerate(chunks):
+            chunk["content_hash"] = content_hash(chunk["payload"])
+            entry = known.get(index)
+            if entry is None:
+                stats["new_chunks"] += 1
+            elif entry["content_hash"] == chunk["content_hash"] and entry["embedding_model"] == self.embedding_model:
+                stats["unchanged_chunks"] += 1
+                continue
+            else:
+                stats["changed_chunks"] += 1
+                if entry["chunk_id"] != chunk["payload"]["id"]:
+                    chunk["stale_id"] = entry["chunk_id"]
+            pending.append(chunk)
+        gone = [
+            {"source_id": document["id"], "chunk_index": index, **entry}
+            for index, entry in known.items() if index >= len(chunks)
+        ]
+        stats["removed_chunks"] += len(gone)
+        removed.extend(gone)
+
+        if self.dry_run:
+            if not known:
+                category = "new"
+            elif pending or gone:
+                category = "changed"
+            else:
+                category = None
+            if category and len(stats["diff"][category]) < _DIFF_SAMPLE:
+                stats["diff"][category].append(document["id"])
+        return pending
+
+    async def run(self, documents: Iterable[Optional[Dict[str, Any]]], resume: bool = False) -> Dict[str, Any]:
+        """
+        Ingere documentos normalizados.
+
+        O iterador é consumido aos poucos, fora do event loop, então pode ler
+        arquivos maiores que a memória. Lotes que falham são registrados (no
+        ponto de controle, se houver) e descartados sem interromper a ingestão.
+
+        Args:
+            documents: Documentos (ver normalize_document); None conta como ignorado
+            resume: Refaz antes os lotes que falharam em ingestões anteriores
+
+        Returns:
+            Contagens de documentos, trechos e lotes, falhas e vazão (docs/s e
+            trechos/s); com o manifesto, também trechos novos, alterados,
+            inalterados e removidos (em dry_run, "diff" lista ids de exemplo)
+        """
+        return await self._run(((None, 0, document) for document in documents), resume)
+
+    async def _run(self, entries: Iterable[Tuple[Optional[str], Optional[int], Optional[Dict[str, Any]]]],
+                   resume: bool) -> Dict[str, Any]:
+        """
+        Executa a ingestão (ver run).
+
+        Args:
+            entries: Tuplas (arquivo de origem, posição no arquivo, documento);
+                posição None marca o fim do arquivo
+            resume: Refaz antes os lotes que falharam em ingestões anteriores
+
+        Returns:
+            Estatísticas da ingestão
+        """
+        started = time.perf_counter()
+        stats: Dict[str, Any] = {
+            "documents": 0, "skipped_documents": 0, "chunks": 0, "batches": 0,
+            "failed_batches": 0, "failed_chunks": 0, "retried_batches": 0, "new_chunks": 0,
+            "changed_chunks": 0, "unchanged_chunks": 0, "removed_chunks": 0, "removed_sources": 0,
+            "dry_run": self.dry_run
+        }
+        if self.dry_run:
+            stats["diff"] = {"new": [], "changed": [], "removed": []}
+        checkpoint = None if self.dry_run else self.checkpoint
+        seen_sources = set()
+        embed_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        upsert_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        # Lotes na ordem em que foram formados; o progresso de cada arquivo só
+        # avança quando todos os lotes anteriores terminaram
+        pending: Deque[Dict[str, Any]] = deque()
+        last_report = [started]
+
+        def report_progress() -> None:
+            now = time.perf_counter()
+            if now - last_report[0] >= 10:
+                last_report[0] = now
+                elapsed = now - started
+                logger.info(
+                    f"Ingestão: {stats['documents']} documentos ({stats['documents'] / elapsed:.1f}/s), "
+                    f"{stats['chunks']} trechos gravados ({stats['chunks'] / elapsed:.1f}/s)"
+                )
+
+        def new_item(chunks: List[Dict[str, Any]], marks: Dict[str, Tuple[int, bool]],
+                     source: Optional[str] = None, retry: bool = False) -> Dict[str, Any]:
+            item = {"chunks": chunks, "marks": marks, "source": source, "retry": retry, "done": False}
+            pending.append(item)
+            return item
+
+        async def finish(item: Dict[str, Any]) -> None:
+            item["done"] = True
+            marks: Dict[str, Tuple[int, bool]] = {}
+            while pending and pending[0]["done"]:
+                marks.update(pending.popleft()["marks"])
+            if marks and checkpoint is not None:
+                try:
+                    await asyncio.to_thread(checkpoint.save_progress, self.collection_name, marks)
+                except Exception as e:
+                    logger.error(f"Erro ao gravar o progresso da ingestão: {str(e)}")
+
+        async def fail(item: Dict[str, Any], error: Exception) -> None:
+            stats["failed_batches"] += 1
+            stats["failed_chunks"] += len(item["chunks"])
+            if checkpoint is not None:
+                try:
+                    await asyncio.to_thread(
+                        checkpoint.record_failure, self.collection_name, item["chunks"], str(error), item["source"]
+                    )
+                except Exception as e:
+                    logger.error(f"Erro ao registrar o lote com falha: {str(e)}")
+            await finish(item)
+
+        async def produce() -> None:
+            if resume and checkpoint is not None:
+                failures = await asyncio.to_thread(
+                    checkpoint.failures, self.collection_name, settings.INGEST_MAX_RETRIES
+                )
+                for failure in failures:
+                    stats["retried_batches"] += 1
+                    await embed_queue.put(new_item(failure["chunks"], {}, failure["source"], retry=True))
+
+            iterator = iter(entries)
+            batch: List[Dict[str, Any]] = []
+            batch_source: Optional[str] = None
+            tokens = 0
+            marks: Dict[str, Tuple[int, bool]] = {}
+            offsets: Dict[str, int] = {}
+            while True:
+                read = await asyncio.to_thread(lambda: list(itertools.islice(iterator, _READ_BATCH)))
+                if not read:
+                    break
+                known = {}
+                if self.manifest is not None:
+                    known = await asyncio.to_thread(
+                        self.manifest.lookup, self.collection_name,
+                        [document["id"] for _, _, document in read if document is not None]
+                    )
+                removed: List[Dict[str, Any]] = []
+                for source, position, document in read:
+                    if position is None:
+                        marks[source] = (offsets.get(source, 0), True)
+                        continue
+                    if document is None:
+                        stats["skipped_documents"] += 1
+                    else:
+                        stats["documents"] += 1
+                        chunks = chunk_document(document)
+                        if self.manifest is not None:
+                            if self.prune:
+                                seen_sources.add(document["id"])
+                            chunks = self._diff(document, chunks, known.get(document["id"], {}), stats, removed)
+                        for chunk in [] if self.dry_run else chunks:
+                            chunk_tokens = chunk["tokens"]
+                            if batch and (len(batch) >= self.batch_size or tokens + chunk_tokens > self.max_batch_tokens):
+                                await embed_queue.put(new_item(batch, marks, batch_source))
+                                batch, tokens, marks = [], 0, {}
+                            if not batch:
+                                batch_source = source
+                            batch.append(chunk)
+                            tokens += chunk_tokens
+                    if source is not None:
+                        offsets[source] = position + 1
+                        marks[source] = (position + 1, False)
+                await delete(removed)
+            if batch:
+                await embed_queue.put(new_item(batch, marks, batch_source))
+            elif marks:
+                # Documentos finais sem trechos a gravar: o progresso avança
+                # quando os lotes anteriores terminarem
+                await finish(new_item([], marks))
+
+        def track(point_ids: List[Any]) -> None:
+            nonlocal changed
+            if changed is not None:
+                changed.extend(point_ids)
+                if len(changed) > settings.LEXICAL_INDEX_DELTA_MAX:
+                    changed = None
+
+        async def delete(removed: List[Dict[str, Any]]) -> None:
+            if not removed or self.dry_run:
+                return
+            try:
+                writes[0] += 1
+                track([entry["point_id"] for entry in removed])
+                await self._delete(removed)
+                deleted[0] += len(removed)
+            except Exception as e:
+                logger.error(f"Erro ao apagar {len(removed)} trechos removidos de '{self.collection_name}': {str(e)}")
+
+        async def embed_worker() -> None:
+            while (item := await embed_queue.get()) is not None:
+                try:
+                    vectors = await self._embed(item["chunks"])
+                except Exception as e:
+                    logger.error(f"Erro ao gerar embeddings de {len(item['chunks'])} trechos: {str(e)}")
+                    await fail(item, e)
+                    continue
+                await upsert_queue.put((item, vectors))
+
+        async def upsert_worker() -> None:
+            while (queued := await upsert_queue.get()) is not None:
+                item, vectors = queued
+                batch = item["chunks"]
+                try:
+                    writes[0] += 1
+                    track([chunk["point_id"] for chunk in batch])
+                    await self._upsert(batch, vectors)
+                except Exception as e:
+                    logger.error(f"Erro ao gravar {len(batch)} trechos em '{self.collection_name}': {str(e)}")
+                    await fail(item, e)
+                    continue
+                stats["batches"] += 1
+                stats["chunks"] += len(batch)
+                if self.manifest is not None:
+                    try:
+                        await self._record(batch)
+                    except Exception as e:
+                        logger.error(f"Erro ao registrar {len(batch)} trechos no manifesto: {str(e)}")
+                if item["retry"] and checkpoint is not None:
+                    try:
+                        await asyncio.to_thread(checkpoint.resolve_failure, self.collection_name, batch_id(batch))
+                    except Exception as e:
+                        logger.error(f"Erro ao remover o lote refeito da lista de falhas: {str(e)}")
+                await finish(item)
+                report_progress()
+
+        # Escritas enviadas ao Qdrant (contadas antes da chamada: uma escrita
+        # que falhou pode ter sido aplicada em parte)
+        writes = [0]
+        # Pontos gravados ou apagados, publicados com a geração (None acima de
+        # LEXICAL_INDEX_DELTA_MAX, para não guardar ingestões inteiras)
+        changed: Optional[List[Any]] = []
+        deleted = [0]
+        embedders = [asyncio.create_task(embed_worker()) for _ in range(self.embed_concurrency)]
+        upserters = [asyncio.create_task(upsert_worker()) for _ in range(self.upsert_concurrency)]
+        try:
+            try:
+                await produce()
+                for _ in embedders:
+                    await embed_queue.put(None)
+                await asyncio.gather(*embedders)
+                for _ in upserters:
+                    await upsert_queue.put(None)
+                await asyncio.gather(*upserters)
+            finally:
+                for task in embedders + upserters:
+                    task.cancel()
+
+            if self.prune and self.manifest is not None:
+                missing = await asyncio.to_thread(self.manifest.source_ids, self.collection_name)
+                missing -= seen_sources
+                removed = await asyncio.to_thread(self.manifest.chunks_of, self.collection_name, sorted(missing))
+                stats["removed_sources"] = len(missing)
+                stats["removed_chunks"] += len(removed)
+                if self.dry_run:
+                    stats["diff"]["removed"] = sorted(missing)[:_DIFF_SAMPLE]
+                await delete(removed)
+        finally:
+            # Mesmo se a ingestão for interrompida, o que já foi gravado ou
+            # apagado invalida o cache de respostas
+            if writes[0] and self.generation is not None:
+                await self.generation.bump(changed)
+
+        elapsed = time.perf_counter() - started
+        stats["elapsed_s"] = round(elapsed, 3)
+        stats["docs_per_s"] = round(stats["documents"] / elapsed, 1) if elapsed else None
+        stats["chunks_per_s"] = round(stats["chunks"] / elapsed, 1) if elapsed else None
+        logger.info(f"Ingestão concluída em '{self.collection_name}': {stats}")
+        return stats
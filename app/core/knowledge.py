@@ -1,31 +1,155 @@
 """
 Gerenciamento de conhecimento.
 """
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+from qdrant_client import AsyncQdrantClient
+
+from app.core.config import settings
+from app.core.embeddings import EmbeddingProvider
+from app.core.ingest_checkpoint import IngestCheckpoint
+from app.core.ingest_manifest import IngestManifest
+from app.core.ingestion import IngestionPipeline, normalize_document
+from app.core.lexical_index import LexicalIndex, get_lexical_index
+from app.core.projection import load_reducer
+from app.core.search_cache import CollectionGeneration, get_collection_generation
 
 class KnowledgeManager:
     """Gerenciador de conhecimento."""
-    
-    def __init__(self):
-        """Inicializa o gerenciador de conhecimento."""
-        pass
-    
-    def add_document(self, document: str) -> None:
+
+    def __init__(
+        self,
+        generation: Optional[CollectionGeneration] = None,
+        lexical_index: Optional[LexicalIndex] = None,
+        client: Optional[AsyncQdrantClient] = None,
+        embedding_generator: Optional[EmbeddingProvider] = None,
+        collection_name: Optional[str] = None,
+        manifest: Optional[IngestManifest] = None,
+        checkpoint: Optional[IngestCheckpoint] = None
+    ):
+        """
+        Inicializa o gerenciador de conhecimento.
+
+        Args:
+            generation: Contador de geração da coleção, incrementado a cada escrita
+                para invalidar o cache de respostas de busca
+            lexical_index: Índice BM25 da busca híbrida, atualizado a cada escrita
+                (o índice compartilhado do processo, se HYBRID_SEARCH estiver habilitado)
+            client: Cliente assíncrono do Qdrant (criado na primeira ingestão se omitido)
+            embedding_generator: Provedor de embeddings (criado na primeira ingestão se omitido)
+            collection_name: Coleção da base de conhecimento (padrão: settings.COLLECTION_NAME)
+            manifest: Manifesto dos trechos já gravados (o padrão, se
+                INGEST_MANIFEST_ENABLED estiver habilitado), usado para
+                reingerir apenas o que mudou
+            checkpoint: Ponto de controle da ingestão de arquivos (o padrão, se
+                INGEST_CHECKPOINT_ENABLED estiver habilitado)
+        """
+        self.collection_name = collection_name or settings.COLLECTION_NAME
+        self.generation = generation or get_collection_generation(self.collection_name)
+        if lexical_index is None and settings.HYBRID_SEARCH:
+            lexical_index = get_lexical_index(self.collection_name)
+        self.lexical_index = lexical_index
+        self.client = client
+        self.embedding_generator = embedding_generator
+        if manifest is None and settings.INGEST_MANIFEST_ENABLED:
+            manifest = IngestManifest()
+        self.manifest = manifest
+        if checkpoint is None and settings.INGEST_CHECKPOINT_ENABLED:
+            checkpoint = IngestCheckpoint()
+        self.checkpoint = checkpoint
+
+    def pipeline(self, **options: Any) -> IngestionPipeline:
+        """
+        Cria um pipeline de ingestão para a coleção da base de conhecimento.
+
+        Args:
+            options: Parâmetros do pipeline (batch_size, embed_concurrency, dry_run, prune...)
+
+        Returns:
+            Pipeline que grava na coleção, no índice lexical e incrementa a geração
+            
+        Raises:
+            RuntimeError: Se TWO_STAGE_SEARCH estiver habilitado e a projeção
+                compacta não puder ser carregada (os pontos precisam dos dois vetores)
+        """
+        reducer = None
+        if settings.TWO_STAGE_SEARCH:
+            reducer = load_reducer()
+            if reducer is None:
+                raise RuntimeError(
+                    f"Projeção compacta indisponível em {settings.COMPACT_PROJECTION_PATH}; "
+                    "execute 'manage_collection.py fit-projection' antes de ingerir em uma coleção em dois estágios"
+                )
+        pipeline = IngestionPipeline(
+            client=self.client,
+            embedding_generator=self.embedding_generator,
+            collection_name=self.collection_name,
+            lexical_index=self.lexical_index,
+            generation=self.generation,
+            reducer=reducer,
+            manifest=self.manifest,
+            checkpoint=self.checkpoint,
+            **options
+        )
+        self.client = pipeline.client
+        self.embedding_generator = pipeline.embedding_generator
+        return pipeline
+
+    async def ingest_files(self, paths: Sequence[Path], resume: bool = False, **options: Any) -> Dict[str, Any]:
+        """
+        Ingere os documentos de arquivos JSON/JSONL em lote (ver IngestionPipeline).
+
+        Args:
+            paths: Arquivos de documentos
+            resume: Retoma a partir do ponto de controle da última ingestão
+            options: Parâmetros do pipeline
+
+        Returns:
+            Estatísticas da ingestão
+        """
+        return await self.pipeline(**options).ingest_files(paths, resume=resume)
+
+    async def ingest_documents(self, documents: Iterable[Dict[str, Any]], **options: Any) -> Dict[str, Any]:
+        """
+        Ingere documentos em memória em lote.
+
+        Args:
+            documents: Documentos com "conteudo" e, opcionalmente, "id", "tipo" e "metadata"
+            options: Parâmetros do pipeline
+
+        Returns:
+            Estatísticas da ingestão
+        """
+        return await self.pipeline(**options).run(normalize_document(document) for document in documents)
+
+    async def add_document(
+        self,
+        document: str,
+        doc_id: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """
         Adiciona um documento à base de conhecimento.
-        
+
         Args:
             document: Texto do documento
+            doc_id: Identificador do documento (derivado do conteúdo se omitido)
+            metadata: Demais campos do payload, como "tipo"
+
+        Returns:
+            Estatísticas da ingestão
         """
-        pass
-    
+        return await self.ingest_documents([{**(metadata or {}), "id": doc_id, "conteudo": document}])
+
     def search_documents(self, query: str) -> list[str]:
         """
         Busca documentos na base de conhecimento.
-        
+
         Args:
             query: Texto da busca
-        
+
         Returns:
             Lista de documentos encontrados
         """
-        return [] 
\ No newline at end of file
+        return []
@@ -0,0 +1,74 @@
+"""
+Registro de latência por etapa da busca do PsiCollab.
+Mantém uma janela das medições mais recentes de cada etapa (embedding,
+busca, reranking...) e calcula os percentis exibidos em /search/stats;
+opcionalmente, repassa cada medição a um histograma exportado em /metrics.
+"""
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+import threading
+
+import numpy as np
+
+class LatencyTracker:
+    """
+    Janela deslizante de latências por etapa.
+    Seguro para uso concorrente entre threads.
+    """
+
+    def __init__(self, window: int = 1024, histogram: Optional[Any] = None):
+        """
+        Inicializa o registro.
+
+        Args:
+            window: Número de medições mantidas por etapa
+            histogram: Histograma (app.core.metrics) com rótulo "stage" que
+                também recebe as medições, em segundos
+        """
+        self.window = window
+        self.histogram = histogram
+        self._samples: Dict[str, Deque[float]] = {}
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, elapsed_ms: float) -> None:
+        """
+        Registra a duração de uma etapa.
+
+        Args:
+            stage: Nome da etapa
+            elapsed_ms: Duração em milissegundos
+        """
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.window)
+            samples.append(elapsed_ms)
+            self._counts[stage] = self._counts.get(stage, 0) + 1
+        if self.histogram is not None:
+            self.histogram.labels(stage).observe(elapsed_ms / 1000)
+
+    def summary(self, stage: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Resume as latências registradas.
+
+        Args:
+            stage: Etapa a resumir (todas se omitido)
+
+        Returns:
+            Número total de medições e p50/p95/p99 (ms) da janela de cada etapa
+        """
+        with self._lock:
+            stages = {name: list(samples) for name, samples in self._samples.items()
+                      if stage is None or name == stage}
+            counts = dict(self._counts)
+        summary = {}
+        for name, samples in stages.items():
+            values = np.array(samples)
+            summary[name] = {
+                "count": counts[name],
+                "p50_ms": round(float(np.percentile(values, 50)), 3),
+                "p95_ms": round(float(np.percentile(values, 95)), 3),
+                "p99_ms": round(float(np.percentile(values, 99)), 3)
+            }
+        return summary
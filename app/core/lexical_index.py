@@ -0,0 +1,398 @@
+"""
+Índice lexical (BM25) em memória do PsiCollab.
+Complementa a busca vetorial com correspondência exata de termos, que a
+busca semântica costuma perder: nomes e siglas de testes (WISC, HTP, BFP),
+números de CRP e termos técnicos em português.
+"""
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import logging
+import math
+import re
+import threading
+import unicodedata
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient
+
+from app.core.config import settings
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+# Palavras sem valor de busca, já sem acentos (ver fold_text)
+STOPWORDS = frozenset("""
+a ao aos as ate com como da das de dela dele deles do dos e ela elas ele eles em
+entre era essa esse esta este eu foi ha isso isto ja la mais mas me mesmo meu
+minha muito na nao nas nem no nos o os ou para pela pelas pelo pelos por qual
+quando que quem se sem ser seu seus sua suas tambem te tem um uma umas uns voce
+""".split())
+
+_TOKEN_PATTERN = re.compile(r"[0-9a-z]+")
+
+def fold_text(text: str) -> str:
+    """
+    Remove acentos e diferenças de caixa ("Avaliação" -> "avaliacao").
+
+    Args:
+        text: Texto original
+
+    Returns:
+        Texto sem acentos, em minúsculas
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+def tokenize(text: str) -> List[str]:
+    """
+    Divide um texto em termos de busca.
+
+    Não aplica radicalização, para preservar siglas e termos exatos; hífens
+    e barras separam termos ("WISC-IV" -> "wisc", "iv"; "06/12345" -> "06", "12345").
+
+    Args:
+        text: Texto original
+
+    Returns:
+        Termos do texto, sem stopwords
+    """
+    return [token for token in _TOKEN_PATTERN.findall(fold_text(text)) if token not in STOPWORDS]
+
+class _Postings:
+    """Lista de ocorrências de um termo, em arrays compactos."""
+
+    __slots__ = ("rows", "freqs")
+
+    def __init__(self):
+        self.rows = array("I")  # Linha do documento
+        self.freqs = array("H")  # Frequência do termo no documento
+
+class LexicalIndex:
+    """
+    Índice invertido BM25 sobre o campo "conteudo" dos documentos.
+    Atualizado incrementalmente: documentos novos são acrescentados ao fim
+    das listas de ocorrências e documentos removidos ou substituídos são
+    marcados e descartados na próxima compactação.
+
+    Guarda apenas as listas de ocorrências e, por documento, o id, o id do
+    ponto no Qdrant, o tamanho e o tipo: o texto e o payload não ficam em
+    memória, e os payloads dos resultados são lidos da coleção.
+    """
+
+    def __init__(self, k1: Optional[float] = None, b: Optional[float] = None):
+        """
+        Inicializa um índice vazio.
+
+        Args:
+            k1: Saturação da frequência dos termos (padrão: settings.BM25_K1)
+            b: Normalização pelo tamanho do documento (padrão: settings.BM25_B)
+        """
+        self.k1 = k1 if k1 is not None else settings.BM25_K1
+        self.b = b if b is not None else settings.BM25_B
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self) -> None:
+        """Limpa todas as estruturas do índice."""
+        self._terms: Dict[str, _Postings] = {}
+        self._ids: List[str] = []
+        self._point_ids: List[Any] = []
+        self._rows: Dict[str, int] = {}
+        self._lengths = array("I")
+        self._tipos = array("I")
+        self._tipo_codes: Dict[Optional[str], int] = {None: 0}
+        self._deleted = bytearray()
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def add(self, doc_id: str, payload: Dict[str, Any], point_id: Any = None) -> None:
+        """
+        Indexa um documento, substituindo a versão anterior se já existir.
+
+        Args:
+            doc_id: Identificador do documento
+            payload: Payload do documento (usa "conteudo" e "tipo")
+            point_id: Id do ponto no Qdrant (padrão: doc_id)
+        """
+        self.add_many([(doc_id, payload, point_id)])
+
+    def add_many(self, documents: Iterable[Tuple[str, Dict[str, Any], Any]]) -> int:
+        """
+        Indexa vários documentos (ver add).
+
+        Args:
+            documents: Triplas (id, payload, id do ponto no Qdrant ou None)
+
+        Returns:
+            Número de documentos indexados
+        """
+        count = 0
+        with self._lock:
+            for doc_id, payload, point_id in documents:
+                doc_id = str(doc_id)
+                self._remove_row(doc_id)
+                tokens = tokenize(payload.get("conteudo") or "")
+                row = len(self._ids)
+                self._ids.append(doc_id)
+                self._point_ids.append(doc_id if point_id is None else point_id)
+                self._rows[doc_id] = row
+                self._lengths.append(len(tokens))
+                self._tipos.append(self._tipo_codes.setdefault(payload.get("tipo"), len(self._tipo_codes)))
+                self._deleted.append(0)
+                self._total_length += len(tokens)
+
+                frequencies: Dict[str, int] = {}
+                for token in tokens:
+                    frequencies[token] = frequencies.get(token, 0) + 1
+                for token, frequency in frequencies.items():
+                    postings = self._terms.get(token)
+                    if postings is None:
+                        postings = self._terms[token] = _Postings()
+                    postings.rows.append(row)
+                    postings.freqs.append(min(frequency, 65535))
+                count += 1
+            self._maybe_compact()
+        return count
+
+    def remove(self, doc_id: str) -> bool:
+        """
+        Remove um documento do índice.
+
+        Args:
+            doc_id: Identificador do documento
+
+        Returns:
+            True se o documento estava indexado
+        """
+        with self._lock:
+            removed = self._remove_row(str(doc_id))
+            self._maybe_compact()
+            return removed
+
+    def replace_points(self, point_ids: Iterable[Any], documents: Iterable[Tuple[str, Dict[str, Any], Any]]) -> int:
+        """
+        Substitui os documentos de um conjunto de pontos do Qdrant.
+
+        Os documentos indexados com esses pontos são removidos (inclusive os
+        de ids que mudaram) e os documentos informados são indexados; pontos
+        sem documento correspondente ficam removidos.
+
+        Args:
+            point_ids: Ids dos pontos alterados
+            documents: Triplas (id, payload, id do ponto) dos pontos que ainda existem
+
+        Returns:
+            Número de documentos indexados
+        """
+        targets = {str(point_id) for point_id in point_ids}
+        with self._lock:
+            for row, point_id in enumerate(self._point_ids):
+                if not self._deleted[row] and str(point_id) in targets:
+                    self._remove_row(self._ids[row])
+            return self.add_many(documents)
+
+    def _remove_row(self, doc_id: str) -> bool:
+        """Marca a linha de um documento como removida (chamado com o lock adquirido)."""
+        row = self._rows.pop(doc_id, None)
+        if row is None:
+            return False
+        self._deleted[row] = 1
+        self._total_length -= self._lengths[row]
+        return True
+
+    def _maybe_compact(self) -> None:
+        """Descarta as linhas removidas quando elas são a maior parte do índice."""
+        dead = len(self._ids) - len(self._rows)
+        if dead < 1000 or dead < len(self._rows):
+            return
+        keep = np.frombuffer(self._deleted, dtype=np.uint8) == 0
+        new_rows = np.cumsum(keep, dtype=np.int64) - 1
+        for term in list(self._terms):
+            postings = self._terms[term]
+            rows = np.frombuffer(postings.rows, dtype=np.uint32)
+            alive = keep[rows]
+            if not alive.any():
+                del self._terms[term]
+                continue
+            compacted = _Postings()
+            compacted.rows = array("I", new_rows[rows[alive]].astype(np.uint32).tobytes())
+            compacted.freqs = array("H", np.frombuffer(postings.freqs, dtype=np.uint16)[alive].tobytes())
+            self._terms[term] = compacted
+            del rows, alive
+        live = np.flatnonzero(keep).tolist()
+        self._ids = [self._ids[row] for row in live]
+        self._point_ids = [self._point_ids[row] for row in live]
+        self._lengths = array("I", (self._lengths[row] for row in live))
+        self._tipos = array("I", (self._tipos[row] for row in live))
+        self._deleted = bytearray(len(live))
+        self._rows = {doc_id: row for row, doc_id in enumerate(self._ids)}
+        logger.info(f"Índice lexical compactado ({dead} linhas removidas descartadas)")
+
+    def search(self, query: str, limit: int = 10, tipo_filtro: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Busca os documentos com maior pontuação BM25.
+
+        Args:
+            query: Consulta em linguagem natural
+            limit: Número máximo de resultados
+            tipo_filtro: Filtro opcional por tipo de documento
+
+        Returns:
+            Documentos encontrados, com "id", "point_id" (id do ponto no
+            Qdrant, para ler o payload) e "lexical_score"
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            documents = len(self._rows)
+            if not terms or not documents:
+                return []
+            if tipo_filtro is not None and tipo_filtro not in self._tipo_codes:
+                return []
+
+            average_length = self._total_length / documents or 1.0
+            lengths = np.frombuffer(self._lengths, dtype=np.uint32).astype(np.float32)
+            norms = self.k1 * (1 - self.b + self.b * lengths / average_length)
+            deleted = np.frombuffer(self._deleted, dtype=np.uint8).astype(bool)
+            scores = np.zeros(len(self._ids), dtype=np.float32)
+            for term in terms:
+                postings = self._terms.get(term)
+                if postings is None:
+                    continue
+                rows = np.frombuffer(postings.rows, dtype=np.uint32)
+                alive = ~deleted[rows]
+                frequency = int(np.count_nonzero(alive))
+                if not frequency:
+                    continue
+                rows = rows[alive]
+                freqs = np.frombuffer(postings.freqs, dtype=np.uint16)[alive].astype(np.float32)
+                idf = math.log(1 + (documents - frequency + 0.5) / (frequency + 0.5))
+                scores[rows] += idf * freqs * (self.k1 + 1) / (freqs + norms[rows])
+                del rows, freqs, alive
+
+            if tipo_filtro is not None:
+                tipos = np.frombuffer(self._tipos, dtype=np.uint32)
+                scores[tipos != self._tipo_codes[tipo_filtro]] = 0
+                del tipos
+            del lengths, deleted
+
+            matched = np.flatnonzero(scores > 0)
+            if len(matched) > limit:
+                matched = matched[np.argpartition(-scores[matched], limit - 1)[:limit]]
+            matched = matched[np.argsort(-scores[matched], kind="stable")]
+            return [
+                {"id": self._ids[row], "point_id": self._point_ids[row], "lexical_score": float(scores[row])}
+                for row in matched
+            ]
+
+    async def load_from_collection(
+        self,
+        client: AsyncQdrantClient,
+        collection_name: Optional[str] = None,
+        batch_size: int = 1000
+    ) -> int:
+        """
+        Reconstrói o índice a partir dos payloads de uma coleção do Qdrant.
+
+        Args:
+            client: Cliente assíncrono do Qdrant
+            collection_name: Nome da coleção (padrão: settings.COLLECTION_NAME)
+            batch_size: Pontos lidos por requisição
+
+        Returns:
+            Número de documentos indexados
+        """
+        collection_name = collection_name or settings.COLLECTION_NAME
+        # O índice novo é montado à parte e substitui o atual de uma vez, para
+        # que as buscas durante a recarga continuem usando o índice completo
+        fresh = LexicalIndex(self.k1, self.b)
+        count = 0
+        offset = None
+        while True:
+            points, offset = await client.scroll(
+                collection_name=collection_name,
+                limit=batch_size,
+                offset=offset,
+                with_payload=["id", "tipo", "conteudo"],
+                with_vectors=False
+            )
+            count += fresh.add_many(
+                ((point.payload or {}).get("id", point.id), point.payload or {}, point.id) for point in points
+            )
+            if offset is None:
+                break
+        with self._lock:
+            for name, value in vars(fresh).items():
+                if name != "_lock":
+                    setattr(self, name, value)
+        logger.info(f"Índice lexical carregado com {count} documentos de '{collection_name}'")
+        return count
+
+    async def update_from_collection(
+        self,
+        client: AsyncQdrantClient,
+        point_ids: Sequence[Any],
+        collection_name: Optional[str] = None,
+        batch_size: int = 1000
+    ) -> int:
+        """
+        Atualiza o índice com os payloads atuais de alguns pontos da coleção.
+
+        Usado quando a geração da coleção publica os pontos alterados (ver
+        CollectionGeneration.changes): só esses pontos são lidos do Qdrant,
+        e os que não existem mais são removidos do índice.
+
+        Args:
+            client: Cliente assíncrono do Qdrant
+            point_ids: Ids dos pontos gravados ou apagados
+            collection_name: Nome da coleção (padrão: settings.COLLECTION_NAME)
+            batch_size: Pontos lidos por requisição
+
+        Returns:
+            Número de documentos indexados
+        """
+        collection_name = collection_name or settings.COLLECTION_NAME
+        count = 0
+        for start in range(0, len(point_ids), batch_size):
+            # Ids numéricos chegam como texto da lista publicada no Redis
+            batch = [int(point_id) if str(point_id).isdigit() else point_id
+                     for point_id in point_ids[start:start + batch_size]]
+            points = await client.retrieve(
+                collection_name=collection_name,
+                ids=batch,
+                with_payload=["id", "tipo", "conteudo"],
+                with_vectors=False
+            )
+            count += self.replace_points(batch, (
+                ((point.payload or {}).get("id", point.id), point.payload or {}, point.id) for point in points
+            ))
+        logger.info(f"Índice lexical atualizado com {len(point_ids)} pontos alterados em '{collection_name}'")
+        return count
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna o tamanho do índice."""
+        with self._lock:
+            return {
+                "documents": len(self._rows),
+                "terms": len(self._terms),
+                "removed_rows": len(self._ids) - len(self._rows)
+            }
+
+# Índices compartilhados pelo motor de busca e pela ingestão de cada processo
+_indexes: Dict[str, LexicalIndex] = {}
+
+def get_lexical_index(collection_name: Optional[str] = None) -> LexicalIndex:
+    """
+    Retorna o índice lexical compartilhado de uma coleção.
+
+    Args:
+        collection_name: Nome da coleção (padrão: settings.COLLECTION_NAME)
+
+    Returns:
+        Índice lexical do processo
+    """
+    collection_name = collection_name or settings.COLLECTION_NAME
+    if collection_name not in _indexes:
+        _indexes[collection_name] = LexicalIndex()
+    return _indexes[collection_name]
@@ -0,0 +1,296 @@
+"""
+Armazenamento vetorial local do PsiCollab.
+Alternativa ao Qdrant para a busca semântica: os embeddings da coleção
+ficam em uma matriz NumPy mapeada em memória (float32 ou float16) e os
+payloads em um arquivo JSONL lateral, lido apenas para os resultados.
+
+Estrutura do diretório de uma coleção:
+    meta.json       Dimensão, tipo numérico, quantidade e tipos de documento
+    vectors.npy     Matriz (N x D) com os vetores normalizados
+    tipos.npy       Código do campo "tipo" de cada linha (-1 se ausente)
+    offsets.npy     Posição de cada payload em payloads.jsonl (N + 1 posições)
+    payloads.jsonl  Um objeto {"id": ..., "payload": {...}} por linha
+"""
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+import json
+import logging
+import mmap
+
+import numpy as np
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+# Linhas da matriz convertidas para float32 por vez durante o cálculo dos scores
+SCORE_CHUNK_ROWS = 65536
+
+class LocalVectorStoreWriter:
+    """
+    Grava um armazenamento vetorial local de forma incremental.
+    Os vetores são escritos diretamente no arquivo mapeado em memória,
+    sem manter a coleção inteira na RAM.
+    """
+
+    def __init__(self, path: Path, count: int, dim: int, dtype: str = "float32"):
+        """
+        Inicializa o gravador.
+
+        Args:
+            path: Diretório do armazenamento (criado se necessário)
+            count: Número total de vetores
+            dim: Dimensão dos vetores
+            dtype: Tipo numérico da matriz ("float32" ou "float16")
+        """
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.count = count
+        self.dim = dim
+        self.dtype = dtype
+        self._vectors = np.lib.format.open_memmap(
+            self.path / "vectors.npy", mode="w+", dtype=np.dtype(dtype), shape=(count, dim)
+        )
+        self._tipo_codes = np.full(count, -1, dtype=np.int32)
+        self._tipos: Dict[str, int] = {}
+        self._offsets = np.zeros(count + 1, dtype=np.int64)
+        self._payloads = open(self.path / "payloads.jsonl", "wb")
+        self._position = 0
+
+    def add(self, ids: Sequence[Any], vectors: Any, payloads: Sequence[Dict[str, Any]]) -> None:
+        """
+        Adiciona um lote de pontos.
+
+        Args:
+            ids: Identificadores dos pontos
+            vectors: Vetores do lote (serão normalizados)
+            payloads: Payloads correspondentes
+        """
+        batch = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(batch, axis=1, keepdims=True)
+        batch = batch / np.where(norms == 0, 1, norms)
+
+        start, end = self._position, self._position + len(batch)
+        if end > self.count:
+            raise ValueError(f"Armazenamento local comporta {self.count} vetores, recebidos {end}")
+        self._vectors[start:end] = batch.astype(self.dtype)
+
+        for row, (point_id, payload) in enumerate(zip(ids, payloads), start=start):
+            tipo = payload.get("tipo")
+            if tipo is not None:
+                self._tipo_codes[row] = self._tipos.setdefault(str(tipo), len(self._tipos))
+            line = json.dumps({"id": point_id, "payload": payload}, ensure_ascii=False, default=str)
+            self._payloads.write(line.encode("utf-8") + b"\n")
+            self._offsets[row + 1] = self._payloads.tell()
+        self._position = end
+
+    def close(self) -> None:
+        """Finaliza a gravação dos arquivos auxiliares."""
+        if self._position != self.count:
+            raise ValueError(f"Esperados {self.count} vetores, gravados {self._position}")
+        self._payloads.close()
+        self._vectors.flush()
+        del self._vectors
+        np.save(self.path / "tipos.npy", self._tipo_codes)
+        np.save(self.path / "offsets.npy", self._offsets)
+        meta = {
+            "dim": self.dim,
+            "dtype": self.dtype,
+            "count": self.count,
+            "tipos": sorted(self._tipos, key=self._tipos.get)
+        }
+        (self.path / "meta.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+        logger.info(f"Armazenamento local gravado em {self.path} ({self.count} vetores, {self.dtype})")
+
+class LocalVectorStore:
+    """
+    Busca vetorial local por similaridade de cosseno.
+    Calcula os scores de forma vetorizada sobre a matriz mapeada em memória
+    e seleciona o top-k com argpartition. O filtro por "tipo" usa os índices
+    de linhas de cada tipo, pré-calculados na abertura.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Abre um armazenamento existente.
+
+        Args:
+            path: Diretório do armazenamento
+        """
+        self.path = Path(path)
+        meta = json.loads((self.path / "meta.json").read_text(encoding="utf-8"))
+        self.dim = meta["dim"]
+        self.dtype = meta["dtype"]
+        self.vectors = np.load(self.path / "vectors.npy", mmap_mode="r")
+        self.offsets = np.load(self.path / "offsets.npy")
+        tipo_codes = np.load(self.path / "tipos.npy")
+        self.type_rows = {tipo: np.flatnonzero(tipo_codes == code) for code, tipo in enumerate(meta["tipos"])}
+        self._payload_file = open(self.path / "payloads.jsonl", "rb")
+        self._payloads = (
+            mmap.mmap(self._payload_file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self.offsets[-1] > 0 else b""
+        )
+        logger.info(f"Armazenamento local aberto: {self.path} ({len(self)} vetores, {self.dtype})")
+
+    @classmethod
+    def open_if_exists(cls, path: Path) -> Optional["LocalVectorStore"]:
+        """
+        Abre o armazenamento se ele existir.
+
+        Args:
+            path: Diretório do armazenamento
+
+        Returns:
+            Armazenamento aberto ou None
+        """
+        if not (Path(path) / "meta.json").exists():
+            return None
+        try:
+            return cls(path)
+        except Exception as e:
+            logger.error(f"Erro ao abrir armazenamento local em {path}: {str(e)}")
+            return None
+
+    @classmethod
+    def build(
+        cls,
+        path: Path,
+        ids: Sequence[Any],
+        vectors: Any,
+        payloads: Sequence[Dict[str, Any]],
+        dtype: str = "float32"
+    ) -> "LocalVectorStore":
+        """
+        Cria um armazenamento a partir de dados em memória.
+
+        Args:
+            path: Diretório do armazenamento
+            ids: Identificadores dos pontos
+            vectors: Matriz (N x D) de vetores
+            payloads: Payloads dos pontos
+            dtype: Tipo numérico da matriz
+
+        Returns:
+            Armazenamento aberto
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        writer = LocalVectorStoreWriter(path, count=len(vectors), dim=vectors.shape[1], dtype=dtype)
+        writer.add(ids, vectors, payloads)
+        writer.close()
+        return cls(path)
+
+    def __len__(self) -> int:
+        return self.vectors.shape[0]
+
+    def close(self) -> None:
+        """Libera os arquivos mapeados em memória."""
+        if isinstance(self._payloads, mmap.mmap):
+            self._payloads.close()
+        self._payload_file.close()
+
+    def payload(self, row: int) -> Dict[str, Any]:
+        """
+        Lê o payload de uma linha no arquivo lateral.
+
+        Args:
+            row: Índice da linha
+
+        Returns:
+            Documento com o payload e o identificador do ponto
+        """
+        line = self._payloads[self.offsets[row]:self.offsets[row + 1]]
+        record = json.loads(line)
+        doc = dict(record["payload"])
+        doc.setdefault("id", str(record["id"]))
+        return doc
+
+    def _scores(self, queries: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Calcula a similaridade de cosseno das consultas com as linhas da matriz.
+
+        Args:
+            queries: Matriz (B x D) de consultas normalizadas
+            rows: Índices das linhas a considerar (None para todas)
+
+        Returns:
+            Matriz (B x R) de scores, com R o número de linhas consideradas
+        """
+        total = len(self) if rows is None else len(rows)
+        scores = np.empty((len(queries), total), dtype=np.float32)
+        for start in range(0, total, SCORE_CHUNK_ROWS):
+            end = min(start + SCORE_CHUNK_ROWS, total)
+            block = self.vectors[start:end] if rows is None else self.vectors[rows[start:end]]
+            scores[:, start:end] = queries @ np.asarray(block, dtype=np.float32).T
+        return scores
+
+    def _top_k(
+        self,
+        scores: np.ndarray,
+        rows: Optional[np.ndarray],
+        limit: int,
+        min_score: float,
+        with_vectors: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Seleciona os melhores resultados de uma consulta com argpartition."""
+        k = min(limit, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        top = top[scores[top] >= min_score]
+
+        docs = []
+        for index in top:
+            row = int(index if rows is None else rows[index])
+            doc = self.payload(row)
+            doc["score"] = float(scores[index])
+            if with_vectors:
+                doc["vector"] = np.asarray(self.vectors[row], dtype=np.float32)
+            docs.append(doc)
+        return docs
+
+    def search(
+        self,
+        embeddings: Iterable[Sequence[float]],
+        limits: Sequence[int],
+        tipo_filtros: Sequence[Optional[str]],
+        min_scores: Sequence[float],
+        with_vectors: bool = False
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Executa um lote de buscas por similaridade.
+
+        As consultas são agrupadas por filtro: consultas sem filtro percorrem
+        a matriz inteira e consultas filtradas calculam scores apenas para as
+        linhas do tipo pedido.
+
+        Args:
+            embeddings: Vetores das consultas
+            limits: Número máximo de resultados de cada consulta
+            tipo_filtros: Filtro opcional por tipo de cada consulta
+            min_scores: Pontuação mínima de cada consulta
+            with_vectors: Inclui o vetor (normalizado) de cada resultado em "vector"
+
+        Returns:
+            Lista de resultados de cada consulta, na mesma ordem
+        """
+        queries = np.asarray(list(embeddings), dtype=np.float32)
+        results: List[List[Dict[str, Any]]] = [[] for _ in range(len(queries))]
+        if len(self) == 0 or len(queries) == 0:
+            return results
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1, norms)
+
+        groups: Dict[Optional[str], List[int]] = {}
+        for i, tipo_filtro in enumerate(tipo_filtros):
+            groups.setdefault(tipo_filtro or None, []).append(i)
+
+        for tipo_filtro, indices in groups.items():
+            rows = None
+            if tipo_filtro is not None:
+                rows = self.type_rows.get(tipo_filtro)
+                if rows is None or len(rows) == 0:
+                    continue
+            scores = self._scores(queries[indices], rows)
+            for group_index, i in enumerate(indices):
+                results[i] = self._top_k(scores[group_index], rows, limits[i], min_scores[i], with_vectors)
+        return results
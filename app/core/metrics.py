@@ -0,0 +1,138 @@
+"""
+Métricas da aplicação no formato texto do Prometheus.
+Contadores, gauges e histogramas do prometheus_client, registrados no
+registro padrão e exportados em /metrics. Métricas que já existem como
+contadores (caches, registro de buscas) são lidas apenas na coleta, por
+um coletor.
+"""
+from typing import Any, Iterator
+import time
+
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, Metric
+from prometheus_client.registry import Collector
+
+# Limites (segundos) dos histogramas de latência
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class track_external:
+    """
+    Mede a duração de uma chamada a um serviço externo (Google, Twilio,
+    OpenAI, Redis...) e conta as que terminam com exceção.
+
+    Uso:
+        with track_external("redis", "mget"):
+            await redis.mget(keys)
+    """
+
+    __slots__ = ("service", "operation", "started")
+
+    def __init__(self, service: str, operation: str):
+        self.service = service
+        self.operation = operation
+
+    def __enter__(self) -> "track_external":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> bool:
+        EXTERNAL_CALL_SECONDS.labels(self.service, self.operation).observe(time.perf_counter() - self.started)
+        if exc_type is not None:
+            EXTERNAL_CALL_ERRORS.labels(self.service, self.operation).inc()
+        return False
+
+class SearchEngineCollector(Collector):
+    """
+    Coletor das métricas que o motor de busca já contabiliza.
+
+    Os contadores dos caches, do registro de buscas e do reranker são
+    lidos de search_engine.stats() apenas na coleta, sem custo na busca.
+    """
+
+    def __init__(self, search_engine: Any):
+        """
+        Inicializa o coletor.
+
+        Args:
+            search_engine: Motor de busca da aplicação
+        """
+        self.search_engine = search_engine
+
+    def collect(self) -> Iterator[Metric]:
+        stats = self.search_engine.stats()
+        hits = CounterMetricFamily("psicollab_cache_hits", "Acertos dos caches da busca", labels=["cache"])
+        misses = CounterMetricFamily("psicollab_cache_misses", "Faltas dos caches da busca", labels=["cache"])
+        stale = CounterMetricFamily(
+            "psicollab_cache_stale", "Entradas descartadas por geração antiga", labels=["cache"]
+        )
+        embedding = stats.get("embedding_cache") or {}
+        if embedding:
+            hits.add_metric(["embedding_local"], embedding["local_hits"])
+            hits.add_metric(["embedding_redis"], embedding["redis_hits"])
+            misses.add_metric(["embedding"], embedding["misses"])
+        for cache in ("response_cache", "semantic_cache"):
+            cache_stats = stats.get(cache)
+            if cache_stats:
+                label = cache.replace("_cache", "")
+                hits.add_metric([label], cache_stats["hits"])
+                misses.add_metric([label], cache_stats["misses"])
+                stale.add_metric([label], cache_stats["stale"])
+        yield from (hits, misses, stale)
+        yield CounterMetricFamily(
+            "psicollab_rerank_budget_fallbacks", "Rerankings abandonados por exceder o orçamento de tempo",
+            value=(stats.get("reranker") or {}).get("budget_fallbacks", 0)
+        )
+        search_log = stats.get("search_log")
+        if search_log:
+            yield CounterMetricFamily(
+                "psicollab_search_log_dropped", "Registros de busca descartados com a fila cheia",
+                value=search_log["dropped"]
+            )
+            yield GaugeMetricFamily(
+                "psicollab_search_log_queued", "Registros de busca aguardando gravação", value=search_log["queued"]
+            )
+        embeddings = stats.get("embeddings") or {}
+        if "retries" in embeddings:
+            yield CounterMetricFamily(
+                "psicollab_embedding_retries", "Novas tentativas de requisições à API de embeddings",
+                value=embeddings["retries"]
+            )
+            yield GaugeMetricFamily(
+                "psicollab_embedding_batch_size", "Tamanho atual (adaptativo) dos lotes de embeddings",
+                value=embeddings["batch_size"]
+            )
+
+SEARCH_STAGE_SECONDS = Histogram(
+    "psicollab_search_stage_duration_seconds",
+    "Duração de cada etapa da busca (embedding, vector_search, rerank...)",
+    ["stage"],
+    buckets=DEFAULT_BUCKETS
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "psicollab_http_request_duration_seconds",
+    "Duração das requisições HTTP por rota e status",
+    ["method", "route", "status"],
+    buckets=DEFAULT_BUCKETS
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "psicollab_http_requests_in_progress",
+    "Requisições HTTP em andamento",
+    ["method"]
+)
+HTTP_REQUEST_ERRORS = Counter(
+    "psicollab_http_request_errors",
+    "Requisições HTTP com status 5xx ou exceção não tratada",
+    ["method", "route"]
+)
+EXTERNAL_CALL_SECONDS = Histogram(
+    "psicollab_external_call_duration_seconds",
+    "Duração das chamadas a serviços externos",
+    ["service", "operation"],
+    buckets=DEFAULT_BUCKETS
+)
+EXTERNAL_CALL_ERRORS = Counter(
+    "psicollab_external_call_errors",
+    "Chamadas a serviços externos que falharam",
+    ["service", "operation"]
+)
+
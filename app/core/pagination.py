@@ -0,0 +1,98 @@
+"""
+Cursores de paginação do PsiCollab.
+Os cursores são opacos para o cliente: um JSON em base64 (URL-safe) com a
+fronteira da página anterior (pontuação e id do último resultado, ou o
+ponto de continuação do scroll) e uma impressão digital da consulta, que
+impede reutilizar o cursor com outra consulta.
+"""
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional
+import base64
+import hashlib
+import json
+
+def query_fingerprint(*parts: Any) -> str:
+    """
+    Calcula a impressão digital dos parâmetros de uma consulta.
+
+    Args:
+        parts: Parâmetros que definem a ordenação (consulta, filtros...)
+
+    Returns:
+        Hash curto dos parâmetros
+    """
+    return hashlib.sha1(json.dumps(parts, default=str).encode("utf-8")).hexdigest()[:16]
+
+def encode_cursor(fingerprint: str, **boundary: Any) -> str:
+    """
+    Gera um cursor opaco.
+
+    Args:
+        fingerprint: Impressão digital da consulta (ver query_fingerprint)
+        boundary: Fronteira da página anterior
+
+    Returns:
+        Cursor em base64 URL-safe
+    """
+    raw = json.dumps({"f": fingerprint, **boundary}, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, fingerprint: str) -> Dict[str, Any]:
+    """
+    Lê um cursor gerado por encode_cursor.
+
+    Args:
+        cursor: Cursor recebido do cliente
+        fingerprint: Impressão digital da consulta atual
+
+    Returns:
+        Fronteira da página anterior
+
+    Raises:
+        ValueError: Se o cursor for inválido ou de outra consulta
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValueError("Cursor inválido")
+    if not isinstance(data, dict) or data.pop("f", None) != fingerprint:
+        raise ValueError("Cursor não corresponde à consulta")
+    return data
+
+def ranking_score(result: Dict[str, Any]) -> float:
+    """Pontuação que define a ordem de um resultado (a combinada, se houver)."""
+    return float(result.get("fusion_score", result.get("score", 0.0)))
+
+def keyset_page(
+    ranking: List[Dict[str, Any]],
+    limit: int,
+    score: Optional[float] = None,
+    doc_id: Optional[str] = None
+) -> tuple:
+    """
+    Seleciona a página seguinte à fronteira (score, id) de uma lista ranqueada.
+
+    A lista é ordenada por pontuação decrescente e id crescente; a página
+    começa no primeiro resultado estritamente depois da fronteira, então
+    continua correta mesmo que a lista tenha mudado entre as páginas.
+
+    Args:
+        ranking: Resultados ranqueados
+        limit: Tamanho da página
+        score: Pontuação do último resultado da página anterior
+        doc_id: Id do último resultado da página anterior
+
+    Returns:
+        Resultados da página e a fronteira do último resultado (ou None se não houver mais)
+    """
+    ordered = sorted(ranking, key=lambda result: (-ranking_score(result), str(result.get("id"))))
+    start = 0
+    if score is not None:
+        keys = [(-ranking_score(result), str(result.get("id"))) for result in ordered]
+        start = bisect_right(keys, (-float(score), str(doc_id)))
+    page = ordered[start:start + limit]
+    if not page or start + limit >= len(ordered):
+        return page, None
+    last = page[-1]
+    return page, {"s": ranking_score(last), "i": str(last.get("id"))}
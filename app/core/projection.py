@@ -0,0 +1,165 @@
+"""
+Projeção de embeddings para vetores compactos do PsiCollab.
+Reduz os embeddings de VECTOR_SIZE dimensões para COMPACT_VECTOR_SIZE,
+por PCA (ajustada offline sobre o próprio corpus) ou por truncamento no
+estilo Matryoshka (apenas para modelos treinados dessa forma). Os vetores
+compactos são usados como primeiro estágio da busca em dois estágios.
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+import logging
+
+import numpy as np
+
+from app.core.config import settings
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+class DimensionReducer:
+    """
+    Projeção linear dos embeddings para uma dimensão menor.
+    Os vetores projetados são normalizados, para comparação por cosseno.
+    """
+
+    def __init__(self, method: str, dim: int, mean: Optional[np.ndarray] = None,
+                 components: Optional[np.ndarray] = None):
+        """
+        Inicializa a projeção.
+
+        Args:
+            method: "pca" ou "truncate"
+            dim: Dimensão de saída
+            mean: Média do corpus (apenas PCA)
+            components: Matriz (D x dim) de componentes principais (apenas PCA)
+        """
+        if method not in ("pca", "truncate"):
+            raise ValueError(f"Método de projeção inválido: {method}")
+        if method == "pca" and components is None:
+            raise ValueError("A projeção PCA precisa ser ajustada (ver DimensionReducer.fit_pca)")
+        self.method = method
+        self.dim = dim
+        self.mean = mean
+        self.components = components
+
+    @classmethod
+    def fit_pca(cls, vectors: Any, dim: Optional[int] = None) -> "DimensionReducer":
+        """
+        Ajusta uma projeção PCA sobre uma amostra do corpus.
+
+        Args:
+            vectors: Matriz (N x D) de embeddings da amostra
+            dim: Dimensão de saída (padrão: settings.COMPACT_VECTOR_SIZE)
+
+        Returns:
+            Projeção ajustada
+        """
+        dim = dim or settings.COMPACT_VECTOR_SIZE
+        sample = np.asarray(vectors, dtype=np.float32)
+        if len(sample) < dim:
+            raise ValueError(f"A amostra precisa de pelo menos {dim} vetores (recebidos {len(sample)})")
+        mean = sample.mean(axis=0)
+        # Os vetores singulares à direita são as direções de maior variância
+        _, singular_values, vt = np.linalg.svd(sample - mean, full_matrices=False)
+        explained = (singular_values[:dim] ** 2).sum() / (singular_values ** 2).sum()
+        logger.info(f"PCA ajustada: {sample.shape[1]} -> {dim} dimensões ({explained:.1%} da variância)")
+        return cls("pca", dim, mean=mean, components=vt[:dim].T.astype(np.float32))
+
+    @classmethod
+    def truncate(cls, dim: Optional[int] = None) -> "DimensionReducer":
+        """Cria uma projeção por truncamento (modelos do tipo Matryoshka)."""
+        return cls("truncate", dim or settings.COMPACT_VECTOR_SIZE)
+
+    @classmethod
+    def load(cls, path: Path) -> "DimensionReducer":
+        """
+        Carrega uma projeção salva com save().
+
+        Args:
+            path: Arquivo .npz da projeção
+
+        Returns:
+            Projeção carregada
+        """
+        data = np.load(path)
+        method = str(data["method"])
+        return cls(
+            method,
+            int(data["dim"]),
+            mean=data["mean"] if method == "pca" else None,
+            components=data["components"] if method == "pca" else None
+        )
+
+    def save(self, path: Path) -> None:
+        """
+        Salva a projeção em um arquivo .npz.
+
+        Args:
+            path: Arquivo de destino
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(
+            path,
+            method=self.method,
+            dim=self.dim,
+            mean=self.mean if self.mean is not None else np.zeros(0, dtype=np.float32),
+            components=self.components if self.components is not None else np.zeros((0, 0), dtype=np.float32)
+        )
+
+    def transform(self, vectors: Any) -> np.ndarray:
+        """
+        Projeta embeddings para a dimensão compacta.
+
+        Args:
+            vectors: Matriz (N x D) ou vetor (D) de embeddings
+
+        Returns:
+            Matriz (N x dim) de vetores compactos normalizados
+        """
+        matrix = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        if self.method == "pca":
+            projected = (matrix - self.mean) @ self.components
+        else:
+            projected = matrix[:, :self.dim]
+        norms = np.linalg.norm(projected, axis=1, keepdims=True)
+        return projected / np.where(norms == 0, 1, norms)
+
+    def named_vectors(self, embeddings: Sequence[Sequence[float]]) -> List[Dict[str, List[float]]]:
+        """
+        Monta os vetores nomeados (completo e compacto) de cada ponto.
+
+        Args:
+            embeddings: Embeddings completos
+
+        Returns:
+            Um dicionário {FULL_VECTOR_NAME: ..., COMPACT_VECTOR_NAME: ...} por embedding
+        """
+        compact = self.transform(embeddings)
+        return [
+            {
+                settings.FULL_VECTOR_NAME: list(map(float, embedding)),
+                settings.COMPACT_VECTOR_NAME: compact_vector.tolist()
+            }
+            for embedding, compact_vector in zip(embeddings, compact)
+        ]
+
+def load_reducer() -> Optional[DimensionReducer]:
+    """
+    Carrega a projeção configurada para a busca em dois estágios.
+
+    Returns:
+        Projeção carregada, ou None se não houver arquivo ajustado ou se ele
+        não puder ser lido
+    """
+    if settings.COMPACT_PROJECTION == "truncate":
+        return DimensionReducer.truncate()
+    path = Path(settings.COMPACT_PROJECTION_PATH)
+    if not path.exists():
+        logger.error(f"Projeção compacta não encontrada em {path}; execute 'manage_collection.py fit-projection'")
+        return None
+    try:
+        return DimensionReducer.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Projeção compacta inválida em {path} ({str(e)}); execute 'manage_collection.py fit-projection'")
+        return None
@@ -0,0 +1,165 @@
+"""
+Reranking dos resultados de busca do PsiCollab.
+Reordena os primeiros resultados da busca pontuando os pares
+(consulta, documento) em lotes. O reranker padrão roda localmente, só em
+CPU; modelos mais pesados (cross-encoders, APIs) podem ser registrados
+com register_reranker e escolhidos em settings.RERANKER.
+"""
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import logging
+import time
+
+import numpy as np
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.lexical_index import tokenize
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+class RerankTimeout(TimeoutError):
+    """O reranking excedeu o orçamento de tempo."""
+
+class Reranker:
+    """
+    Interface dos rerankers.
+    As subclasses implementam score_batch, que pontua um lote de documentos
+    de uma vez; score divide os documentos em lotes e respeita o prazo.
+    """
+
+    name = "base"
+
+    def __init__(self, batch_size: Optional[int] = None):
+        """
+        Inicializa o reranker.
+
+        Args:
+            batch_size: Documentos pontuados por lote (padrão: settings.RERANK_BATCH_SIZE)
+        """
+        self.batch_size = batch_size or settings.RERANK_BATCH_SIZE
+
+    def score_batch(self, query: str, documents: Sequence[Dict[str, Any]]) -> np.ndarray:
+        """
+        Pontua um lote de documentos para a consulta.
+
+        Args:
+            query: Consulta original
+            documents: Documentos do lote
+
+        Returns:
+            Pontuação de cada documento (maior é mais relevante)
+        """
+        raise NotImplementedError
+
+    def score(self, query: str, documents: Sequence[Dict[str, Any]], deadline: Optional[float] = None) -> np.ndarray:
+        """
+        Pontua os documentos em lotes.
+
+        Args:
+            query: Consulta original
+            documents: Documentos a pontuar
+            deadline: Instante limite (time.perf_counter) para terminar
+
+        Returns:
+            Pontuação de cada documento
+
+        Raises:
+            RerankTimeout: Se o prazo terminar antes do último lote
+        """
+        scores = []
+        for start in range(0, len(documents), self.batch_size):
+            if deadline is not None and time.perf_counter() > deadline:
+                raise RerankTimeout(f"Reranking interrompido após {start} de {len(documents)} documentos")
+            scores.append(self.score_batch(query, documents[start:start + self.batch_size]))
+        return np.concatenate(scores) if scores else np.zeros(0, dtype=np.float32)
+
+class LexicalOverlapReranker(Reranker):
+    """
+    Reranker local por sobreposição lexical.
+    Combina a pontuação da primeira etapa com a cobertura dos termos da
+    consulta no documento e com a presença de pares de termos consecutivos
+    da consulta (frases como "escala de atenção"). Os termos de cada
+    documento ficam em cache.
+    """
+
+    name = "lexical"
+
+    def __init__(self, batch_size: Optional[int] = None, weight: Optional[float] = None, cache_size: int = 10000):
+        """
+        Inicializa o reranker.
+
+        Args:
+            batch_size: Documentos pontuados por lote
+            weight: Peso da sobreposição lexical (padrão: settings.RERANK_LEXICAL_WEIGHT);
+                o restante fica com a pontuação da primeira etapa
+            cache_size: Documentos com termos em cache
+        """
+        super().__init__(batch_size)
+        self.weight = weight if weight is not None else settings.RERANK_LEXICAL_WEIGHT
+        self._tokens = LRUCache(maxsize=cache_size)
+
+    def _document_tokens(self, document: Dict[str, Any]) -> List[str]:
+        """Termos do conteúdo de um documento, com cache."""
+        content = document.get("conteudo") or ""
+        key = f"{document.get('id')}:{hash(content)}"
+        tokens = self._tokens.get(key)
+        if tokens is None:
+            tokens = tokenize(content)
+            self._tokens.set(key, tokens)
+        return tokens
+
+    def score_batch(self, query: str, documents: Sequence[Dict[str, Any]]) -> np.ndarray:
+        first_stage = np.array([document.get("score") or 0.0 for document in documents], dtype=np.float32)
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return first_stage
+        positions = {term: column for column, term in enumerate(terms)}
+
+        # Matriz documento x termo da consulta e matriz de pares consecutivos
+        present = np.zeros((len(documents), len(terms)), dtype=bool)
+        pairs = np.zeros((len(documents), max(1, len(terms) - 1)), dtype=bool)
+        for row, document in enumerate(documents):
+            columns = np.array([positions.get(token, -1) for token in self._document_tokens(document)], dtype=np.int64)
+            matched = columns[columns >= 0]
+            present[row, matched] = True
+            if len(columns) > 1:
+                consecutive = (columns[:-1] >= 0) & (columns[1:] == columns[:-1] + 1)
+                pairs[row, columns[:-1][consecutive]] = True
+
+        coverage = present.mean(axis=1)
+        phrase = pairs.mean(axis=1) if len(terms) > 1 else coverage
+        lexical = (2 * coverage + phrase) / 3
+        return (1 - self.weight) * first_stage + self.weight * lexical
+
+# Rerankers disponíveis em settings.RERANKER
+_RERANKERS: Dict[str, Callable[[], Reranker]] = {
+    LexicalOverlapReranker.name: LexicalOverlapReranker
+}
+
+def register_reranker(name: str, factory: Callable[[], Reranker]) -> None:
+    """
+    Registra um reranker, selecionável por settings.RERANKER.
+
+    Args:
+        name: Nome do reranker
+        factory: Função que cria o reranker
+    """
+    _RERANKERS[name] = factory
+
+def create_reranker(name: Optional[str] = None) -> Optional[Reranker]:
+    """
+    Cria o reranker configurado.
+
+    Args:
+        name: Nome do reranker (padrão: settings.RERANKER); "none" desabilita
+
+    Returns:
+        Reranker, ou None se desabilitado
+    """
+    name = name or settings.RERANKER
+    if name == "none":
+        return None
+    if name not in _RERANKERS:
+        raise ValueError(f"Reranker desconhecido: {name} (disponíveis: {', '.join(_RERANKERS)})")
+    return _RERANKERS[name]()
@@ -0,0 +1,179 @@
+"""
+Agrupamento de buscas concorrentes (micro-batching) do PsiCollab.
+Reúne as buscas que chegam dentro de uma pequena janela de tempo e as
+executa com uma única geração de embeddings e uma única requisição ao
+Qdrant, devolvendo a cada chamador os seus próprios resultados.
+"""
+from typing import Any, Dict, List, Optional, Sequence, Set, TYPE_CHECKING
+import asyncio
+import logging
+import time
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from app.core.search_engine import SearchEngine
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+class _PendingSearch:
+    """Busca aguardando a execução do próximo lote."""
+
+    __slots__ = ("query", "limit", "tipo_filtro", "min_score", "fields", "future", "enqueued_at")
+
+    def __init__(
+        self,
+        query: str,
+        limit: int,
+        tipo_filtro: Optional[str],
+        min_score: float,
+        fields: Optional[Sequence[str]],
+        future: asyncio.Future
+    ):
+        self.query = query
+        self.limit = limit
+        self.tipo_filtro = tipo_filtro
+        self.min_score = min_score
+        self.fields = fields
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+class SearchBatcher:
+    """
+    Agrupa buscas concorrentes em lotes.
+    Um lote é executado quando atinge o tamanho máximo ou quando a janela
+    de espera, contada a partir da primeira busca do lote, termina. Sem
+    outro lote em execução, a janela não é esperada: o lote sai na próxima
+    iteração do event loop, com as buscas que chegaram junto.
+    """
+
+    def __init__(
+        self,
+        engine: "SearchEngine",
+        max_batch_size: Optional[int] = None,
+        window_ms: Optional[float] = None
+    ):
+        """
+        Inicializa o agrupador.
+
+        Args:
+            engine: Motor de busca que executa os lotes
+            max_batch_size: Número máximo de buscas por lote
+            window_ms: Janela máxima de espera por novas buscas (milissegundos)
+        """
+        self.engine = engine
+        self.max_batch_size = max_batch_size or settings.SEARCH_BATCH_MAX_SIZE
+        self.window = (window_ms if window_ms is not None else settings.SEARCH_BATCH_WINDOW_MS) / 1000
+        self._pending: List[_PendingSearch] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+        # Métricas
+        self.batches = 0
+        self.requests = 0
+        self.batch_size_counts: Dict[int, int] = {}
+        self.queue_delay_total = 0.0
+        self.queue_delay_max = 0.0
+
+    async def submit(
+        self,
+        query: str,
+        limit: int,
+        tipo_filtro: Optional[str],
+        min_score: float,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Enfileira uma busca no próximo lote e aguarda o seu resultado.
+
+        Args:
+            query: Consulta em linguagem natural
+            limit: Número máximo de resultados
+            tipo_filtro: Filtro opcional por tipo de documento
+            min_score: Pontuação mínima de similaridade
+            fields: Campos do payload pedidos (None para todos)
+
+        Returns:
+            Resultados da busca
+
+        Raises:
+            Exception: Propaga o erro ocorrido na execução do lote
+        """
+        loop = asyncio.get_running_loop()
+        pending = _PendingSearch(query, limit, tipo_filtro, min_score, fields, loop.create_future())
+        self._pending.append(pending)
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            # Uma busca isolada não paga a janela; sob carga, as buscas que
+            # chegam durante um lote em execução esperam para formar o próximo
+            self._timer = loop.call_later(self.window if self._tasks else 0, self._flush)
+
+        return await pending.future
+
+    def _flush(self) -> None:
+        """Despacha as buscas pendentes como um lote."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[_PendingSearch]) -> None:
+        """
+        Executa um lote e entrega os resultados a cada chamador.
+
+        Args:
+            batch: Buscas do lote
+        """
+        started_at = time.perf_counter()
+        self._record(batch, started_at)
+
+        try:
+            embeddings = await self.engine._embed_queries([pending.query for pending in batch])
+            result_lists = await self.engine._search_batch(
+                embeddings,
+                limits=[pending.limit for pending in batch],
+                tipo_filtros=[pending.tipo_filtro for pending in batch],
+                min_scores=[pending.min_score for pending in batch],
+                payload_fields=[pending.fields for pending in batch]
+            )
+        except Exception as e:
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(e)
+            return
+
+        for pending, results in zip(batch, result_lists):
+            if not pending.future.done():
+                pending.future.set_result(results)
+
+    def _record(self, batch: List[_PendingSearch], started_at: float) -> None:
+        """Atualiza as métricas de tamanho de lote e atraso de fila."""
+        size = len(batch)
+        self.batches += 1
+        self.requests += size
+        self.batch_size_counts[size] = self.batch_size_counts.get(size, 0) + 1
+        for pending in batch:
+            delay = started_at - pending.enqueued_at
+            self.queue_delay_total += delay
+            self.queue_delay_max = max(self.queue_delay_max, delay)
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna as métricas de tamanho dos lotes e de atraso na fila."""
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "avg_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "batch_size_counts": dict(sorted(self.batch_size_counts.items())),
+            "avg_queue_delay_ms": 1000 * self.queue_delay_total / self.requests if self.requests else 0.0,
+            "max_queue_delay_ms": 1000 * self.queue_delay_max
+        }
@@ -0,0 +1,353 @@
+"""
+Cache de respostas de busca do PsiCollab.
+Armazena o resultado completo de SearchEngine.search por parâmetros da
+consulta. Cada entrada registra a "geração" da coleção em que foi
+calculada; qualquer escrita na coleção incrementa a geração, de modo que
+entradas antigas nunca são servidas.
+
+A geração fica no Redis (SEARCH_CACHE_SHARED_GENERATION) com qualquer
+backend das entradas, para que a ingestão, que roda em outro processo,
+invalide o cache da API. Sem o Redis, a geração vale apenas para o
+processo atual e a ingestão precisa limpar o cache pela API (DELETE
+/search/cache, ver SEARCH_CACHE_PURGE_URL).
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import hashlib
+import json
+import logging
+import time
+
+import redis.asyncio as aioredis
+
+from app.core.cache import LRUCache, create_redis_client
+from app.core.config import settings
+from app.core.embedding_cache import REDIS_RETRY_INTERVAL, normalize_query
+from app.core.metrics import track_external
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+# Gerações consecutivas cujas listas de pontos alterados são consultadas
+_MAX_CHANGE_GENERATIONS = 100
+
+class CollectionGeneration:
+    """
+    Número de geração de uma coleção, incrementado a cada escrita.
+    Com Redis, o número é compartilhado entre processos (API e ingestão);
+    sem Redis, vale apenas para o processo atual.
+    """
+
+    def __init__(self, collection_name: str, redis_client: Optional[aioredis.Redis] = None):
+        """
+        Inicializa o contador.
+
+        Args:
+            collection_name: Nome da coleção
+            redis_client: Cliente Redis para compartilhar o número entre processos
+        """
+        self.collection_name = collection_name
+        self.redis = redis_client
+        self.key = f"search:generation:{collection_name}"
+        self.local = 0
+        self.shared = redis_client is not None
+        self._redis_retry_at = 0.0
+        self._read_at: Optional[float] = None
+        # Pontos alterados por geração, quando o Redis não é usado
+        self._changes: Dict[int, List[str]] = {}
+
+    async def current(self) -> Optional[int]:
+        """
+        Retorna a geração atual.
+
+        A geração lida do Redis é reaproveitada por SEARCH_CACHE_GENERATION_TTL
+        segundos, para não custar uma leitura no Redis a cada busca: escritas
+        de outros processos são vistas com até esse atraso (as do próprio
+        processo, por bump, imediatamente).
+
+        Returns:
+            Número da geração, ou None se o Redis estiver indisponível (sem
+            a geração compartilhada, nada pode ser servido do cache)
+        """
+        if self.redis is None:
+            return self.local
+        now = time.monotonic()
+        if self._read_at is not None and now - self._read_at < settings.SEARCH_CACHE_GENERATION_TTL:
+            return self.local
+        if now < self._redis_retry_at:
+            return None
+        try:
+            with track_external("redis", "get"):
+                self.local = int(await self.redis.get(self.key) or 0)
+            self._read_at = now
+            return self.local
+        except aioredis.RedisError as e:
+            self._redis_retry_at = time.monotonic() + REDIS_RETRY_INTERVAL
+            logger.warning(f"Não foi possível ler a geração de '{self.collection_name}': {str(e)}")
+            return None
+
+    async def bump(self, changed: Optional[Sequence[Any]] = None) -> int:
+        """
+        Incrementa a geração após uma escrita na coleção.
+
+        Se o Redis falhar, só o processo atual vê a nova geração e shared
+        passa a False, indicando que o cache dos outros processos precisa
+        ser limpo de outra forma.
+
+        Args:
+            changed: Ids dos pontos gravados ou apagados pela escrita (None se
+                desconhecidos ou acima de LEXICAL_INDEX_DELTA_MAX), publicados
+                com a geração para que os índices em memória sejam atualizados
+                sem recarregar a coleção (ver changes)
+
+        Returns:
+            Novo número da geração
+        """
+        if changed is not None and len(changed) > settings.LEXICAL_INDEX_DELTA_MAX:
+            changed = None
+        self.local += 1
+        if self.redis is not None:
+            try:
+                with track_external("redis", "incr"):
+                    self.local = int(await self.redis.incr(self.key))
+                self._read_at = time.monotonic()
+                self.shared = True
+                if changed is not None:
+                    with track_external("redis", "set"):
+                        await self.redis.set(
+                            f"{self.key}:changes:{self.local}",
+                            json.dumps([str(point_id) for point_id in changed]),
+                            ex=settings.LEXICAL_INDEX_DELTA_TTL
+                        )
+            except aioredis.RedisError as e:
+                self.shared = False
+                logger.error(f"Não foi possível incrementar a geração de '{self.collection_name}': {str(e)}")
+        elif changed is not None:
+            self._changes[self.local] = [str(point_id) for point_id in changed]
+            self._changes.pop(self.local - _MAX_CHANGE_GENERATIONS, None)
+        logger.debug(f"Geração da coleção '{self.collection_name}': {self.local}")
+        return self.local
+
+    async def changes(self, since: int, until: int) -> Optional[List[str]]:
+        """
+        Retorna os pontos alterados entre duas gerações.
+
+        Args:
+            since: Geração já conhecida
+            until: Geração atual
+
+        Returns:
+            Ids dos pontos gravados ou apagados depois de since (como texto), ou
+            None se alguma geração do intervalo não publicou a lista (escrita
+            sem lista, lista expirada ou intervalo longo demais)
+        """
+        if until <= since:
+            return []
+        if until - since > _MAX_CHANGE_GENERATIONS:
+            return None
+        generations = range(since + 1, until + 1)
+        if self.redis is None:
+            lists = [self._changes.get(generation) for generation in generations]
+        else:
+            try:
+                with track_external("redis", "mget"):
+                    raw = await self.redis.mget([f"{self.key}:changes:{generation}" for generation in generations])
+            except aioredis.RedisError as e:
+                logger.warning(f"Não foi possível ler as alterações de '{self.collection_name}': {str(e)}")
+                return None
+            lists = [json.loads(value) if value is not None else None for value in raw]
+        if any(changed is None for changed in lists):
+            return None
+        return list(dict.fromkeys(point_id for changed in lists for point_id in changed))
+
+# Gerações por coleção, compartilhadas por todo o processo
+_generations: Dict[str, CollectionGeneration] = {}
+
+def get_collection_generation(collection_name: Optional[str] = None) -> CollectionGeneration:
+    """
+    Retorna o contador de geração da coleção, único por processo.
+
+    O contador usa Redis quando o backend do cache de respostas é "redis"
+    ou SEARCH_CACHE_SHARED_GENERATION está habilitado, para que escritas
+    feitas por outros processos invalidem o cache.
+
+    Args:
+        collection_name: Nome da coleção (padrão: settings.COLLECTION_NAME)
+
+    Returns:
+        Contador de geração da coleção
+    """
+    collection_name = collection_name or settings.COLLECTION_NAME
+    if collection_name not in _generations:
+        shared = settings.SEARCH_CACHE_BACKEND == "redis" or settings.SEARCH_CACHE_SHARED_GENERATION
+        redis_client = create_redis_client() if shared else None
+        _generations[collection_name] = CollectionGeneration(collection_name, redis_client)
+    return _generations[collection_name]
+
+class SearchResponseCache:
+    """
+    Cache de respostas completas de busca, versionado pela geração da coleção.
+    As entradas ficam em memória (LRU com TTL) ou no Redis, conforme o
+    backend; a geração é conferida a cada consulta (ver CollectionGeneration.current).
+    """
+
+    def __init__(
+        self,
+        generation: CollectionGeneration,
+        redis_client: Optional[aioredis.Redis] = None,
+        maxsize: Optional[int] = None,
+        ttl: Optional[int] = None
+    ):
+        """
+        Inicializa o cache.
+
+        Args:
+            generation: Contador de geração da coleção
+            redis_client: Cliente Redis para armazenar as entradas (None usa a memória)
+            maxsize: Número máximo de entradas em memória
+            ttl: Tempo de vida das entradas (segundos)
+        """
+        self.generation = generation
+        self.redis = redis_client
+        self.ttl = ttl or settings.SEARCH_CACHE_TTL
+        self.local = LRUCache(maxsize=maxsize or settings.SEARCH_CACHE_SIZE, ttl=self.ttl)
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.errors = 0
+
+    @classmethod
+    def from_settings(cls, collection_name: Optional[str] = None) -> "SearchResponseCache":
+        """Cria o cache conforme as configurações (backend "memory" ou "redis")."""
+        generation = get_collection_generation(collection_name)
+        redis_client = generation.redis if settings.SEARCH_CACHE_BACKEND == "redis" else None
+        return cls(generation, redis_client=redis_client)
+
+    def _key(
+        self,
+        query: str,
+        limit: int,
+        tipo_filtro: Optional[str],
+        min_score: float,
+        fields: Optional[Sequence[str]] = None
+    ) -> str:
+        """Chave de cache para os parâmetros da busca."""
+        params = f"{normalize_query(query)}|{limit}|{tipo_filtro or ''}|{min_score:.4f}"
+        if fields is not None:
+            params += "|" + ",".join(sorted(fields))
+        digest = hashlib.sha1(params.encode("utf-8")).hexdigest()
+        return f"search:resp:{self.generation.collection_name}:{digest}"
+
+    async def lookup(
+        self,
+        query: str,
+        limit: int,
+        tipo_filtro: Optional[str],
+        min_score: float,
+        fields: Optional[Sequence[str]] = None
+    ) -> Tuple[Optional[List[Dict[str, Any]]], Optional[int]]:
+        """
+        Procura uma resposta em cache para os parâmetros da busca.
+
+        Args:
+            query: Consulta em linguagem natural
+            limit: Número máximo de resultados
+            tipo_filtro: Filtro opcional por tipo de documento
+            min_score: Pontuação mínima de similaridade
+            fields: Campos do payload pedidos (None para todos)
+
+        Returns:
+            Tupla (resultados ou None, geração atual). A geração deve ser
+            repassada a store(), para que um resultado calculado antes de
+            uma escrita não seja gravado com a geração nova.
+        """
+        key = self._key(query, limit, tipo_filtro, min_score, fields)
+
+        if self.redis is not None:
+            try:
+                with track_external("redis", "mget"):
+                    raw_generation, raw_entry = await self.redis.mget([self.generation.key, key])
+            except aioredis.RedisError as e:
+                self.errors += 1
+                logger.warning(f"Cache de respostas indisponível: {str(e)}")
+                return None, None
+            generation = int(raw_generation or 0)
+            entry = json.loads(raw_entry) if raw_entry is not None else None
+        else:
+            generation = await self.generation.current()
+            if generation is None:
+                self.errors += 1
+                return None, None
+            entry = self.local.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None, generation
+        if entry["generation"] != generation:
+            self.stale += 1
+            self.misses += 1
+            return None, generation
+
+        self.hits += 1
+        return [dict(result) for result in entry["results"]], generation
+
+    async def store(
+        self,
+        query: str,
+        limit: int,
+        tipo_filtro: Optional[str],
+        min_score: float,
+        generation: int,
+        results: List[Dict[str, Any]],
+        fields: Optional[Sequence[str]] = None
+    ) -> None:
+        """
+        Armazena a resposta de uma busca.
+
+        Args:
+            query: Consulta em linguagem natural
+            limit: Número máximo de resultados
+            tipo_filtro: Filtro opcional por tipo de documento
+            min_score: Pontuação mínima de similaridade
+            generation: Geração obtida em lookup() antes de calcular os resultados
+            results: Resultados da busca
+            fields: Campos do payload pedidos (None para todos)
+        """
+        key = self._key(query, limit, tipo_filtro, min_score, fields)
+        entry = {"generation": generation, "results": [dict(result) for result in results]}
+
+        if self.redis is not None:
+            try:
+                with track_external("redis", "set"):
+                    await self.redis.set(key, json.dumps(entry, default=str), ex=int(self.ttl))
+            except aioredis.RedisError as e:
+                self.errors += 1
+                logger.warning(f"Não foi possível gravar no cache de respostas: {str(e)}")
+        else:
+            self.local.set(key, entry)
+
+    async def purge(self) -> int:
+        """
+        Invalida todas as respostas em cache.
+
+        Limpa as entradas locais e incrementa a geração da coleção, o que
+        invalida também as entradas gravadas no Redis por qualquer processo.
+
+        Returns:
+            Nova geração da coleção
+        """
+        self.local.clear()
+        return await self.generation.bump()
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna os contadores de uso do cache."""
+        total = self.hits + self.misses
+        return {
+            "backend": "redis" if self.redis is not None else "memory",
+            "generation": self.generation.local,
+            "local_size": len(self.local),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "errors": self.errors,
+            "hit_rate": self.hits / total if total else 0.0
+        }
@@ -3,20 +3,152 @@ Motor de Busca Semântica para o PsiCollab.
 Responsável por processar consultas em linguagem natural e recuperar
 documentos relevantes da base de conhecimento.
 """
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, AsyncIterator, List, Optional, Sequence, Tuple
+import asyncio
 import logging
+import time
 import uuid
 import json
 from datetime import datetime
+from pathlib import Path
 
 from app.core.config import settings
-from app.core.embedding_generator import EmbeddingGenerator
-from qdrant_client import QdrantClient
+from app.core.embeddings import EmbeddingProvider, create_embedding_provider
+from app.core.embedding_cache import EmbeddingCache, normalize_query
+from app.core.search_batcher import SearchBatcher
+from app.core.search_cache import CollectionGeneration, SearchResponseCache, get_collection_generation
+from app.core.cache import LRUCache
+from app.core.local_vector_store import LocalVectorStore
+from app.core.lexical_index import LexicalIndex, get_lexical_index
+from app.core.latency import LatencyTracker
+from app.core.metrics import SEARCH_STAGE_SECONDS
+from app.core.pagination import decode_cursor, encode_cursor, keyset_page, query_fingerprint
+from app.core.reranker import Reranker, create_reranker
+from app.core.search_log import SearchLogSink, create_search_log
+from app.core.semantic_cache import SemanticCache
+from app.core.collection_manager import quantization_search_params
+from app.core.projection import DimensionReducer, load_reducer
+from app.core.vector_db import create_async_client
+import numpy as np
+from qdrant_client import AsyncQdrantClient
 from qdrant_client.http import models
 
 # Configuração de logging
 logger = logging.getLogger(__name__)
 
+# Campos calculados pela busca, mantidos em qualquer projeção do payload
+RESULT_FIELDS = frozenset({"id", "score", "fusion_score", "lexical_score", "rerank_score", "vector"})
+
+def normalize_fields(fields: Optional[Sequence[str]]) -> Optional[Tuple[str, ...]]:
+    """
+    Normaliza uma lista de campos do payload pedidos na busca.
+    
+    Args:
+        fields: Campos pedidos (None para todos)
+        
+    Returns:
+        Campos ordenados e sem repetição, incluindo "id", ou None para todos
+    """
+    if fields is None:
+        return None
+    return tuple(sorted(set(fields) | {"id"}))
+
+def project_payload(doc: Dict[str, Any], fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+    """
+    Mantém apenas os campos pedidos (e os calculados, ver RESULT_FIELDS) de um resultado.
+    
+    Args:
+        doc: Resultado da busca
+        fields: Campos do payload pedidos (None para todos)
+        
+    Returns:
+        Resultado projetado
+    """
+    if fields is None:
+        return doc
+    return {key: value for key, value in doc.items() if key in fields or key in RESULT_FIELDS}
+
+def reciprocal_rank_fusion(
+    result_lists: List[List[Dict[str, Any]]],
+    k: int = 60
+) -> List[Dict[str, Any]]:
+    """
+    Combina listas de resultados ranqueados por reciprocal rank fusion (RRF).
+    
+    Cada documento recebe a soma de 1 / (k + posição) nas listas em que aparece,
+    o que dispensa comparar pontuações de consultas diferentes. Documentos
+    repetidos são unificados pelo campo "id", mantendo a maior pontuação de
+    similaridade em "score" e a pontuação combinada em "fusion_score".
+    
+    Args:
+        result_lists: Listas de resultados, cada uma ordenada por relevância
+        k: Constante de suavização do RRF
+        
+    Returns:
+        Lista única ordenada pela pontuação combinada
+    """
+    fused: Dict[str, Dict[str, Any]] = {}
+    for results in result_lists:
+        for rank, result in enumerate(results, start=1):
+            doc_id = result.get("id", result.get("uuid"))
+            contribution = 1.0 / (k + rank)
+            current = fused.get(doc_id)
+            if current is None:
+                current = dict(result)
+                current["fusion_score"] = 0.0
+                fused[doc_id] = current
+            elif result.get("score", 0) > current.get("score", 0):
+                current["score"] = result["score"]
+            current["fusion_score"] += contribution
+    
+    return sorted(fused.values(), key=lambda doc: doc["fusion_score"], reverse=True)
+
+def maximal_marginal_relevance(
+    query_embedding: Any,
+    embeddings: Any,
+    k: int,
+    diversity: float = 0.5
+) -> List[int]:
+    """
+    Seleciona k resultados diversos por maximal marginal relevance (MMR).
+    
+    A cada passo escolhe o candidato com maior
+    (1 - diversity) * sim(consulta, doc) - diversity * max sim(doc, já escolhidos).
+    As similaridades entre todos os candidatos são calculadas de uma vez,
+    com uma multiplicação de matrizes; cada passo atualiza apenas o vetor
+    de maior similaridade com os já escolhidos.
+    
+    Args:
+        query_embedding: Vetor da consulta
+        embeddings: Matriz (N x D) com os vetores dos candidatos
+        k: Número de resultados a selecionar
+        diversity: Peso da diversidade (0 = só relevância, 1 = só diversidade)
+        
+    Returns:
+        Índices dos candidatos escolhidos, na ordem de seleção
+    """
+    candidates = np.asarray(embeddings, dtype=np.float32)
+    k = min(k, len(candidates))
+    if k <= 0:
+        return []
+    candidates = candidates / np.maximum(np.linalg.norm(candidates, axis=1, keepdims=True), 1e-12)
+    query = np.asarray(query_embedding, dtype=np.float32)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+    
+    relevance = candidates @ query
+    similarity = candidates @ candidates.T
+    max_similarity = np.full(len(candidates), -np.inf, dtype=np.float32)
+    available = np.ones(len(candidates), dtype=bool)
+    selected: List[int] = []
+    for _ in range(k):
+        penalty = np.where(np.isinf(max_similarity), 0.0, max_similarity)
+        scores = np.where(available, (1 - diversity) * relevance - diversity * penalty, -np.inf)
+        chosen = int(np.argmax(scores))
+        selected.append(chosen)
+        available[chosen] = False
+        max_similarity = np.maximum(max_similarity, similarity[chosen])
+    return selected
+
 class SearchEngine:
     """
     Motor de Busca Semântica.
@@ -24,78 +156,843 @@ class SearchEngine:
     recupera documentos relevantes da base de conhecimento.
     """
     
-    def __init__(self):
-        """Inicializa o motor de busca."""
-        self.embedding_generator = EmbeddingGenerator()
-        self.client = QdrantClient(settings.VECTOR_DB_URL)
-        self.collection_name = "knowledge_base"
+    def __init__(
+        self,
+        client: Optional[AsyncQdrantClient] = None,
+        embedding_generator: Optional[EmbeddingProvider] = None,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        response_cache: Optional[SearchResponseCache] = None,
+        local_store: Optional[LocalVectorStore] = None,
+        reducer: Optional[DimensionReducer] = None,
+        lexical_index: Optional[LexicalIndex] = None,
+        reranker: Optional[Reranker] = None,
+        search_log: Optional[SearchLogSink] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        optional_layers: bool = True
+    ):
+        """
+        Inicializa o motor de busca.
+        
+        O motor deve ser criado uma única vez por processo (lifespan da
+        aplicação), para que o pool de conexões do Qdrant seja reutilizado.
+        
+        Args:
+            client: Cliente assíncrono do Qdrant (criado a partir das configurações se omitido)
+            embedding_generator: Provedor de embeddings (criado a partir de settings.EMBEDDING_PROVIDER se omitido)
+            embedding_cache: Cache de embeddings de consultas (criado a partir das configurações se omitido)
+            response_cache: Cache de respostas de busca (criado a partir das configurações se omitido)
+            local_store: Armazenamento vetorial local (aberto a partir das configurações se omitido)
+            reducer: Projeção dos vetores compactos da busca em dois estágios
+                (carregada a partir das configurações se TWO_STAGE_SEARCH estiver habilitado)
+            lexical_index: Índice BM25 da busca híbrida (o índice compartilhado
+                do processo é usado se HYBRID_SEARCH estiver habilitado)
+            reranker: Reranker dos primeiros resultados (criado a partir de settings.RERANKER se omitido)
+            search_log: Registro das buscas (criado a partir das configurações se omitido)
+            semantic_cache: Cache de respostas por consultas semelhantes (criado se
+                SEMANTIC_CACHE_ENABLED estiver habilitado)
+            optional_layers: Se False, as camadas opcionais omitidas (caches de
+                respostas, armazenamento local, projeção, índice lexical, reranker,
+                registro de buscas e agrupamento) ficam desabilitadas em vez de
+                criadas a partir das configurações, e a geração da coleção fica
+                só no processo (sem Redis); usado nos benchmarks
+        """
+        self.embedding_generator = embedding_generator or create_embedding_provider()
+        self.embedding_cache = embedding_cache or EmbeddingCache.from_settings(
+            model=getattr(self.embedding_generator, "model", None)
+        )
+        self.client = client or create_async_client()
+        self.collection_name = settings.COLLECTION_NAME
+        if response_cache is None and optional_layers and settings.SEARCH_CACHE_ENABLED:
+            response_cache = SearchResponseCache.from_settings(self.collection_name)
+        self.response_cache = response_cache
+        if response_cache is not None:
+            self.generation = response_cache.generation
+        elif optional_layers:
+            self.generation = get_collection_generation(self.collection_name)
+        else:
+            self.generation = CollectionGeneration(self.collection_name)
+        self._type_counts_cache = LRUCache(maxsize=4, ttl=settings.SEARCH_TYPE_COUNTS_TTL)
+        self.vector_backend = settings.VECTOR_BACKEND
+        if local_store is None and optional_layers and (
+            self.vector_backend == "local" or settings.LOCAL_VECTOR_STORE_FALLBACK
+        ):
+            local_store = LocalVectorStore.open_if_exists(
+                Path(settings.LOCAL_VECTOR_STORE_PATH) / self.collection_name
+            )
+        self.local_store = local_store
+        self.search_timeout = settings.QDRANT_SEARCH_TIMEOUT
         self.search_params = models.SearchParams(
             hnsw_ef=128,
-            exact=False
+            exact=False,
+            quantization=quantization_search_params(
+                settings.QDRANT_QUANTIZATION,
+                oversampling=settings.QDRANT_QUANTIZATION_OVERSAMPLING,
+                rescore=settings.QDRANT_QUANTIZATION_RESCORE
+            )
         )
+        if reducer is None and optional_layers and settings.TWO_STAGE_SEARCH:
+            reducer = load_reducer()
+            if reducer is None:
+                logger.error("Busca em dois estágios sem projeção compacta; buscando apenas pelo vetor completo")
+        self.reducer = reducer
+        # Coleções em dois estágios só têm vetores nomeados, mesmo sem a projeção
+        self.full_vector_name = (
+            settings.FULL_VECTOR_NAME if reducer is not None or settings.TWO_STAGE_SEARCH else None
+        )
+        if lexical_index is None and optional_layers and settings.HYBRID_SEARCH:
+            lexical_index = get_lexical_index(self.collection_name)
+        self.lexical_index = lexical_index
+        self._lexical_generation: Optional[int] = None
+        self._lexical_checked_at = time.monotonic()
+        self._lexical_reload: Optional[asyncio.Task] = None
+        if reranker is None and optional_layers:
+            reranker = create_reranker()
+        self.reranker = reranker
+        self.rerank_top_n = settings.RERANK_TOP_N
+        self.rerank_budget = settings.RERANK_BUDGET_MS / 1000
+        self._rerank_fallbacks = 0
+        self.latency = LatencyTracker(histogram=SEARCH_STAGE_SECONDS)
+        if search_log is None and optional_layers:
+            search_log = create_search_log()
+        self.search_log = search_log
+        if semantic_cache is None and optional_layers and settings.SEMANTIC_CACHE_ENABLED:
+            semantic_cache = SemanticCache()
+        self.semantic_cache = semantic_cache
+        self.batcher = SearchBatcher(self) if optional_layers and settings.SEARCH_BATCHING_ENABLED else None
+    
+    async def close(self) -> None:
+        """Fecha as conexões do cliente do Qdrant e do cache, o armazenamento local e o registro de buscas."""
+        if self.search_log is not None:
+            await self.search_log.close()
+        if self._lexical_reload is not None:
+            self._lexical_reload.cancel()
+        await self.client.close()
+        await self.embedding_cache.close()
+        await self.embedding_generator.close()
+        if self.local_store is not None:
+            self.local_store.close()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Retorna as métricas dos caches e do agrupamento de buscas."""
+        return {
+            "embeddings": self.embedding_generator.stats(),
+            "embedding_cache": self.embedding_cache.stats(),
+            "response_cache": self.response_cache.stats() if self.response_cache is not None else None,
+            "semantic_cache": self.semantic_cache.stats() if self.semantic_cache is not None else None,
+            "batching": self.batcher.stats() if self.batcher is not None else None,
+            "lexical_index": self.lexical_index.stats() if self.lexical_index is not None else None,
+            "reranker": {
+                "name": self.reranker.name if self.reranker is not None else None,
+                "budget_fallbacks": self._rerank_fallbacks
+            },
+            "latency": self.latency.summary(),
+            "search_log": self.search_log.stats() if self.search_log is not None else None
+        }
+
+    async def load_lexical_index(self) -> int:
+        """
+        Carrega o índice BM25 da busca híbrida a partir da coleção do Qdrant.
+
+        Chamado no início da aplicação e, depois, quando a geração da coleção
+        muda sem publicar os pontos alterados (ver _update_lexical_index), para
+        incluir as escritas da ingestão, que roda em outro processo. Se o
+        Qdrant estiver indisponível, o erro é registrado e a busca continua
+        com o índice anterior (vazio na primeira carga) até a próxima tentativa.
+
+        Returns:
+            Número de documentos indexados (0 se a busca híbrida estiver
+            desabilitada ou a carga falhar)
+        """
+        if not settings.HYBRID_SEARCH or self.lexical_index is None:
+            return 0
+        # Lida antes da carga: uma escrita durante a carga provoca outra
+        generation = await self.generation.current()
+        try:
+            count = await self.lexical_index.load_from_collection(self.client, self.collection_name)
+        except Exception as e:
+            logger.error(f"Erro ao carregar o índice lexical de '{self.collection_name}': {str(e)}")
+            return 0
+        self._lexical_generation = generation
+        return count
+
+    async def _refresh_lexical_index(self) -> None:
+        """
+        Atualiza o índice BM25 em segundo plano quando a geração da coleção muda.
+
+        A geração é verificada no máximo a cada LEXICAL_INDEX_REFRESH_INTERVAL
+        segundos; as buscas seguem com o índice atual durante a atualização.
+        """
+        now = time.monotonic()
+        if now - self._lexical_checked_at < settings.LEXICAL_INDEX_REFRESH_INTERVAL:
+            return
+        self._lexical_checked_at = now
+        if self._lexical_reload is not None and not self._lexical_reload.done():
+            return
+        generation = await self.generation.current()
+        if generation is None or generation == self._lexical_generation:
+            return
+        logger.info(f"Geração de '{self.collection_name}' mudou para {generation}; atualizando o índice lexical")
+        self._lexical_reload = asyncio.create_task(self._update_lexical_index(generation))
+    
+    async def _update_lexical_index(self, generation: int) -> None:
+        """
+        Aplica ao índice BM25 os pontos alterados desde a última atualização.
+
+        Os pontos vêm da lista publicada com cada geração pela ingestão (ver
+        CollectionGeneration.changes); se alguma geração não a publicou, o
+        índice é recarregado da coleção inteira.
+
+        Args:
+            generation: Geração atual da coleção
+        """
+        changed = None
+        if self._lexical_generation is not None:
+            changed = await self.generation.changes(self._lexical_generation, generation)
+        if changed is None:
+            await self.load_lexical_index()
+            return
+        try:
+            await self.lexical_index.update_from_collection(self.client, changed, self.collection_name)
+        except Exception as e:
+            logger.error(f"Erro ao atualizar o índice lexical de '{self.collection_name}': {str(e)}")
+            return
+        self._lexical_generation = generation
+    
+    async def _embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """
+        Gera os embeddings de várias consultas sem bloquear o event loop.
+        
+        Consultas já vistas são atendidas pelo cache de embeddings; as demais
+        são geradas em uma única chamada e armazenadas no cache.
+        
+        Args:
+            queries: Consultas em linguagem natural
+            
+        Returns:
+            Vetores de embedding, na mesma ordem das consultas
+        """
+        started = time.perf_counter()
+        embeddings = await self.embedding_cache.get_many(queries)
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            missing_queries = list(dict.fromkeys(queries[i] for i in missing))
+            generated = await self.embedding_generator.embed(missing_queries)
+            await self.embedding_cache.set_many(missing_queries, generated)
+            by_query = dict(zip(missing_queries, generated))
+            for i in missing:
+                embeddings[i] = by_query[queries[i]]
+        self.latency.record("embedding", (time.perf_counter() - started) * 1000)
+        return embeddings
+    
+    async def _embed_query(self, query: str) -> List[float]:
+        """
+        Gera o embedding de uma consulta (ver _embed_queries).
+        
+        Args:
+            query: Consulta em linguagem natural
+            
+        Returns:
+            Vetor de embedding da consulta
+        """
+        return (await self._embed_queries([query]))[0]
         
     async def search(
         self, 
         query: str, 
         limit: int = 5, 
         tipo_filtro: Optional[str] = None,
-        min_score: float = 0.7
+        min_score: float = 0.7,
+        fields: Optional[Sequence[str]] = None
     ) -> List[Dict[str, Any]]:
         """
         Realiza uma busca semântica na base de conhecimento.
         
+        Com a busca híbrida habilitada, combina a busca vetorial com a busca
+        lexical (ver _hybrid_search). Com o cache semântico habilitado, uma
+        consulta semelhante a outra recente (mesmos filtros) recebe a
+        resposta dela, sem nova busca.
+        
         Args:
             query: Consulta em linguagem natural
             limit: Número máximo de resultados
             tipo_filtro: Filtro opcional por tipo de documento
             min_score: Pontuação mínima de similaridade (0-1)
+            fields: Campos do payload a retornar (None para todos); os demais,
+                como o "conteudo" completo, nem são lidos do Qdrant
             
         Returns:
             Lista de documentos relevantes ordenados por similaridade
         """
+        started = time.perf_counter()
+        fields = normalize_fields(fields)
         try:
-            # Gera embedding para a consulta
-            query_embedding = self.embedding_generator.generate_embeddings([{"conteudo": query}])[0]
-            
-            # Prepara o filtro se especificado
-            filter_param = None
-            if tipo_filtro:
-                filter_param = models.Filter(
-                    must=[
-                        models.FieldCondition(
-                            key="tipo",
-                            match=models.MatchValue(value=tipo_filtro)
-                        )
-                    ]
-                )
+            # Respostas em cache para a geração atual da coleção
+            generation = None
+            if self.response_cache is not None:
+                cached, generation = await self.response_cache.lookup(query, limit, tipo_filtro, min_score, fields)
+                if cached is not None:
+                    logger.debug(f"Busca por '{query}' atendida pelo cache de respostas")
+                    return cached
             
-            # Realiza a busca no Qdrant
-            search_results = self.client.search(
-                collection_name=self.collection_name,
-                query_vector=query_embedding,
-                limit=limit,
-                query_filter=filter_param,
-                search_params=self.search_params,
-                with_payload=True,
-                with_vectors=False,
-                score_threshold=min_score
-            )
+            # Respostas de consultas semelhantes (paráfrases) com os mesmos filtros
+            query_embedding = None
+            semantic_filters = (limit, tipo_filtro, round(min_score, 4), fields)
+            if self.semantic_cache is not None:
+                semantic_generation = generation if generation is not None else await self.generation.current()
+                if semantic_generation is not None:
+                    query_embedding = await self._embed_query(query)
+                    cached = self.semantic_cache.lookup(query_embedding, semantic_filters, semantic_generation)
+                    if cached is not None:
+                        logger.debug(f"Busca por '{query}' atendida pelo cache semântico")
+                        return cached
+            
+            if self.lexical_index is not None:
+                results = await self._hybrid_search(query, limit, tipo_filtro, min_score, fields)
+            else:
+                results = await self._vector_search(query, limit, tipo_filtro, min_score, fields)
             
-            # Processa os resultados
-            results = []
-            for result in search_results:
-                doc = result.payload
-                doc["score"] = result.score
-                results.append(doc)
+            if generation is not None:
+                await self.response_cache.store(query, limit, tipo_filtro, min_score, generation, results, fields)
+            if query_embedding is not None and results:
+                self.semantic_cache.store(query_embedding, semantic_filters, semantic_generation, results)
             
             logger.info(f"Busca por '{query}' retornou {len(results)} resultados")
             return results
             
+        except asyncio.TimeoutError:
+            logger.error(f"Busca por '{query}' excedeu o timeout de {self.search_timeout}s")
+            return []
         except Exception as e:
             logger.error(f"Erro ao realizar busca: {str(e)}")
             return []
+        finally:
+            self.latency.record("search", (time.perf_counter() - started) * 1000)
+    
+    async def search_page(
+        self,
+        query: str,
+        limit: int = 5,
+        tipo_filtro: Optional[str] = None,
+        min_score: float = 0.7,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str], bool]:
+        """
+        Realiza uma busca semântica paginada por cursor.
+        
+        Cada página busca só os resultados até ela (os já servidos, mais a
+        página e um a mais para saber se há próxima), então a primeira página
+        custa o mesmo que search() com limit. O cursor guarda a fronteira
+        (pontuação e id do último resultado) e quantos resultados já foram
+        servidos; se a lista mudar entre as páginas e a fronteira cair fora
+        da busca, a página é refeita com a profundidade máxima.
+        
+        A paginação alcança no máximo SEARCH_PAGE_DEPTH resultados: se a
+        lista ranqueada atingir esse tamanho, a última página alcançável vem
+        sem cursor e com depth_limit_reached, indicando que pode haver mais
+        resultados (refine a consulta ou os filtros para alcançá-los).
+        
+        Args:
+            query: Consulta em linguagem natural
+            limit: Tamanho da página
+            tipo_filtro: Filtro opcional por tipo de documento
+            min_score: Pontuação mínima de similaridade (0-1)
+            cursor: Cursor retornado pela página anterior (None para a primeira)
+            fields: Campos do payload a retornar (None para todos)
+            
+        Returns:
+            Resultados da página, o cursor da próxima (None na última) e se a
+            paginação parou no limite SEARCH_PAGE_DEPTH, não no fim dos resultados
+            
+        Raises:
+            ValueError: Se o cursor for inválido ou de outra consulta
+        """
+        fingerprint = query_fingerprint("search", normalize_query(query), tipo_filtro, min_score)
+        boundary = decode_cursor(cursor, fingerprint) if cursor else {}
+        served = int(boundary.get("o", 0))
+        depth = min(served + limit + 1, settings.SEARCH_PAGE_DEPTH)
+        ranking = await self.search(query, limit=depth, tipo_filtro=tipo_filtro, min_score=min_score, fields=fields)
+        page, last = keyset_page(ranking, limit, boundary.get("s"), boundary.get("i"))
+        if not last and len(ranking) >= depth and depth < settings.SEARCH_PAGE_DEPTH:
+            # A lista mudou e a fronteira ficou além da busca: refaz com a profundidade máxima
+            ranking = await self.search(
+                query, limit=settings.SEARCH_PAGE_DEPTH, tipo_filtro=tipo_filtro, min_score=min_score, fields=fields
+            )
+            page, last = keyset_page(ranking, limit, boundary.get("s"), boundary.get("i"))
+        if last:
+            return page, encode_cursor(fingerprint, o=served + len(page), **last), False
+        return page, None, len(ranking) >= settings.SEARCH_PAGE_DEPTH
+    
+    async def browse(
+        self,
+        tipo_filtro: Optional[str] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Lista os documentos da base de conhecimento, opcionalmente por tipo.
+        
+        Usa o scroll do Qdrant, cujo cursor é o id do próximo ponto, então
+        cada página custa o mesmo que a primeira. No armazenamento local, o
+        cursor é a posição na lista de linhas do tipo.
+        
+        Args:
+            tipo_filtro: Filtro opcional por tipo de documento
+            limit: Tamanho da página
+            cursor: Cursor retornado pela página anterior (None para a primeira)
+            
+        Returns:
+            Documentos da página e o cursor da próxima (None na última)
+            
+        Raises:
+            ValueError: Se o cursor for inválido ou de outra listagem
+        """
+        fingerprint = query_fingerprint("browse", tipo_filtro)
+        boundary = decode_cursor(cursor, fingerprint) if cursor else {}
+        
+        if self.vector_backend == "local":
+            if self.local_store is None:
+                raise RuntimeError(f"Armazenamento vetorial local não encontrado em {settings.LOCAL_VECTOR_STORE_PATH}")
+            rows = self.local_store.type_rows.get(tipo_filtro, []) if tipo_filtro else range(len(self.local_store))
+            start = int(boundary.get("r", 0))
+            page = [self.local_store.payload(int(row)) for row in rows[start:start + limit]]
+            has_more = start + limit < len(rows)
+            return page, encode_cursor(fingerprint, r=start + limit) if has_more else None
+        
+        points, next_offset = await asyncio.wait_for(
+            self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=self._build_filter(tipo_filtro),
+                limit=limit,
+                offset=boundary.get("o"),
+                with_payload=True,
+                with_vectors=False
+            ),
+            timeout=self.search_timeout
+        )
+        page = []
+        for point in points:
+            doc = dict(point.payload or {})
+            doc.setdefault("id", str(point.id))
+            page.append(doc)
+        return page, encode_cursor(fingerprint, o=next_offset) if next_offset is not None else None
+    
+    async def search_diverse(
+        self,
+        query: str,
+        limit: int = 5,
+        tipo_filtro: Optional[str] = None,
+        min_score: float = 0.7,
+        diversity: float = 0.5,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Realiza uma busca semântica com resultados diversificados por MMR.
+        
+        Busca um conjunto maior de candidatos (limit * MMR_POOL_FACTOR), com
+        os vetores, e escolhe limit resultados que equilibram relevância e
+        diferença entre si (ver maximal_marginal_relevance), evitando trechos
+        quase idênticos do mesmo documento de origem.
+        
+        Args:
+            query: Consulta em linguagem natural
+            limit: Número máximo de resultados
+            tipo_filtro: Filtro opcional por tipo de documento
+            min_score: Pontuação mínima de similaridade (0-1)
+            diversity: Peso da diversidade (0-1)
+            fields: Campos do payload a retornar (None para todos)
+            
+        Returns:
+            Lista de documentos relevantes e diversos
+        """
+        try:
+            query_embedding = await self._embed_query(query)
+            candidates = (await self._search_batch(
+                [query_embedding], [limit * settings.MMR_POOL_FACTOR], [tipo_filtro], [min_score],
+                payload_fields=[normalize_fields(fields)], with_vectors=True
+            ))[0]
+            if not candidates:
+                return []
+            
+            started = time.perf_counter()
+            vectors = np.stack([candidate.pop("vector") for candidate in candidates])
+            selected = maximal_marginal_relevance(query_embedding, vectors, limit, diversity)
+            self.latency.record("mmr", (time.perf_counter() - started) * 1000)
+            
+            logger.info(f"Busca diversificada por '{query}' retornou {len(selected)} de {len(candidates)} candidatos")
+            return [candidates[i] for i in selected]
+            
+        except asyncio.TimeoutError:
+            logger.error(f"Busca por '{query}' excedeu o timeout de {self.search_timeout}s")
+            return []
+        except Exception as e:
+            logger.error(f"Erro ao realizar busca diversificada: {str(e)}")
+            return []
+    
+    async def _vector_search(
+        self,
+        query: str,
+        limit: int,
+        tipo_filtro: Optional[str],
+        min_score: float,
+        fields: Optional[Tuple[str, ...]] = None
+    ) -> List[Dict[str, Any]]:
+        """Executa a busca vetorial de uma consulta (ver search)."""
+        if self.batcher is not None:
+            # Agrupa com buscas concorrentes em um único lote
+            return await self.batcher.submit(query, limit, tipo_filtro, min_score, fields)
+        
+        # Gera embedding para a consulta
+        query_embedding = await self._embed_query(query)
+        
+        # Realiza a busca no backend vetorial
+        return (await self._search_batch(
+            [query_embedding], [limit], [tipo_filtro], [min_score], payload_fields=[fields]
+        ))[0]
+    
+    async def _hybrid_search(
+        self,
+        query: str,
+        limit: int,
+        tipo_filtro: Optional[str],
+        min_score: float,
+        fields: Optional[Tuple[str, ...]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Combina a busca vetorial e a busca lexical (BM25) por reciprocal rank fusion.
+        
+        As duas buscas rodam concorrentemente, então a latência é a da mais
+        lenta, e não a soma. A pontuação mínima vale apenas para a busca
+        vetorial: documentos encontrados só pela busca lexical (siglas, nomes
+        de testes, números de CRP) entram com "score" 0 e "lexical_score".
+        Se a busca vetorial falhar, retorna apenas os resultados lexicais.
+        
+        Args:
+            query: Consulta em linguagem natural
+            limit: Número máximo de resultados
+            tipo_filtro: Filtro opcional por tipo de documento
+            min_score: Pontuação mínima de similaridade da busca vetorial
+            fields: Campos do payload a retornar (None para todos)
+            
+        Returns:
+            Documentos ordenados pela pontuação combinada ("fusion_score")
+        """
+        await self._refresh_lexical_index()
+        candidates = max(limit, settings.HYBRID_CANDIDATES)
+        vector_results, lexical_results = await asyncio.gather(
+            self._vector_search(query, candidates, tipo_filtro, min_score, fields),
+            asyncio.to_thread(self.lexical_index.search, query, candidates, tipo_filtro),
+            return_exceptions=True
+        )
+        if isinstance(lexical_results, BaseException):
+            logger.error(f"Erro na busca lexical: {str(lexical_results)}")
+            lexical_results = []
+        if isinstance(vector_results, BaseException):
+            if not lexical_results:
+                raise vector_results
+            logger.warning(f"Busca vetorial falhou ({type(vector_results).__name__}); usando apenas a busca lexical")
+            vector_results = []
+        
+        fused = reciprocal_rank_fusion([vector_results, lexical_results], k=settings.RRF_K)[:limit]
+        fused = await self._fetch_lexical_payloads(fused, fields)
+        for result in fused:
+            result.pop("point_id", None)
+            result.setdefault("score", 0.0)
+        return [project_payload(result, fields) for result in fused]
+    
+    async def _fetch_lexical_payloads(
+        self,
+        results: List[Dict[str, Any]],
+        fields: Optional[Tuple[str, ...]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Lê do Qdrant os payloads dos resultados encontrados só pela busca lexical.
+        
+        O índice BM25 não guarda os payloads; os resultados que também vieram
+        da busca vetorial já os têm. Pontos que não existem mais na coleção são
+        descartados. Se a leitura falhar, os resultados seguem só com o id.
+        
+        Args:
+            results: Resultados combinados, já limitados
+            fields: Campos do payload a ler (None para todos)
+            
+        Returns:
+            Resultados com os payloads, na mesma ordem
+        """
+        missing = [result for result in results if "score" not in result and "point_id" in result]
+        if not missing:
+            return results
+        try:
+            points = await asyncio.wait_for(
+                self.client.retrieve(
+                    collection_name=self.collection_name,
+                    ids=[result["point_id"] for result in missing],
+                    with_payload=list(fields) if fields is not None else True,
+                    with_vectors=False
+                ),
+                timeout=self.search_timeout
+            )
+        except Exception as e:
+            logger.error(f"Erro ao ler os payloads dos resultados lexicais: {str(e)}")
+            return results
+        payloads = {str(point.id): point.payload or {} for point in points}
+        completed = []
+        for result in results:
+            if "score" not in result and "point_id" in result:
+                payload = payloads.get(str(result["point_id"]))
+                if payload is None:
+                    continue
+                result = {**payload, **result}
+            completed.append(result)
+        return completed
+    
+    async def _search_batch(
+        self,
+        embeddings: List[List[float]],
+        limits: List[int],
+        tipo_filtros: List[Optional[str]],
+        min_scores: List[float],
+        payload_fields: Optional[List[Optional[Tuple[str, ...]]]] = None,
+        with_vectors: bool = False
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Executa várias buscas vetoriais em uma única requisição ao backend.
+        
+        Usa o Qdrant ou o armazenamento vetorial local, conforme VECTOR_BACKEND.
+        Se o Qdrant falhar e houver um armazenamento local disponível, a busca
+        é refeita localmente em vez de retornar vazio.
+        
+        Args:
+            embeddings: Vetores das consultas
+            limits: Número máximo de resultados de cada consulta
+            tipo_filtros: Filtro opcional por tipo de cada consulta
+            min_scores: Pontuação mínima de cada consulta
+            payload_fields: Campos do payload de cada consulta (None para todos)
+            with_vectors: Inclui o vetor de cada resultado em "vector" (array NumPy)
+            
+        Returns:
+            Lista de resultados de cada consulta, na mesma ordem
+        """
+        payload_fields = payload_fields or [None] * len(embeddings)
+        args = (embeddings, limits, tipo_filtros, min_scores, payload_fields, with_vectors)
+        started = time.perf_counter()
+        try:
+            if self.vector_backend == "local":
+                return await self._search_local(*args)
+            
+            try:
+                return await self._search_qdrant(*args)
+            except Exception as e:
+                if self.local_store is None:
+                    raise
+                logger.warning(f"Qdrant indisponível ({type(e).__name__}: {str(e)}); usando o armazenamento local")
+                return await self._search_local(*args)
+        finally:
+            self.latency.record("vector_search", (time.perf_counter() - started) * 1000)
+    
+    async def _search_qdrant(
+        self,
+        embeddings: List[List[float]],
+        limits: List[int],
+        tipo_filtros: List[Optional[str]],
+        min_scores: List[float],
+        payload_fields: List[Optional[Tuple[str, ...]]],
+        with_vectors: bool = False
+    ) -> List[List[Dict[str, Any]]]:
+        """Executa um lote de buscas no Qdrant com query_batch_points (ver _search_batch)."""
+        counts = await self.type_counts() if any(tipo_filtros) else {}
+        vector_name = self.full_vector_name
+        with_vector = ([vector_name] if vector_name else True) if with_vectors else False
+        if self.reducer is not None:
+            requests = self._two_stage_requests(
+                embeddings, limits, tipo_filtros, min_scores, counts, payload_fields, with_vector
+            )
+        else:
+            requests = [
+                models.QueryRequest(
+                    query=embedding,
+                    using=vector_name,
+                    limit=limit,
+                    filter=self._build_filter(tipo_filtro),
+                    params=self._plan_search_params(tipo_filtro, counts),
+                    with_payload=list(fields) if fields is not None else True,
+                    with_vector=with_vector,
+                    score_threshold=min_score
+                )
+                for embedding, limit, tipo_filtro, min_score, fields in zip(
+                    embeddings, limits, tipo_filtros, min_scores, payload_fields
+                )
+            ]
+        responses = await asyncio.wait_for(
+            self.client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=requests,
+                timeout=max(1, int(self.search_timeout))
+            ),
+            timeout=self.search_timeout
+        )
+        results = [[self._to_result(point) for point in response.points] for response in responses]
+        if with_vectors:
+            for response, result_list in zip(responses, results):
+                for point, result in zip(response.points, result_list):
+                    vector = point.vector[vector_name] if vector_name else point.vector
+                    result["vector"] = np.asarray(vector, dtype=np.float32)
+        return results
+    
+    def _two_stage_requests(
+        self,
+        embeddings: List[List[float]],
+        limits: List[int],
+        tipo_filtros: List[Optional[str]],
+        min_scores: List[float],
+        counts: Dict[str, int],
+        payload_fields: List[Optional[Tuple[str, ...]]],
+        with_vector: Any = False
+    ) -> List[models.QueryRequest]:
+        """
+        Monta as requisições da busca em dois estágios.
+        
+        O primeiro estágio (prefetch) recupera TWO_STAGE_CANDIDATES candidatos
+        pelo vetor compacto, com o filtro e o planejamento de _plan_search_params;
+        o segundo reordena apenas esses candidatos pelo vetor completo, de modo
+        que as pontuações retornadas são as do embedding original.
+        """
+        compact_embeddings = self.reducer.transform(embeddings).tolist()
+        return [
+            models.QueryRequest(
+                prefetch=models.Prefetch(
+                    query=compact_embedding,
+                    using=settings.COMPACT_VECTOR_NAME,
+                    limit=max(limit, settings.TWO_STAGE_CANDIDATES),
+                    filter=self._build_filter(tipo_filtro),
+                    params=self._plan_search_params(tipo_filtro, counts)
+                ),
+                query=embedding,
+                using=settings.FULL_VECTOR_NAME,
+                limit=limit,
+                with_payload=list(fields) if fields is not None else True,
+                with_vector=with_vector,
+                score_threshold=min_score
+            )
+            for embedding, compact_embedding, limit, tipo_filtro, min_score, fields in zip(
+                embeddings, compact_embeddings, limits, tipo_filtros, min_scores, payload_fields
+            )
+        ]
+    
+    async def _search_local(
+        self,
+        embeddings: List[List[float]],
+        limits: List[int],
+        tipo_filtros: List[Optional[str]],
+        min_scores: List[float],
+        payload_fields: List[Optional[Tuple[str, ...]]],
+        with_vectors: bool = False
+    ) -> List[List[Dict[str, Any]]]:
+        """Executa um lote de buscas no armazenamento local, fora do event loop (ver _search_batch)."""
+        if self.local_store is None:
+            raise RuntimeError(f"Armazenamento vetorial local não encontrado em {settings.LOCAL_VECTOR_STORE_PATH}")
+        result_lists = await asyncio.to_thread(
+            self.local_store.search, embeddings, limits, tipo_filtros, min_scores, with_vectors
+        )
+        return [
+            [project_payload(result, fields) for result in results]
+            for results, fields in zip(result_lists, payload_fields)
+        ]
+    
+    def _plan_search_params(self, tipo_filtro: Optional[str], counts: Dict[str, int]) -> models.SearchParams:
+        """
+        Escolhe a estratégia de busca conforme a seletividade do filtro.
+        
+        Filtros muito seletivos (poucos documentos do tipo) usam busca exata,
+        que percorre só os pontos do filtro pelo índice de payload e é mais
+        rápida e precisa que o HNSW nesse caso. Filtros amplos usam HNSW com
+        ef maior, para compensar os candidatos descartados pelo filtro.
+        
+        Args:
+            tipo_filtro: Filtro por tipo de documento, se houver
+            counts: Número de documentos por tipo (ver type_counts)
+            
+        Returns:
+            Parâmetros de busca do Qdrant
+        """
+        if not tipo_filtro or not counts:
+            return self.search_params
+        
+        matches = counts.get(tipo_filtro, 0)
+        if matches <= settings.SEARCH_EXACT_MAX_POINTS:
+            return self.search_params.model_copy(update={"exact": True})
+        return self.search_params.model_copy(update={
+            "hnsw_ef": max(self.search_params.hnsw_ef or 0, settings.SEARCH_FILTERED_HNSW_EF)
+        })
     
-    def search_by_type(
+    async def type_counts(self) -> Dict[str, int]:
+        """
+        Retorna o número de documentos de cada tipo na coleção.
+        
+        As contagens vêm do facet do Qdrant sobre o índice de payload de "tipo"
+        (ou do armazenamento local) e ficam em cache por SEARCH_TYPE_COUNTS_TTL
+        segundos, sendo recalculadas quando a geração da coleção muda.
+        
+        Returns:
+            Dicionário tipo -> quantidade, vazio se a contagem falhar
+        """
+        cache_key = self.generation.local
+        counts = self._type_counts_cache.get(cache_key)
+        if counts is not None:
+            return counts
+        
+        try:
+            if self.vector_backend == "local" and self.local_store is not None:
+                counts = {tipo: len(rows) for tipo, rows in self.local_store.type_rows.items()}
+            else:
+                response = await asyncio.wait_for(
+                    self.client.facet(
+                        collection_name=self.collection_name,
+                        key="tipo",
+                        limit=settings.SEARCH_MAX_TYPES,
+                        exact=True
+                    ),
+                    timeout=self.search_timeout
+                )
+                counts = {str(hit.value): hit.count for hit in response.hits}
+        except Exception as e:
+            logger.error(f"Erro ao contar documentos por tipo: {str(e)}")
+            return {}
+        
+        self._type_counts_cache.set(cache_key, counts)
+        return counts
+    
+    @staticmethod
+    def _build_filter(tipo_filtro: Optional[str]) -> Optional[models.Filter]:
+        """
+        Monta o filtro do Qdrant para o tipo de documento.
+        
+        Args:
+            tipo_filtro: Tipo de documento, ou None para não filtrar
+            
+        Returns:
+            Filtro do Qdrant ou None
+        """
+        if not tipo_filtro:
+            return None
+        return models.Filter(
+            must=[
+                models.FieldCondition(
+                    key="tipo",
+                    match=models.MatchValue(value=tipo_filtro)
+                )
+            ]
+        )
+    
+    @staticmethod
+    def _to_result(point: models.ScoredPoint) -> Dict[str, Any]:
+        """Converte um ponto retornado pelo Qdrant em um resultado de busca."""
+        doc = dict(point.payload or {})
+        doc.setdefault("id", str(point.id))
+        doc["score"] = point.score
+        return doc
+    
+    async def search_by_type(
         self, 
         query: str, 
         tipo: str, 
@@ -112,86 +1009,179 @@ class SearchEngine:
         Returns:
             Lista de documentos relevantes do tipo especificado
         """
-        return self.search(query, limit, tipo_filtro=tipo)
+        return await self.search(query, limit, tipo_filtro=tipo)
     
-    def search_multi_query(
+    async def search_multi_query(
         self, 
         queries: List[str], 
-        limit_per_query: int = 3
+        limit_per_query: int = 3,
+        min_score: float = 0.7
     ) -> List[Dict[str, Any]]:
         """
         Realiza múltiplas consultas e combina os resultados.
         Útil para consultas complexas que podem ser divididas.
         
+        Os embeddings de todas as consultas são gerados em um único lote e
+        as buscas são enviadas ao Qdrant em uma única requisição. Os resultados
+        são combinados por reciprocal rank fusion (RRF).
+        
         Args:
             queries: Lista de consultas relacionadas
             limit_per_query: Número máximo de resultados por consulta
+            min_score: Pontuação mínima de similaridade (0-1)
             
         Returns:
             Lista combinada de documentos relevantes sem duplicatas
         """
-        all_results = []
-        seen_ids = set()
+        if not queries:
+            return []
+        
+        try:
+            embeddings = await self._embed_queries(queries)
+            result_lists = await self._search_batch(
+                embeddings,
+                limits=[limit_per_query] * len(queries),
+                tipo_filtros=[None] * len(queries),
+                min_scores=[min_score] * len(queries)
+            )
+        except asyncio.TimeoutError:
+            logger.error(f"Busca múltipla excedeu o timeout de {self.search_timeout}s")
+            return []
+        except Exception as e:
+            logger.error(f"Erro ao realizar busca múltipla: {str(e)}")
+            return []
+        
+        results = reciprocal_rank_fusion(result_lists, k=settings.RRF_K)
+        logger.info(f"Busca múltipla com {len(queries)} consultas retornou {len(results)} resultados")
+        return results
+    
+    async def search_multi_query_stream(
+        self,
+        queries: List[str],
+        limit_per_query: int = 3,
+        min_score: float = 0.7
+    ) -> AsyncIterator[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        Realiza múltiplas consultas, entregando os resultados de cada uma assim que termina.
+        
+        As consultas rodam concorrentemente (e são agrupadas pelo micro-batching,
+        se habilitado); a ordem de entrega é a de conclusão, não a de entrada.
         
-        for query in queries:
-            results = self.search(query, limit=limit_per_query)
+        Args:
+            queries: Lista de consultas relacionadas
+            limit_per_query: Número máximo de resultados por consulta
+            min_score: Pontuação mínima de similaridade (0-1)
             
-            for result in results:
-                # Evita adicionar documentos duplicados
-                doc_id = result.get("id", result.get("uuid", None))
-                if doc_id and doc_id not in seen_ids:
-                    seen_ids.add(doc_id)
-                    all_results.append(result)
+        Yields:
+            Pares (índice da consulta, resultados da consulta)
+        """
+        async def run(index: int, query: str) -> Tuple[int, List[Dict[str, Any]]]:
+            return index, await self.search(query, limit=limit_per_query, min_score=min_score)
         
-        # Ordena os resultados por pontuação
-        all_results.sort(key=lambda x: x.get("score", 0), reverse=True)
+        tasks = [asyncio.create_task(run(index, query)) for index, query in enumerate(queries)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # O cliente pode desconectar no meio do streaming
+            for task in tasks:
+                task.cancel()
+    
+    def rerank_candidates(self, limit: int) -> int:
+        """
+        Número de resultados a buscar na primeira etapa para entregar limit após o reranking.
         
-        return all_results
+        Args:
+            limit: Número de resultados desejado
+            
+        Returns:
+            limit, ou RERANK_TOP_N se o reranking estiver habilitado e for maior
+        """
+        return max(limit, self.rerank_top_n) if self.reranker is not None else limit
     
-    def rerank_results(
+    async def rerank_results(
         self, 
         query: str, 
         results: List[Dict[str, Any]]
     ) -> List[Dict[str, Any]]:
         """
-        Reordena os resultados aplicando um modelo de reranking.
-        Esta é uma implementação simplificada que pode ser expandida.
+        Reordena os resultados aplicando o reranker configurado.
+        
+        Apenas os RERANK_TOP_N primeiros resultados são reordenados; os demais
+        seguem na ordem original. O reranking roda fora do event loop e tem
+        um orçamento de tempo (RERANK_BUDGET_MS): se for excedido ou se o
+        reranker falhar, a ordem da primeira etapa é mantida.
         
         Args:
             query: Consulta original
             results: Lista de resultados para reordenar
             
         Returns:
-            Lista de resultados reordenados
+            Lista de resultados reordenados, com "rerank_score" nos reordenados
         """
-        # Implementação futura: integrar um modelo de reranking mais sofisticado
-        return results
+        if self.reranker is None or len(results) < 2:
+            return results
+        
+        head, tail = results[:self.rerank_top_n], results[self.rerank_top_n:]
+        started = time.perf_counter()
+        try:
+            scores = await asyncio.wait_for(
+                asyncio.to_thread(self.reranker.score, query, head, started + self.rerank_budget),
+                timeout=self.rerank_budget
+            )
+        except asyncio.TimeoutError:
+            self._rerank_fallbacks += 1
+            logger.warning(f"Reranking de '{query}' excedeu {self.rerank_budget * 1000:.0f}ms; mantendo a ordem original")
+            return results
+        except Exception as e:
+            logger.error(f"Erro no reranking: {str(e)}")
+            return results
+        finally:
+            self.latency.record("rerank", (time.perf_counter() - started) * 1000)
+        
+        order = np.argsort(-scores, kind="stable")
+        return [dict(head[i], rerank_score=float(scores[i])) for i in order] + tail
     
-    def log_search(self, query: str, results: List[Dict[str, Any]], user_id: Optional[str] = None) -> None:
+    def log_search(
+        self,
+        query: str,
+        results: List[Dict[str, Any]],
+        user_id: Optional[str] = None,
+        latency_ms: Optional[float] = None,
+        tipo_filtro: Optional[str] = None
+    ) -> None:
         """
         Registra uma busca para análise e melhoria do sistema.
         
+        O registro só é enfileirado (ver SearchLogSink) e gravado em segundo
+        plano, sem atrasar a resposta.
+        
         Args:
             query: Consulta realizada
             results: Resultados retornados
             user_id: Identificador opcional do usuário
+            latency_ms: Duração da busca em milissegundos
+            tipo_filtro: Filtro por tipo usado na busca
         """
         try:
             log_entry = {
                 "id": str(uuid.uuid4()),
                 "timestamp": datetime.now().isoformat(),
                 "query": query,
+                "normalized_query": normalize_query(query),
+                "tipo": tipo_filtro,
                 "num_results": len(results),
                 "user_id": user_id or "anonymous",
-                "top_result_id": results[0].get("id") if results else None,
-                "top_result_score": results[0].get("score") if results else None
+                "top_result_id": str(results[0].get("id")) if results and results[0].get("id") is not None else None,
+                "top_result_score": results[0].get("score") if results else None,
+                "latency_ms": latency_ms
             }
             
-            # Aqui você pode implementar o armazenamento do log
-            # Por exemplo, salvar em um arquivo ou banco de dados
-            
-            logger.debug(f"Busca registrada: {json.dumps(log_entry)}")
+            if self.search_log is not None:
+                self.search_log.submit(log_entry)
+            else:
+                logger.debug(f"Busca registrada: {json.dumps(log_entry)}")
             
         except Exception as e:
             logger.error(f"Erro ao registrar busca: {str(e)}")
-            # Não propaga a exceção para não interferir na experiência do usuário 
\ No newline at end of file
+            # Não propaga a exceção para não interferir na experiência do usuário 
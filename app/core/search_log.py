@@ -0,0 +1,285 @@
+"""
+Registro de buscas do PsiCollab.
+As buscas são enfileiradas em memória (fila limitada, sem bloquear a
+requisição) e gravadas em lotes por uma tarefa em segundo plano em um
+banco SQLite só de inserção, consultado pelos endpoints de análise.
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import asyncio
+import logging
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.core.config import settings
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+# Colunas da tabela de buscas, na ordem de inserção
+COLUMNS = (
+    "id", "timestamp", "query", "normalized_query", "tipo", "num_results",
+    "user_id", "top_result_id", "top_result_score", "latency_ms"
+)
+
+# Marcador enfileirado por close() para encerrar a tarefa de gravação
+_STOP = object()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_log (
+    id TEXT PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    query TEXT NOT NULL,
+    normalized_query TEXT NOT NULL,
+    tipo TEXT,
+    num_results INTEGER NOT NULL,
+    user_id TEXT,
+    top_result_id TEXT,
+    top_result_score REAL,
+    latency_ms REAL
+);
+CREATE INDEX IF NOT EXISTS idx_search_log_timestamp ON search_log (timestamp);
+"""
+
+class SearchLogSink:
+    """
+    Fila de registros de busca com gravação em lotes em segundo plano.
+    Quando a fila está cheia, o registro é descartado e contado, para que
+    o registro nunca atrase a resposta da busca.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        maxsize: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None
+    ):
+        """
+        Inicializa o registro.
+
+        Args:
+            path: Arquivo SQLite (padrão: settings.SEARCH_LOG_PATH)
+            maxsize: Tamanho máximo da fila em memória
+            batch_size: Registros gravados por transação
+            flush_interval: Espera máxima (segundos) antes de gravar um lote incompleto
+        """
+        self.path = Path(path or settings.SEARCH_LOG_PATH)
+        self.maxsize = maxsize or settings.SEARCH_LOG_QUEUE_SIZE
+        self.batch_size = batch_size or settings.SEARCH_LOG_BATCH_SIZE
+        self.flush_interval = flush_interval if flush_interval is not None else settings.SEARCH_LOG_FLUSH_INTERVAL
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._initialized = False
+
+        # Métricas
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.write_errors = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """Abre uma conexão com o banco, criando a tabela na primeira vez."""
+        if not self._initialized:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=5.0)
+        if not self._initialized:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            self._initialized = True
+        return connection
+
+    def submit(self, entry: Dict[str, Any]) -> bool:
+        """
+        Enfileira um registro sem bloquear.
+
+        Deve ser chamado de dentro do event loop; a tarefa de gravação é
+        iniciada no primeiro registro.
+
+        Args:
+            entry: Registro da busca (ver COLUMNS)
+
+        Returns:
+            True se o registro foi enfileirado, False se foi descartado
+        """
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.maxsize)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._writer())
+        try:
+            self._queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self.enqueued += 1
+        return True
+
+    async def _writer(self) -> None:
+        """
+        Tarefa em segundo plano que grava os registros em lotes.
+        Termina ao receber _STOP, depois de gravar o lote em formação.
+        """
+        stopping = False
+        while not stopping:
+            entry = await self._queue.get()
+            if entry is _STOP:
+                return
+            batch = [entry]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                if entry is _STOP:
+                    stopping = True
+                    break
+                batch.append(entry)
+            await self._write(batch)
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> None:
+        """Grava um lote fora do event loop; erros são contados, não propagados."""
+        try:
+            await asyncio.to_thread(self._write_batch, batch)
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            self.write_errors += 1
+            logger.error(f"Erro ao gravar {len(batch)} registros de busca: {str(e)}")
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        """Insere um lote de registros em uma única transação."""
+        connection = self._connect()
+        try:
+            with connection:
+                connection.executemany(
+                    f"INSERT OR IGNORE INTO search_log ({', '.join(COLUMNS)}) "
+                    f"VALUES ({', '.join('?' for _ in COLUMNS)})",
+                    [tuple(entry.get(column) for column in COLUMNS) for entry in batch]
+                )
+        finally:
+            connection.close()
+
+    async def close(self) -> None:
+        """
+        Grava os registros ainda na fila e encerra a tarefa de gravação.
+
+        A tarefa recebe _STOP no fim da fila e termina depois de gravar
+        tudo o que já havia sido enfileirado, inclusive o lote em formação.
+        """
+        if self._task is not None:
+            if not self._task.done():
+                await self._queue.put(_STOP)
+            try:
+                await self._task
+            except Exception as e:
+                logger.error(f"Erro na tarefa de gravação do registro de buscas: {str(e)}")
+            self._task = None
+        if self._queue is not None and not self._queue.empty():
+            pending = []
+            while not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+            await self._write(pending)
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna os contadores da fila e da gravação."""
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "written": self.written,
+            "batches": self.batches,
+            "write_errors": self.write_errors
+        }
+
+    def _query(self, sql: str, params: tuple) -> List[tuple]:
+        """Executa uma consulta de leitura no banco."""
+        connection = self._connect()
+        try:
+            return connection.execute(sql, params).fetchall()
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _since(hours: float) -> str:
+        """Início da janela de análise, no formato dos registros."""
+        return (datetime.now() - timedelta(hours=hours)).isoformat()
+
+    async def top_queries(self, limit: int = 20, hours: float = 24.0) -> List[Dict[str, Any]]:
+        """
+        Consultas mais frequentes na janela.
+
+        Args:
+            limit: Número de consultas
+            hours: Tamanho da janela (horas)
+
+        Returns:
+            Consultas normalizadas com contagem, média de resultados e latência média
+        """
+        rows = await asyncio.to_thread(
+            self._query,
+            "SELECT normalized_query, COUNT(*), AVG(num_results), AVG(latency_ms) FROM search_log "
+            "WHERE timestamp >= ? GROUP BY normalized_query ORDER BY COUNT(*) DESC LIMIT ?",
+            (self._since(hours), limit)
+        )
+        return [
+            {"query": query, "count": count, "avg_results": avg_results, "avg_latency_ms": avg_latency}
+            for query, count, avg_results, avg_latency in rows
+        ]
+
+    async def zero_result_queries(self, limit: int = 20, hours: float = 24.0) -> List[Dict[str, Any]]:
+        """
+        Consultas sem resultados mais frequentes na janela.
+
+        Args:
+            limit: Número de consultas
+            hours: Tamanho da janela (horas)
+
+        Returns:
+            Consultas normalizadas com contagem e última ocorrência
+        """
+        rows = await asyncio.to_thread(
+            self._query,
+            "SELECT normalized_query, COUNT(*), MAX(timestamp) FROM search_log "
+            "WHERE timestamp >= ? AND num_results = 0 GROUP BY normalized_query "
+            "ORDER BY COUNT(*) DESC LIMIT ?",
+            (self._since(hours), limit)
+        )
+        return [{"query": query, "count": count, "last_seen": last_seen} for query, count, last_seen in rows]
+
+    async def latency_percentiles(self, hours: float = 24.0) -> Dict[str, Any]:
+        """
+        Percentis de latência das buscas na janela.
+
+        Args:
+            hours: Tamanho da janela (horas)
+
+        Returns:
+            Número de buscas e latências p50/p90/p95/p99 (ms)
+        """
+        rows = await asyncio.to_thread(
+            self._query,
+            "SELECT latency_ms FROM search_log WHERE timestamp >= ? AND latency_ms IS NOT NULL",
+            (self._since(hours),)
+        )
+        if not rows:
+            return {"searches": 0}
+        latencies = np.array([row[0] for row in rows], dtype=np.float64)
+        return {
+            "searches": len(latencies),
+            **{
+                f"p{percentile}_ms": round(float(np.percentile(latencies, percentile)), 3)
+                for percentile in (50, 90, 95, 99)
+            }
+        }
+
+def create_search_log() -> Optional[SearchLogSink]:
+    """Cria o registro de buscas conforme as configurações (None se desabilitado)."""
+    return SearchLogSink() if settings.SEARCH_LOG_ENABLED else None
@@ -0,0 +1,213 @@
+"""
+Cache semântico de respostas de busca do PsiCollab.
+Reaproveita a resposta de uma consulta anterior quando a nova consulta é
+uma paráfrase dela ("avaliação de TDAH em crianças" e "TDAH infantil
+avaliação"): os embeddings das consultas recentes ficam em uma matriz em
+memória e uma consulta é atendida pela vizinha mais próxima se a
+similaridade de cosseno passar do limiar e os filtros forem os mesmos.
+"""
+from typing import Any, Dict, Hashable, List, Optional, Sequence
+import logging
+import time
+
+import numpy as np
+
+from app.core.config import settings
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+class SemanticCache:
+    """
+    Cache de respostas indexado pelo embedding da consulta.
+    As entradas guardam a geração da coleção em que foram calculadas e só
+    são servidas na mesma geração; quando o cache está cheio, a entrada
+    usada há mais tempo é substituída.
+    """
+
+    def __init__(
+        self,
+        dim: Optional[int] = None,
+        threshold: Optional[float] = None,
+        maxsize: Optional[int] = None,
+        ttl: Optional[float] = None
+    ):
+        """
+        Inicializa o cache.
+
+        Args:
+            dim: Dimensão dos embeddings (padrão: settings.VECTOR_SIZE)
+            threshold: Similaridade de cosseno mínima para reaproveitar uma resposta
+            maxsize: Número máximo de consultas em cache
+            ttl: Tempo de vida das entradas (segundos)
+        """
+        self.dim = dim or settings.VECTOR_SIZE
+        self.threshold = threshold if threshold is not None else settings.SEMANTIC_CACHE_THRESHOLD
+        self.maxsize = maxsize or settings.SEMANTIC_CACHE_SIZE
+        self.ttl = ttl if ttl is not None else settings.SEMANTIC_CACHE_TTL
+        self._vectors = np.zeros((self.maxsize, self.dim), dtype=np.float32)
+        self._filters = np.full(self.maxsize, -1, dtype=np.int64)
+        self._generations = np.full(self.maxsize, -1, dtype=np.int64)
+        self._created = np.zeros(self.maxsize, dtype=np.float64)
+        self._used = np.zeros(self.maxsize, dtype=np.float64)
+        self._results: List[Optional[List[Dict[str, Any]]]] = [None] * self.maxsize
+        # Códigos dos filtros em uso e número de entradas de cada um; o código
+        # sai do mapa com a última entrada, então o mapa nunca passa de maxsize
+        self._filter_codes: Dict[Hashable, int] = {}
+        self._code_filters: Dict[int, Hashable] = {}
+        self._code_entries: Dict[int, int] = {}
+        self._next_code = 0
+        self._size = 0
+
+        # Métricas
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.expired = 0
+        self._hit_similarity = 0.0
+        self._hit_age = 0.0
+        self._max_hit_age = 0.0
+
+    def _normalize(self, embedding: Sequence[float]) -> Optional[np.ndarray]:
+        """Converte o embedding em vetor unitário (None se inválido)."""
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if vector.shape != (self.dim,) or norm == 0:
+            return None
+        return vector / norm
+
+    def lookup(
+        self,
+        embedding: Sequence[float],
+        filters: Hashable,
+        generation: int
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Procura a resposta de uma consulta semelhante com os mesmos filtros.
+
+        Args:
+            embedding: Embedding da consulta
+            filters: Parâmetros da busca que precisam coincidir (limite, tipo...)
+            generation: Geração atual da coleção
+
+        Returns:
+            Resultados da consulta mais próxima, ou None se nenhuma passar do limiar
+        """
+        vector = self._normalize(embedding)
+        code = self._filter_codes.get(filters)
+        if vector is None or code is None or self._size == 0:
+            self.misses += 1
+            return None
+
+        now = time.monotonic()
+        similarities = self._vectors[:self._size] @ vector
+        candidates = (self._filters[:self._size] == code) & (similarities >= self.threshold)
+        if not candidates.any():
+            self.misses += 1
+            return None
+
+        # Só entradas da geração atual e dentro do TTL são servidas; as
+        # demais candidatas são descartadas, para não esconderem uma entrada
+        # válida um pouco menos similar
+        stale = candidates & (self._generations[:self._size] != generation)
+        expired = candidates & ~stale & (now - self._created[:self._size] > self.ttl)
+        for slot in np.flatnonzero(stale | expired):
+            self._evict(int(slot))
+        self.stale += int(stale.sum())
+        self.expired += int(expired.sum())
+        candidates &= ~(stale | expired)
+        if not candidates.any():
+            self.misses += 1
+            return None
+
+        best = int(np.flatnonzero(candidates)[np.argmax(similarities[candidates])])
+        age = now - self._created[best]
+        self.hits += 1
+        self._used[best] = now
+        self._hit_similarity += float(similarities[best])
+        self._hit_age += age
+        self._max_hit_age = max(self._max_hit_age, age)
+        return [dict(result) for result in self._results[best]]
+
+    def store(
+        self,
+        embedding: Sequence[float],
+        filters: Hashable,
+        generation: int,
+        results: List[Dict[str, Any]]
+    ) -> None:
+        """
+        Armazena a resposta de uma consulta.
+
+        Args:
+            embedding: Embedding da consulta
+            filters: Parâmetros da busca que precisam coincidir (ver lookup)
+            generation: Geração obtida antes de calcular os resultados
+            results: Resultados da busca
+        """
+        vector = self._normalize(embedding)
+        if vector is None:
+            return
+        if self._size < self.maxsize:
+            slot = self._size
+            self._size += 1
+        else:
+            slot = int(np.argmin(self._used))
+            self._release(slot)
+        code = self._filter_codes.get(filters)
+        if code is None:
+            code = self._next_code
+            self._next_code += 1
+            self._filter_codes[filters] = code
+            self._code_filters[code] = filters
+        self._code_entries[code] = self._code_entries.get(code, 0) + 1
+        now = time.monotonic()
+        self._vectors[slot] = vector
+        self._filters[slot] = code
+        self._generations[slot] = generation
+        self._created[slot] = now
+        self._used[slot] = now
+        self._results[slot] = [dict(result) for result in results]
+
+    def _release(self, slot: int) -> None:
+        """Desvincula a entrada do código dos seus filtros, removendo o código sem entradas."""
+        code = int(self._filters[slot])
+        if code < 0:
+            return
+        self._filters[slot] = -1
+        self._code_entries[code] -= 1
+        if not self._code_entries[code]:
+            del self._code_entries[code]
+            del self._filter_codes[self._code_filters.pop(code)]
+
+    def _evict(self, slot: int) -> None:
+        """Invalida uma entrada, deixando-a como primeira candidata à substituição."""
+        self._release(slot)
+        self._used[slot] = 0.0
+        self._results[slot] = None
+
+    def clear(self) -> None:
+        """Remove todas as entradas."""
+        self._filters[:] = -1
+        self._used[:] = 0.0
+        self._results = [None] * self.maxsize
+        self._filter_codes.clear()
+        self._code_filters.clear()
+        self._code_entries.clear()
+        self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna os contadores de acerto e de obsolescência do cache."""
+        total = self.hits + self.misses
+        return {
+            "size": int((self._filters[:self._size] >= 0).sum()),
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "expired": self.expired,
+            "hit_rate": self.hits / total if total else 0.0,
+            "avg_hit_similarity": self._hit_similarity / self.hits if self.hits else None,
+            "avg_hit_age_s": self._hit_age / self.hits if self.hits else None,
+            "max_hit_age_s": self._max_hit_age if self.hits else None
+        }
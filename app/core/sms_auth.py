@@ -12,6 +12,8 @@ from twilio.base.exceptions import TwilioRestException
 from fastapi import HTTPException
 import redis
 
+from app.core.metrics import track_external
+
 # Configuração de logging mais detalhada
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -92,10 +94,11 @@ async def send_verification_code(phone_number: str) -> bool:
         client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
         logger.debug("Cliente Twilio inicializado com sucesso")
         
-        verification = client.verify \
-            .v2.services(TWILIO_VERIFY_SID) \
-            .verifications \
-            .create(to=phone_number, channel="sms")
+        with track_external("twilio", "send_verification"):
+            verification = client.verify \
+                .v2.services(TWILIO_VERIFY_SID) \
+                .verifications \
+                .create(to=phone_number, channel="sms")
             
         logger.info(f"Código enviado com sucesso para {phone_number}. Status: {verification.status}")
         return True
@@ -125,7 +128,8 @@ async def verify_code(phone_number: str, code: str) -> bool:
         # Tenta conectar ao Redis primeiro
         try:
             logger.debug("Testando conexão com Redis...")
-            redis_client.ping()
+            with track_external("redis", "ping"):
+                redis_client.ping()
             logger.info("Conexão com Redis estabelecida com sucesso")
         except redis.ConnectionError as e:
             logger.error(f"Erro ao conectar com Redis: {str(e)}")
@@ -134,17 +138,19 @@ async def verify_code(phone_number: str, code: str) -> bool:
         client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
         logger.debug("Cliente Twilio inicializado para verificação")
         
-        verification_check = client.verify \
-            .v2.services(TWILIO_VERIFY_SID) \
-            .verification_checks \
-            .create(to=phone_number, code=code)
+        with track_external("twilio", "verification_check"):
+            verification_check = client.verify \
+                .v2.services(TWILIO_VERIFY_SID) \
+                .verification_checks \
+                .create(to=phone_number, code=code)
             
         is_valid = verification_check.status == "approved"
         if is_valid:
             # Armazena o número verificado no cache
             try:
                 cache_key = f"verified_phone_{phone_number}"
-                redis_client.setex(cache_key, CACHE_EXPIRATION, "1")
+                with track_external("redis", "setex"):
+                    redis_client.setex(cache_key, CACHE_EXPIRATION, "1")
                 logger.info(f"Número {phone_number} armazenado no cache por {CACHE_EXPIRATION} segundos")
             except redis.RedisError as e:
                 logger.error(f"Erro ao armazenar no cache: {str(e)}")
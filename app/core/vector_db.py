@@ -0,0 +1,55 @@
+"""
+Criação dos clientes do banco vetorial (Qdrant) do PsiCollab.
+Centraliza a configuração do pool de conexões, keep-alive e timeouts
+para que todos os componentes compartilhem os mesmos parâmetros.
+"""
+import logging
+
+import httpx
+from qdrant_client import AsyncQdrantClient, QdrantClient
+
+from app.core.config import settings
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+def _connection_limits() -> httpx.Limits:
+    """Limites do pool HTTP usados pelos clientes do Qdrant."""
+    return httpx.Limits(
+        max_connections=settings.QDRANT_POOL_SIZE,
+        max_keepalive_connections=settings.QDRANT_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.QDRANT_KEEPALIVE_EXPIRY
+    )
+
+def create_async_client() -> AsyncQdrantClient:
+    """
+    Cria um cliente assíncrono do Qdrant com pool de conexões.
+
+    O cliente deve ser criado uma única vez por processo (ver o lifespan
+    em app/main.py) e reutilizado por todas as requisições.
+
+    Returns:
+        Cliente assíncrono configurado
+    """
+    logger.info(
+        f"Conectando ao Qdrant em {settings.VECTOR_DB_URL} "
+        f"(pool={settings.QDRANT_POOL_SIZE}, keepalive={settings.QDRANT_KEEPALIVE_CONNECTIONS})"
+    )
+    return AsyncQdrantClient(
+        url=settings.VECTOR_DB_URL,
+        timeout=settings.QDRANT_TIMEOUT,
+        limits=_connection_limits()
+    )
+
+def create_client() -> QdrantClient:
+    """
+    Cria um cliente síncrono do Qdrant para scripts e tarefas administrativas.
+
+    Returns:
+        Cliente síncrono configurado
+    """
+    return QdrantClient(
+        url=settings.VECTOR_DB_URL,
+        timeout=settings.QDRANT_TIMEOUT,
+        limits=_connection_limits()
+    )
@@ -2,22 +2,51 @@
 Aplicativo principal do PsiCollab
 """
 import logging
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 import os
 
 from app.routers import system_router, auth_router, protected_router
+from app.api.endpoints import router as endpoints_router
+from app.core.config import settings
+from app.core.search_engine import SearchEngine
+from app.core.metrics import (
+    HTTP_REQUEST_ERRORS, HTTP_REQUEST_SECONDS, HTTP_REQUESTS_IN_PROGRESS, REGISTRY, SearchEngineCollector
+)
 
 # Configuração do logger
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Ciclo de vida da aplicação.
+    Cria um único motor de busca (com pool de conexões do Qdrant) por processo
+    e libera as conexões no encerramento.
+    """
+    app.state.search_engine = SearchEngine()
+    await app.state.search_engine.load_lexical_index()
+    collector = SearchEngineCollector(app.state.search_engine)
+    REGISTRY.register(collector)
+    logger.info("Motor de busca inicializado")
+    try:
+        yield
+    finally:
+        REGISTRY.unregister(collector)
+        await app.state.search_engine.close()
+        logger.info("Motor de busca encerrado")
+
 # Inicialização do app
 app = FastAPI(
     title="PsiCollab API",
     description="API para o sistema PsiCollab de assistência na elaboração de laudos psicológicos",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # Configuração do CORS
@@ -73,7 +102,40 @@ async def add_cors_headers(request, call_next):
 
 app.mount("/static", StaticFiles(directory=static_dir), name="static")
 
+if settings.METRICS_ENABLED:
+    @app.middleware("http")
+    async def record_request_metrics(request: Request, call_next):
+        """
+        Mede a duração e conta as requisições em andamento e com erro.
+        
+        A rota é o caminho com parâmetros ("/api/documents/{id}"), para que
+        o número de séries não cresça com os valores dos parâmetros. Em
+        respostas em streaming, a duração vai até o envio dos cabeçalhos.
+        """
+        method = request.method
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        started = time.perf_counter()
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            return response
+        finally:
+            in_progress.dec()
+            route = request.scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.labels(method, route_path, status_code).observe(time.perf_counter() - started)
+            if status_code >= 500:
+                HTTP_REQUEST_ERRORS.labels(method, route_path).inc()
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Exporta as métricas da aplicação no formato texto do Prometheus."""
+        return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
+
 # Incluindo routers
 app.include_router(system_router)
 app.include_router(auth_router)
-app.include_router(protected_router) 
\ No newline at end of file
+app.include_router(protected_router)
+app.include_router(endpoints_router, prefix=settings.API_PREFIX)
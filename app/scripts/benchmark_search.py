@@ -0,0 +1,91 @@
+"""
+Script de benchmark offline da busca (recall@k x latência).
+
+Gera corpora sintéticos (e, opcionalmente, reaproveita um armazenamento
+vetorial local exportado da produção), carrega cada um no modo local do
+Qdrant (ou em um servidor, com --qdrant-url) e mede SearchEngine.search
+com e sem filtro por tipo, variando hnsw_ef, busca exata e quantização.
+
+Cada linha do relatório (JSON Lines) traz QPS, p50/p95/p99 e recall@k
+contra a busca exata. Com --baseline, o script compara o resultado com um
+relatório anterior e termina com código 1 se houver regressão.
+
+Exemplos:
+    python app/scripts/benchmark_search.py --sizes 1000,10000 --output bench.jsonl
+    python app/scripts/benchmark_search.py --replay data/vector_store/knowledge_base --baseline bench.jsonl
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from pathlib import Path
+
+# Adiciona o diretório raiz do projeto ao sys.path
+root_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(root_dir))
+
+from app.core.benchmark import compare_reports, replayed_corpus, run_benchmark, search_configs, synthetic_corpus
+from app.core.collection_manager import QUANTIZATION_MODES
+from app.core.config import settings
+
+# Configuração do logger
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main():
+    """
+    Função principal do script.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark offline da busca (recall@k x latência)")
+    parser.add_argument("--sizes", default="1000,10000", help="Tamanhos dos corpora")
+    parser.add_argument("--dim", type=int, default=settings.VECTOR_SIZE, help="Dimensão dos vetores sintéticos")
+    parser.add_argument("--replay", action="append", default=[],
+                        help="Armazenamento vetorial local usado como corpus (pode repetir)")
+    parser.add_argument("--no-synthetic", action="store_true", help="Usa apenas os corpora de --replay")
+    parser.add_argument("--queries", type=int, default=100, help="Consultas por medição")
+    parser.add_argument("--k", type=int, default=10, help="Resultados avaliados por consulta")
+    parser.add_argument("--ef", default="32,64,128,256", help="Valores de hnsw_ef")
+    parser.add_argument("--quantization", default="none", help="Modos de quantização (ex.: none,scalar,binary)")
+    parser.add_argument("--concurrency", type=int, default=1, help="Consultas simultâneas")
+    parser.add_argument("--qdrant-url", help="Servidor do Qdrant (padrão: modo local)")
+    parser.add_argument("--qdrant-path", help="Diretório do modo local (padrão: temporário)")
+    parser.add_argument("--output", help="Arquivo JSON Lines do relatório (padrão: saída padrão)")
+    parser.add_argument("--baseline", help="Relatório anterior para detectar regressões")
+    parser.add_argument("--max-recall-drop", type=float, default=0.01, help="Queda máxima tolerada do recall")
+    parser.add_argument("--max-latency-ratio", type=float, default=1.2, help="Aumento máximo tolerado do p95")
+    args = parser.parse_args()
+
+    sizes = [int(value) for value in args.sizes.split(",")]
+    quantizations = args.quantization.split(",")
+    for mode in quantizations:
+        if mode not in QUANTIZATION_MODES:
+            parser.error(f"Modo de quantização inválido: {mode}")
+
+    corpora = [] if args.no_synthetic else [synthetic_corpus(size, args.dim) for size in sizes]
+    for path in args.replay:
+        corpora += [replayed_corpus(Path(path), size) for size in sizes]
+    configs = search_configs([int(value) for value in args.ef.split(",")], quantizations)
+
+    report = asyncio.run(run_benchmark(
+        corpora, configs, query_count=args.queries, k=args.k, concurrency=args.concurrency,
+        qdrant_url=args.qdrant_url, qdrant_path=args.qdrant_path
+    ))
+    lines = "".join(json.dumps(row) + "\n" for row in report)
+    if args.output:
+        Path(args.output).write_text(lines, encoding="utf-8")
+        logger.info(f"Relatório salvo em {args.output} ({len(report)} linhas)")
+    else:
+        sys.stdout.write(lines)
+
+    if args.baseline:
+        baseline = [json.loads(line) for line in Path(args.baseline).read_text(encoding="utf-8").splitlines() if line]
+        regressions = compare_reports(baseline, report, args.max_recall_drop, args.max_latency_ratio)
+        for regression in regressions:
+            logger.error(f"Regressão: {json.dumps(regression)}")
+        if regressions:
+            sys.exit(1)
+        logger.info("Nenhuma regressão em relação ao relatório anterior")
+
+if __name__ == "__main__":
+    main()
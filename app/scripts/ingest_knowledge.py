@@ -0,0 +1,148 @@
+"""
+Script de ingestão em lote da base de conhecimento.
+
+Lê documentos de arquivos JSON (array de objetos) ou JSONL (um objeto por
+linha) em streaming, divide em trechos, gera os embeddings em lotes e grava
+na coleção do Qdrant, informando documentos/s e trechos/s ao final.
+
+Com o manifesto de ingestão (INGEST_MANIFEST_ENABLED), só os trechos novos
+ou alterados geram embeddings e os trechos removidos são apagados; --dry-run
+apenas informa essa diferença e --prune apaga os documentos ausentes dos
+arquivos informados. Com o ponto de controle (INGEST_CHECKPOINT_ENABLED),
+--resume continua uma ingestão interrompida de onde ela parou e refaz os
+lotes que falharam.
+
+A ingestão invalida o cache de respostas da API pela geração da coleção no
+Redis (SEARCH_CACHE_SHARED_GENERATION). Se o Redis não estiver disponível,
+limpa o cache pela API (SEARCH_CACHE_PURGE_URL, com o token de um
+administrador em SEARCH_CACHE_PURGE_TOKEN); sem ela, a API pode servir
+respostas antigas por até SEARCH_CACHE_TTL segundos.
+
+Cada documento deve ter "conteudo" (ou "content"/"text") e, opcionalmente,
+"id", "tipo" e "metadata".
+
+Exemplo:
+    python app/scripts/ingest_knowledge.py data/knowledge/*.jsonl --create
+    python app/scripts/ingest_knowledge.py data/knowledge/*.jsonl --prune --dry-run
+    python app/scripts/ingest_knowledge.py data/knowledge/*.jsonl --resume
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from pathlib import Path
+
+import httpx
+
+# Adiciona o diretório raiz do projeto ao sys.path
+root_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(root_dir))
+
+from app.core.collection_manager import create_knowledge_base
+from app.core.config import settings
+from app.core.knowledge import KnowledgeManager
+from app.core.vector_db import create_client
+
+# Configuração do logger
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+async def purge_api_cache() -> bool:
+    """
+    Limpa o cache de respostas da API, quando a geração não é compartilhada.
+
+    Returns:
+        True se o cache foi limpo
+    """
+    if not settings.SEARCH_CACHE_PURGE_URL:
+        logger.warning(
+            "Geração da coleção não compartilhada e SEARCH_CACHE_PURGE_URL não configurada; "
+            f"a API pode servir respostas antigas por até {settings.SEARCH_CACHE_TTL}s"
+        )
+        return False
+    try:
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            response = await client.delete(
+                settings.SEARCH_CACHE_PURGE_URL,
+                headers={"Authorization": f"Bearer {settings.SEARCH_CACHE_PURGE_TOKEN or ''}"}
+            )
+            response.raise_for_status()
+        logger.info("Cache de respostas da API limpo")
+        return True
+    except httpx.HTTPError as e:
+        logger.error(f"Erro ao limpar o cache de respostas da API: {str(e)}")
+        return False
+
+async def ingest(args: argparse.Namespace) -> dict:
+    """Executa a ingestão dos arquivos com os parâmetros da linha de comando."""
+    knowledge_manager = KnowledgeManager(collection_name=args.collection)
+    generation = knowledge_manager.generation.local
+    try:
+        stats = await knowledge_manager.ingest_files(
+            [Path(path) for path in args.paths],
+            resume=args.resume,
+            batch_size=args.batch_size,
+            embed_concurrency=args.embed_concurrency,
+            upsert_concurrency=args.upsert_concurrency,
+            queue_size=args.queue_size,
+            dry_run=args.dry_run,
+            prune=args.prune
+        )
+        if knowledge_manager.generation.local != generation and not knowledge_manager.generation.shared:
+            stats["api_cache_purged"] = await purge_api_cache()
+        return stats
+    finally:
+        if knowledge_manager.client is not None:
+            await knowledge_manager.client.close()
+        if knowledge_manager.embedding_generator is not None:
+            await knowledge_manager.embedding_generator.close()
+
+def main():
+    """
+    Função principal do script.
+    """
+    parser = argparse.ArgumentParser(description="Ingestão em lote da base de conhecimento")
+    parser.add_argument("paths", nargs="+", help="Arquivos JSON/JSONL de documentos")
+    parser.add_argument("--collection", default=settings.COLLECTION_NAME, help="Nome da coleção")
+    parser.add_argument("--create", action="store_true", help="Cria a coleção se ainda não existir")
+    parser.add_argument("--batch-size", type=int, default=settings.EMBEDDING_BATCH_SIZE,
+                        help="Trechos por requisição de embeddings")
+    parser.add_argument("--embed-concurrency", type=int, default=settings.INGEST_EMBED_CONCURRENCY,
+                        help="Requisições de embeddings simultâneas")
+    parser.add_argument("--upsert-concurrency", type=int, default=settings.INGEST_UPSERT_CONCURRENCY,
+                        help="Gravações simultâneas no Qdrant")
+    parser.add_argument("--queue-size", type=int, default=settings.INGEST_QUEUE_SIZE,
+                        help="Lotes aguardando entre as etapas")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Apenas compara com o manifesto e informa a diferença")
+    parser.add_argument("--prune", action="store_true",
+                        help="Apaga os documentos do manifesto ausentes dos arquivos informados")
+    parser.add_argument("--resume", action="store_true",
+                        help="Retoma a última ingestão destes arquivos e refaz os lotes que falharam")
+    args = parser.parse_args()
+    if args.resume and not settings.INGEST_CHECKPOINT_ENABLED:
+        parser.error("--resume exige INGEST_CHECKPOINT_ENABLED")
+    if args.resume and args.prune:
+        parser.error("--resume não pode ser combinado com --prune")
+    if (args.dry_run or args.prune) and not settings.INGEST_MANIFEST_ENABLED:
+        parser.error("--dry-run e --prune exigem INGEST_MANIFEST_ENABLED")
+
+    if args.create:
+        client = create_client()
+        try:
+            create_knowledge_base(client, args.collection)
+        finally:
+            client.close()
+
+    try:
+        stats = asyncio.run(ingest(args))
+    except Exception as e:
+        logger.error(f"Erro na ingestão: {str(e)}")
+        sys.exit(1)
+    print(json.dumps(stats))
+    if stats["failed_batches"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Script para gerenciar o armazenamento vetorial local.
+
+Comandos:
+    export     Exporta uma coleção do Qdrant para o armazenamento local
+    benchmark  Compara a latência do armazenamento local com a do Qdrant
+               em corpora sintéticos de tamanhos variados
+"""
+import argparse
+import json
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+# Adiciona o diretório raiz do projeto ao sys.path
+root_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(root_dir))
+
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from app.core.config import settings
+from app.core.local_vector_store import LocalVectorStore, LocalVectorStoreWriter
+from app.core.vector_db import create_client
+
+# Configuração do logger
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Tipos de documento usados nos corpora sintéticos
+TIPOS = [
+    "adulto", "adolescente", "infantil", "gerontologico",
+    "personalidade", "inteligencia", "comportamento",
+    "projetivo", "objetivo", "neuropsicologico"
+]
+
+def export_collection(collection_name: str, path: Path, dtype: str, batch_size: int = 1000,
+                      client: Optional[QdrantClient] = None) -> int:
+    """
+    Exporta os vetores e payloads de uma coleção do Qdrant.
+
+    Em coleções com vetores nomeados (busca em dois estágios), exporta o
+    vetor completo (settings.FULL_VECTOR_NAME).
+
+    Args:
+        collection_name: Nome da coleção
+        path: Diretório de destino
+        dtype: Tipo numérico da matriz ("float32" ou "float16")
+        batch_size: Pontos lidos por requisição de scroll
+        client: Cliente do Qdrant (criado a partir das configurações se omitido)
+
+    Returns:
+        Número de pontos exportados
+    """
+    owns_client = client is None
+    client = client or create_client()
+    try:
+        count = client.count(collection_name, exact=True).count
+        vectors_config = client.get_collection(collection_name).config.params.vectors
+        vector_name = None
+        if isinstance(vectors_config, dict):
+            vector_name = settings.FULL_VECTOR_NAME
+            if vector_name not in vectors_config:
+                raise ValueError(f"Coleção '{collection_name}' não tem o vetor nomeado '{vector_name}'")
+            vectors_config = vectors_config[vector_name]
+        dim = vectors_config.size
+        logger.info(f"Exportando {count} pontos ({dim} dimensões) de '{collection_name}' para {path}")
+
+        writer = LocalVectorStoreWriter(path, count=count, dim=dim, dtype=dtype)
+        written = 0
+        offset = None
+        while True:
+            points, offset = client.scroll(
+                collection_name=collection_name,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=[vector_name] if vector_name else True
+            )
+            # A contagem é lida antes da exportação: escritas concorrentes a invalidam
+            if written + len(points) > count:
+                raise ValueError(
+                    f"Coleção '{collection_name}' mudou durante a exportação "
+                    f"(mais de {count} pontos); exporte novamente"
+                )
+            if points:
+                writer.add([point.id for point in points],
+                           [point.vector[vector_name] if vector_name else point.vector for point in points],
+                           [point.payload or {} for point in points])
+                written += len(points)
+            if offset is None:
+                break
+        if written != count:
+            raise ValueError(
+                f"Coleção '{collection_name}' mudou durante a exportação "
+                f"({written} pontos lidos, {count} esperados); exporte novamente"
+            )
+        writer.close()
+        return count
+    finally:
+        if owns_client:
+            client.close()
+
+def _latencies(run, queries: np.ndarray, tipos: list) -> dict:
+    """Mede a latência de cada consulta e resume em percentis (ms)."""
+    latencies = []
+    for query, tipo in zip(queries, tipos):
+        started = time.perf_counter()
+        run(query, tipo)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies = np.array(latencies)
+    return {
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        "qps": round(1000 / float(latencies.mean()), 1)
+    }
+
+def benchmark(sizes: list, dim: int, num_queries: int, limit: int, dtype: str, qdrant: bool) -> None:
+    """
+    Compara o armazenamento local com o Qdrant em corpora sintéticos.
+
+    Imprime uma linha JSON por tamanho de corpus e modo de filtro.
+
+    Args:
+        sizes: Tamanhos de corpus a testar
+        dim: Dimensão dos vetores
+        num_queries: Consultas por medição
+        limit: Resultados por consulta
+        dtype: Tipo numérico do armazenamento local
+        qdrant: Se deve medir também o servidor Qdrant configurado
+    """
+    rng = np.random.default_rng(42)
+    client = create_client() if qdrant else None
+    collection_name = "benchmark_local_vector_store"
+
+    for size in sizes:
+        vectors = rng.standard_normal((size, dim), dtype=np.float32)
+        payloads = [{"id": str(i), "tipo": TIPOS[i % len(TIPOS)]} for i in range(size)]
+        queries = rng.standard_normal((num_queries, dim), dtype=np.float32)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = LocalVectorStore.build(Path(tmp_dir), list(range(size)), vectors, payloads, dtype=dtype)
+
+            if client is not None:
+                client.recreate_collection(
+                    collection_name=collection_name,
+                    vectors_config=models.VectorParams(size=dim, distance=models.Distance.COSINE)
+                )
+                client.upload_collection(collection_name, vectors=vectors, payload=payloads,
+                                         ids=list(range(size)), batch_size=512)
+
+            for tipo_mode in ("sem_filtro", "com_filtro"):
+                tipos = [TIPOS[i % len(TIPOS)] if tipo_mode == "com_filtro" else None for i in range(num_queries)]
+                report = {"size": size, "dim": dim, "filtro": tipo_mode, "dtype": dtype}
+                report["local"] = _latencies(
+                    lambda query, tipo: store.search([query], [limit], [tipo], [-1.0]), queries, tipos
+                )
+                if client is not None:
+                    report["qdrant"] = _latencies(
+                        lambda query, tipo: client.query_points(
+                            collection_name=collection_name,
+                            query=query.tolist(),
+                            limit=limit,
+                            query_filter=models.Filter(must=[models.FieldCondition(
+                                key="tipo", match=models.MatchValue(value=tipo)
+                            )]) if tipo else None
+                        ),
+                        queries, tipos
+                    )
+                print(json.dumps(report))
+            store.close()
+
+    if client is not None:
+        client.delete_collection(collection_name)
+        client.close()
+
+def main():
+    """
+    Função principal do script.
+    """
+    parser = argparse.ArgumentParser(description="Gerencia o armazenamento vetorial local")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Exporta uma coleção do Qdrant")
+    export_parser.add_argument("--collection", default=settings.COLLECTION_NAME, help="Coleção a exportar")
+    export_parser.add_argument("--path", default=settings.LOCAL_VECTOR_STORE_PATH, help="Diretório base de destino")
+    export_parser.add_argument("--dtype", default=settings.LOCAL_VECTOR_STORE_DTYPE, choices=["float32", "float16"])
+
+    bench_parser = subparsers.add_parser("benchmark", help="Compara o armazenamento local com o Qdrant")
+    bench_parser.add_argument("--sizes", default="10000,100000,300000", help="Tamanhos de corpus separados por vírgula")
+    bench_parser.add_argument("--dim", type=int, default=settings.VECTOR_SIZE, help="Dimensão dos vetores")
+    bench_parser.add_argument("--queries", type=int, default=100, help="Consultas por medição")
+    bench_parser.add_argument("--limit", type=int, default=10, help="Resultados por consulta")
+    bench_parser.add_argument("--dtype", default=settings.LOCAL_VECTOR_STORE_DTYPE, choices=["float32", "float16"])
+    bench_parser.add_argument("--qdrant", action="store_true", help="Mede também o servidor Qdrant configurado")
+
+    args = parser.parse_args()
+    if args.command == "export":
+        count = export_collection(args.collection, Path(args.path) / args.collection, args.dtype)
+        logger.info(f"{count} pontos exportados com sucesso.")
+    else:
+        sizes = [int(size) for size in args.sizes.split(",")]
+        benchmark(sizes, args.dim, args.queries, args.limit, args.dtype, args.qdrant)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Script para administrar a coleção da base de conhecimento no Qdrant.
+
+Comandos:
+    create    Cria a coleção, com a quantização configurada
+    quantize  Altera a quantização de uma coleção existente
+    report    Mede recall@k e latência da busca quantizada contra a busca exata
+    index     Cria os índices de payload dos campos usados em filtros
+    inspect   Mostra o estado dos segmentos e índices da coleção
+    optimize  Constrói o índice HNSW, funde segmentos pequenos, aguarda o
+              otimizador e compara a latência antes e depois
+    fit-projection    Ajusta a projeção PCA dos vetores compactos sobre a coleção
+    two-stage         Copia a coleção para uma nova, com vetores completo e compacto
+    two-stage-report  Mede memória economizada e recall@k da busca em dois estágios
+"""
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+# Adiciona o diretório raiz do projeto ao sys.path
+root_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(root_dir))
+
+from app.core.collection_manager import (
+    QUANTIZATION_MODES,
+    create_knowledge_base,
+    create_payload_indexes,
+    estimate_two_stage_memory,
+    estimate_vector_memory,
+    fit_projection,
+    inspect_collection,
+    measure_search_latency,
+    migrate_quantization,
+    migrate_to_two_stage,
+    optimize_collection,
+    quantization_report,
+    two_stage_report,
+    wait_for_optimizer
+)
+from app.core.config import settings
+from app.core.projection import load_reducer
+from app.core.vector_db import create_client
+
+# Configuração do logger
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main():
+    """
+    Função principal do script.
+    """
+    parser = argparse.ArgumentParser(description="Administra a coleção da base de conhecimento")
+    parser.add_argument("--collection", default=settings.COLLECTION_NAME, help="Nome da coleção")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    create_parser = subparsers.add_parser("create", help="Cria a coleção")
+    create_parser.add_argument("--quantization", default=settings.QDRANT_QUANTIZATION,
+                               choices=list(QUANTIZATION_MODES))
+
+    quantize_parser = subparsers.add_parser("quantize", help="Altera a quantização da coleção")
+    quantize_parser.add_argument("mode", choices=list(QUANTIZATION_MODES))
+
+    report_parser = subparsers.add_parser("report", help="Relatório de recall/latência da quantização")
+    report_parser.add_argument("--sample", type=int, default=100, help="Número de consultas")
+    report_parser.add_argument("--k", type=int, default=10, help="Resultados avaliados por consulta")
+    report_parser.add_argument("--oversampling", default="1,2,4", help="Fatores de oversampling")
+
+    subparsers.add_parser("index", help="Cria os índices de payload")
+    subparsers.add_parser("inspect", help="Estado dos segmentos e índices")
+
+    optimize_parser = subparsers.add_parser("optimize", help="Constrói o índice HNSW e funde segmentos")
+    optimize_parser.add_argument("--m", type=int, default=settings.QDRANT_HNSW_M, help="Arestas por nó do HNSW")
+    optimize_parser.add_argument("--ef-construct", type=int, default=settings.QDRANT_HNSW_EF_CONSTRUCT,
+                                 help="Candidatos avaliados na construção do HNSW")
+    optimize_parser.add_argument("--segments", type=int, default=settings.QDRANT_SEGMENT_NUMBER,
+                                 help="Número alvo de segmentos")
+    optimize_parser.add_argument("--timeout", type=float, default=600.0,
+                                 help="Tempo máximo de espera pelo otimizador (segundos)")
+    optimize_parser.add_argument("--sample", type=int, default=100, help="Consultas na medição de latência")
+
+    fit_parser = subparsers.add_parser("fit-projection", help="Ajusta a projeção dos vetores compactos")
+    fit_parser.add_argument("--sample", type=int, default=10000, help="Vetores usados no ajuste")
+    fit_parser.add_argument("--dim", type=int, default=settings.COMPACT_VECTOR_SIZE, help="Dimensão compacta")
+    fit_parser.add_argument("--output", default=settings.COMPACT_PROJECTION_PATH, help="Arquivo da projeção")
+
+    two_stage_parser = subparsers.add_parser("two-stage", help="Migra para vetores completo e compacto")
+    two_stage_parser.add_argument("target", help="Nome da nova coleção")
+    two_stage_parser.add_argument("--batch-size", type=int, default=256, help="Pontos copiados por lote")
+
+    two_stage_report_parser = subparsers.add_parser("two-stage-report", help="Relatório da busca em dois estágios")
+    two_stage_report_parser.add_argument("--sample", type=int, default=100, help="Número de consultas")
+    two_stage_report_parser.add_argument("--k", type=int, default=10, help="Resultados avaliados por consulta")
+    two_stage_report_parser.add_argument("--candidates", default="50,100,200",
+                                         help="Candidatos do primeiro estágio")
+
+    args = parser.parse_args()
+    client = create_client()
+
+    try:
+        if args.command == "create":
+            create_knowledge_base(client, args.collection, quantization=args.quantization)
+        elif args.command == "quantize":
+            migrate_quantization(client, args.collection, args.mode)
+        elif args.command == "report":
+            info = client.get_collection(args.collection)
+            count = client.count(args.collection, exact=True).count
+            dim = info.config.params.vectors.size
+            quantization = info.config.quantization_config
+            mode = "none" if quantization is None else (
+                "scalar" if hasattr(quantization, "scalar") else "binary"
+            )
+            print(json.dumps(estimate_vector_memory(count, dim, mode)))
+            oversamplings = [float(value) for value in args.oversampling.split(",")]
+            for row in quantization_report(client, args.collection, args.sample, args.k, oversamplings):
+                print(json.dumps(row))
+        elif args.command == "index":
+            created = create_payload_indexes(client, args.collection)
+            logger.info(f"Índices criados: {', '.join(created) or 'nenhum (já existiam)'}")
+        elif args.command == "inspect":
+            print(json.dumps(inspect_collection(client, args.collection), indent=2))
+        elif args.command == "optimize":
+            before = {
+                "state": inspect_collection(client, args.collection),
+                "latency": measure_search_latency(client, args.collection, args.sample)
+            }
+            optimize_collection(client, args.collection, m=args.m, ef_construct=args.ef_construct,
+                                segment_number=args.segments)
+            logger.info("Aguardando o otimizador do Qdrant...")
+            after = {
+                "state": wait_for_optimizer(client, args.collection, timeout=args.timeout),
+                "latency": measure_search_latency(client, args.collection, args.sample)
+            }
+            print(json.dumps({"before": before, "after": after}, indent=2))
+        elif args.command == "fit-projection":
+            reducer = fit_projection(client, args.collection, sample_size=args.sample, dim=args.dim)
+            reducer.save(Path(args.output))
+            logger.info(f"Projeção salva em {args.output}")
+        elif args.command == "two-stage":
+            reducer = load_reducer()
+            if reducer is None:
+                sys.exit(1)
+            copied = migrate_to_two_stage(client, args.collection, args.target, reducer, args.batch_size)
+            logger.info(
+                f"{copied} pontos copiados; defina COLLECTION_NAME={args.target} e TWO_STAGE_SEARCH=true"
+            )
+        elif args.command == "two-stage-report":
+            reducer = load_reducer()
+            if reducer is None:
+                sys.exit(1)
+            info = client.get_collection(args.collection)
+            count = client.count(args.collection, exact=True).count
+            full_dim = info.config.params.vectors[settings.FULL_VECTOR_NAME].size
+            print(json.dumps(estimate_two_stage_memory(count, full_dim, reducer.dim)))
+            candidates = [int(value) for value in args.candidates.split(",")]
+            for row in two_stage_report(client, args.collection, reducer, args.sample, args.k, candidates):
+                print(json.dumps(row))
+    except Exception as e:
+        logger.error(f"Erro ao executar '{args.command}': {str(e)}")
+        sys.exit(1)
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    main()
@@ -50,3 +50,19 @@ async def test_protected_route_with_invalid_header(client):  # client é agora A
         headers={"Authorization": "InvalidFormat token123"}
     )
     assert response.status_code in [401, 403]
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_admin_dependency_requires_superuser():
+    """Apenas usuários cadastrados com is_superuser passam pela dependência de administrador"""
+    from fastapi import HTTPException
+    from app.core.auth import get_current_admin
+    from app.models.user import User
+
+    admin = User(email="admin@psicollab.com", is_active=True, is_superuser=True)
+    assert await get_current_admin(admin, db=None) is admin
+    for principal in (User(email="psi@psicollab.com", is_active=True, is_superuser=False),
+                      {"type": "phone", "phone_number": "+5511999999999"}):
+        with pytest.raises(HTTPException) as error:
+            await get_current_admin(principal, db=None)
+        assert error.value.status_code == 403
@@ -0,0 +1,57 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.core.benchmark import (
+    compare_reports, exact_top_k, make_queries, replayed_corpus, run_benchmark, search_configs, synthetic_corpus
+)
+from app.core.local_vector_store import LocalVectorStore
+
+@pytest.mark.unit
+def test_benchmark_reports_recall_and_latency(tmp_path):
+    """O benchmark mede cada filtro e configuração contra a busca exata"""
+    corpus = synthetic_corpus(200, dim=16, clusters=8)
+    report = asyncio.run(run_benchmark(
+        [corpus], search_configs(ef_values=(16,)), query_count=10, k=5, qdrant_path=str(tmp_path / "qdrant")
+    ))
+    assert len(report) == 6
+    assert {row["filter"].split(":")[0] for row in report} == {"none", "common", "rare"}
+    for row in report:
+        assert row["backend"] == "local"
+        assert row["recall@5"] == 1.0
+        assert row["qps"] > 0 and row["p50_ms"] <= row["p99_ms"]
+
+    # Uma queda de recall ou aumento de latência além da tolerância é apontado
+    worse = [dict(row, **{"recall@5": 0.8, "p95_ms": row["p95_ms"] * 2}) for row in report[:1]]
+    assert {regression["metric"] for regression in compare_reports(report, worse)} == {"recall@5", "p95_ms"}
+    assert compare_reports(report, report) == []
+
+@pytest.mark.unit
+def test_replayed_corpus_grows_from_local_store(tmp_path):
+    """O corpus reaproveitado preserva tipos e cresce com cópias perturbadas"""
+    vectors = np.eye(4, dtype=np.float32)
+    LocalVectorStore.build(tmp_path / "store", ids=range(4), vectors=vectors,
+                           payloads=[{"tipo": "adulto" if i % 2 else "infantil"} for i in range(4)]).close()
+    corpus = replayed_corpus(tmp_path / "store", size=8)
+    assert len(corpus) == 8
+    assert list(corpus.tipos[:4]) == ["infantil", "adulto", "infantil", "adulto"]
+    queries = make_queries(corpus, 3)
+    assert exact_top_k(corpus, queries, 2, tipo="adulto")[0][0] in {f"doc-{row}" for row in (1, 3, 5, 7)}
+
+@pytest.mark.unit
+def test_benchmark_engine_has_only_vector_search(monkeypatch):
+    """O motor do benchmark não agrupa, não reordena e não usa caches nem Redis, mesmo com as camadas habilitadas"""
+    from qdrant_client import AsyncQdrantClient
+    from app.core.benchmark import create_benchmark_engine
+
+    monkeypatch.setattr("app.core.search_engine.settings.SEARCH_BATCHING_ENABLED", True)
+    monkeypatch.setattr("app.core.search_engine.settings.SEARCH_CACHE_SHARED_GENERATION", True)
+    monkeypatch.setattr("app.core.search_engine.settings.RERANKER", "lexical")
+    engine = create_benchmark_engine(AsyncQdrantClient(":memory:"), "benchmark", np.zeros((1, 4), dtype=np.float32))
+    assert engine.batcher is None and engine.reranker is None
+    assert engine.response_cache is None and engine.semantic_cache is None and engine.search_log is None
+    assert engine.lexical_index is None and engine.local_store is None and engine.reducer is None
+    assert engine.generation.redis is None
+    assert engine.rerank_candidates(10) == 10
+    asyncio.run(engine.close())
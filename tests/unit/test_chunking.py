@@ -0,0 +1,38 @@
+import pytest
+
+from app.core.chunking import chunk_text, count_tokens, estimate_tokens, split_text
+
+REPORT = (
+    "LAUDO PSICOLÓGICO\n\n"
+    "1. Identificação\n"
+    "Paciente J. Silva, 9 anos, encaminhado pela Dra. Souza (CRP 06/1234).\n\n"
+    "2. Anamnese\n"
+    + " ".join(f"A mãe relata dificuldade de atenção número {i} na escola, conforme p. 3 do relatório." for i in range(40))
+    + "\n\nHIPÓTESE DIAGNÓSTICA:\nTDAH apresentação combinada."
+)
+
+@pytest.mark.unit
+def test_chunks_follow_sections_sentences_and_overlap():
+    """Os trechos respeitam o alvo, começam nas seções e repetem a última frase do anterior"""
+    chunks = split_text(REPORT, target_tokens=120, overlap_tokens=30)
+    assert all(REPORT[chunk["start"]:chunk["end"]] == chunk["text"] for chunk in chunks)
+    assert all(chunk["tokens"] <= 120 for chunk in chunks)
+    assert chunks[1]["text"].startswith("2. Anamnese")
+    assert chunks[-1]["text"].startswith("HIPÓTESE DIAGNÓSTICA:")
+    # "Dra." e "p." não encerram a frase; os trechos terminam em fim de frase
+    assert all(chunk["text"].endswith(".") for chunk in chunks)
+    assert chunks[2]["start"] < chunks[1]["end"]
+    last_sentence = chunks[1]["text"].rsplit("escola, conforme p. 3 do relatório. ", 1)[-1]
+    assert chunks[2]["text"].startswith(last_sentence)
+    assert chunk_text("  curto  ", target_tokens=120) == ["curto"]
+    assert split_text(" \n ") == []
+
+@pytest.mark.unit
+def test_oversized_text_is_cut_between_words():
+    """Textos sem fronteiras de frase são cortados entre palavras, e blocos sem espaços no alvo"""
+    text = " ".join(["avaliação"] * 500)
+    chunks = split_text(text, target_tokens=50, overlap_tokens=0)
+    assert all(chunk["text"].split() == ["avaliação"] * len(chunk["text"].split()) for chunk in chunks)
+    assert sum(len(chunk["text"].split()) for chunk in chunks) == 500
+    assert [chunk["tokens"] for chunk in split_text("x" * 400, target_tokens=50)] == [50, 50, 15]
+    assert count_tokens("texto de teste") == estimate_tokens("texto de teste") > 0
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from app.core.collection_manager import (
+    _sample_ids,
+    create_knowledge_base,
+    estimate_two_stage_memory,
+    estimate_vector_memory,
+    fit_projection,
+    inspect_collection,
+    measure_search_latency,
+    migrate_to_two_stage,
+    quantization_config,
+    quantization_report,
+    quantization_search_params,
+    two_stage_report,
+    wait_for_optimizer
+)
+
+@pytest.fixture
+def client():
+    client = QdrantClient(":memory:")
+    create_knowledge_base(client, "knowledge_base", vector_size=16, quantization="scalar")
+    rng = np.random.default_rng(0)
+    client.upsert(
+        collection_name="knowledge_base",
+        points=[
+            models.PointStruct(id=i, vector=rng.standard_normal(16).tolist(), payload={"tipo": "adulto"})
+            for i in range(100)
+        ]
+    )
+    yield client
+    client.close()
+
+@pytest.mark.unit
+def test_quantization_configs():
+    """Cada modo gera a configuração de quantização correspondente"""
+    assert quantization_config("none") is None
+    assert quantization_config("scalar").scalar.type == models.ScalarType.INT8
+    assert quantization_config("binary").binary.always_ram is True
+    assert quantization_search_params("none", oversampling=2.0) is None
+    assert quantization_search_params("binary", oversampling=4.0).oversampling == 4.0
+    with pytest.raises(ValueError):
+        quantization_config("pq")
+
+@pytest.mark.unit
+def test_vector_memory_estimate():
+    """A estimativa de memória reflete a redução de cada modo"""
+    assert estimate_vector_memory(1000, 1536, "scalar")["reduction"] == 4.0
+    assert estimate_vector_memory(1000, 1536, "binary")["reduction"] == 32.0
+
+@pytest.mark.unit
+def test_create_is_idempotent_and_report_has_exact_baseline(client):
+    """Criar de novo não recria a coleção e o relatório parte da busca exata"""
+    assert create_knowledge_base(client, "knowledge_base", vector_size=16) is False
+    report = quantization_report(client, "knowledge_base", sample_size=5, k=3, oversamplings=[2.0])
+    assert report[0]["config"] == "exact"
+    assert report[0]["recall@3"] == 1.0
+    assert len(report) == 4
+
+@pytest.mark.unit
+def test_inspect_reports_unindexed_vectors(client):
+    """A inspeção aponta vetores ainda sem índice HNSW"""
+    state = inspect_collection(client, "knowledge_base")
+    assert state["points_count"] == 100
+    assert state["unindexed_vectors"] == state["points_count"] - state["indexed_vectors_count"]
+    # Segmentos pequenos nunca são indexados: o otimizador ocioso basta
+    assert wait_for_optimizer(client, "knowledge_base", timeout=0)["optimizer_status"] == "ok"
+    assert measure_search_latency(client, "knowledge_base", sample_size=5)["queries"] == 5
+
+@pytest.mark.unit
+def test_two_stage_migration_and_report(client):
+    """A coleção migrada busca em dois estágios com recall próximo da busca exata"""
+    reducer = fit_projection(client, "knowledge_base", sample_size=100, dim=8)
+    assert migrate_to_two_stage(client, "knowledge_base", "knowledge_base_v2", reducer, batch_size=30) == 100
+    point = client.retrieve("knowledge_base_v2", ids=[5], with_vectors=True)[0]
+    assert len(point.vector["compact"]) == 8 and len(point.vector["full"]) == 16
+    assert point.payload == {"tipo": "adulto"}
+
+    report = two_stage_report(client, "knowledge_base_v2", reducer, sample_size=10, k=5, candidate_limits=[100])
+    assert [row["config"] for row in report] == ["exact_full", "compact_only", "two_stage"]
+    assert report[-1]["recall@5"] == 1.0
+    assert estimate_two_stage_memory(100, 1536, 256)["reduction"] == 6.0
+
+@pytest.mark.unit
+def test_sample_ids_are_drawn_from_the_whole_collection(client):
+    """A amostra é sorteada entre todos os pontos, e não tirada dos primeiros do scroll"""
+    sample = _sample_ids(client, "knowledge_base", 10, seed=1, batch_size=7)
+    assert len(set(sample)) == 10
+    assert max(sample) >= 10
+    assert _sample_ids(client, "knowledge_base", 10, seed=1) == sample
+    assert sorted(_sample_ids(client, "knowledge_base", 500)) == list(range(100))
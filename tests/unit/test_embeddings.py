@@ -0,0 +1,67 @@
+import asyncio
+import json
+
+import httpx
+import numpy as np
+import pytest
+
+from app.core.embeddings import HashingEmbeddingProvider, OpenAIEmbeddingProvider, create_embedding_provider
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_hashing_provider_is_deterministic_and_similarity_aware():
+    """O provedor local gera vetores normalizados, estáveis e próximos para textos parecidos"""
+    provider = HashingEmbeddingProvider(dimension=256)
+    texts = [
+        "Avaliação neuropsicológica com WISC-IV",
+        "avaliacao neuropsicologica WISC-IV",
+        "Orientação parental sobre rotina de sono"
+    ] * 4
+    vectors = np.array(await provider.embed(texts))
+    assert vectors.shape == (12, 256)
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+    assert vectors[0] @ vectors[1] > 0.8 > 0.3 > vectors[0] @ vectors[2]
+    assert await HashingEmbeddingProvider(dimension=256).embed_query(texts[0]) == vectors[0].tolist()
+    assert create_embedding_provider("hashing").dimension == 1536
+    with pytest.raises(ValueError):
+        create_embedding_provider("desconhecido")
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_openai_provider_retries_and_splits_oversized_batches():
+    """Erros temporários são repetidos e lotes recusados por tamanho são divididos, mantendo a ordem"""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        requests.append(len(body["input"]))
+        if len(requests) == 1:
+            return httpx.Response(429, headers={"retry-after": "0"}, text="rate limited")
+        if len(body["input"]) > 2:
+            return httpx.Response(400, text="This model's maximum context length is 8191 tokens")
+        data = [{"index": i, "embedding": [float(text.split()[-1]), 0.0]} for i, text in enumerate(body["input"])]
+        return httpx.Response(200, json={"data": list(reversed(data))})
+
+    client = httpx.AsyncClient(base_url="https://api.test", transport=httpx.MockTransport(handler))
+    provider = OpenAIEmbeddingProvider(
+        api_key="teste", dimension=2, batch_size=4, concurrency=2, retry_base_delay=0.001, client=client
+    )
+    vectors = await provider.embed([f"texto {i}" for i in range(6)])
+    assert [vector[0] for vector in vectors] == [0.0, 1.0, 2.0, 3.0, 4.0, 5.0]
+    stats = provider.stats()
+    assert stats["retries"] == 1 and stats["split_batches"] == 1
+    await client.aclose()
+
+@pytest.mark.unit
+def test_openai_provider_created_outside_event_loop():
+    """O provedor criado fora do event loop (singleton, CLI) cria o semáforo e os locks no loop em que é usado"""
+    def handler(request: httpx.Request) -> httpx.Response:
+        texts = json.loads(request.content)["input"]
+        return httpx.Response(200, json={"data": [{"index": i, "embedding": [1.0, 0.0]} for i in range(len(texts))]})
+
+    provider = OpenAIEmbeddingProvider(
+        api_key="teste", dimension=2, client=httpx.AsyncClient(base_url="https://api.test",
+                                                               transport=httpx.MockTransport(handler))
+    )
+    assert provider._semaphore is None and provider._requests._lock is None
+    assert asyncio.run(provider.embed(["a", "b"])) == [[1.0, 0.0], [1.0, 0.0]]
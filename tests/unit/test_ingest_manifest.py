@@ -0,0 +1,90 @@
+import pytest
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http import models
+
+from app.core.embeddings import EmbeddingProvider
+from app.core.ingest_manifest import IngestManifest
+from app.core.ingestion import IngestionPipeline, chunk_point_id
+from app.core.lexical_index import LexicalIndex
+
+class FakeEmbeddingGenerator(EmbeddingProvider):
+    """Gera vetores fixos e conta os textos recebidos."""
+
+    def __init__(self):
+        super().__init__("modelo-teste", 4)
+        self.texts = 0
+
+    async def embed(self, texts):
+        self.texts += len(texts)
+        return [[1.0, 0.0, 0.0, 0.0] for _ in texts]
+
+def long_text(prefix, sentences):
+    return " ".join(f"{prefix} frase número {i} do laudo de avaliação psicológica." for i in range(sentences))
+
+@pytest.mark.unit
+def test_manifest_records_and_removes_chunks(tmp_path):
+    """O manifesto guarda hash, modelo e ponto de cada trecho por documento"""
+    manifest = IngestManifest(tmp_path / "manifest.db")
+    manifest.record("kb", [("doc-1", 0, "doc-1#0", "h0", "m", "p0"), ("doc-1", 1, "doc-1#1", "h1", "m", "p1")])
+    manifest.record("kb", [("doc-1", 1, "doc-1#1", "h2", "m", "p1"), ("doc-2", 0, "doc-2", "h3", "m", "p2")])
+    manifest.record("outra", [("doc-3", 0, "doc-3", "h4", "m", "p3")])
+
+    found = manifest.lookup("kb", ["doc-1", "doc-9"])
+    assert set(found) == {"doc-1"}
+    assert found["doc-1"][1] == {"chunk_id": "doc-1#1", "content_hash": "h2", "embedding_model": "m", "point_id": "p1"}
+    assert manifest.source_ids("kb") == {"doc-1", "doc-2"}
+
+    manifest.remove("kb", [("doc-1", 1)])
+    assert [entry["chunk_index"] for entry in manifest.chunks_of("kb", ["doc-1"])] == [0]
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_reingestion_only_processes_the_diff(tmp_path):
+    """A reingestão pula trechos inalterados, atualiza os alterados e apaga os removidos"""
+    client = AsyncQdrantClient(":memory:")
+    await client.create_collection(
+        collection_name="knowledge_base",
+        vectors_config=models.VectorParams(size=4, distance=models.Distance.COSINE)
+    )
+    manifest = IngestManifest(tmp_path / "manifest.db")
+    lexical_index = LexicalIndex()
+    generator = FakeEmbeddingGenerator()
+
+    def pipeline(**options):
+        return IngestionPipeline(
+            client=client, embedding_generator=generator, lexical_index=lexical_index,
+            manifest=manifest, batch_size=4, **options
+        )
+
+    documents = [
+        {"id": "longo", "tipo": None, "conteudo": long_text("A", 80), "metadata": {}},
+        {"id": "curto", "tipo": None, "conteudo": "Texto curto.", "metadata": {}},
+        {"id": "antigo", "tipo": None, "conteudo": "Será removido.", "metadata": {}}
+    ]
+    first = await pipeline().run(documents)
+    total = first["chunks"]
+    assert first["new_chunks"] == total > 3
+    assert (await client.count("knowledge_base")).count == total
+
+    updated = [
+        {**documents[0], "conteudo": long_text("A", 20)},
+        documents[1]
+    ]
+    dry = await pipeline(dry_run=True, prune=True).run(updated)
+    assert dry["chunks"] == 0 and generator.texts == total
+    assert dry["unchanged_chunks"] == 1 and dry["removed_sources"] == 1
+    assert dry["diff"] == {"new": [], "changed": ["longo"], "removed": ["antigo"]}
+
+    second = await pipeline(prune=True).run(updated)
+    assert second["unchanged_chunks"] == 1 and second["chunks"] == second["changed_chunks"]
+    assert generator.texts == total + second["chunks"]
+    remaining = second["unchanged_chunks"] + second["chunks"]
+    assert second["removed_chunks"] == total - remaining
+    assert (await client.count("knowledge_base")).count == remaining
+    assert len(lexical_index) == remaining
+    assert await client.retrieve("knowledge_base", [chunk_point_id("antigo", 0)]) == []
+    assert manifest.source_ids("knowledge_base") == {"longo", "curto"}
+
+    third = await pipeline().run(updated)
+    assert third["chunks"] == 0 and third["unchanged_chunks"] == remaining
+    await client.close()
@@ -0,0 +1,148 @@
+import io
+import json
+
+import pytest
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http import models
+
+from app.core.embeddings import EmbeddingProvider
+from app.core.ingest_checkpoint import IngestCheckpoint
+from app.core.ingestion import IngestionPipeline, _iter_json_array, chunk_point_id
+from app.core.lexical_index import LexicalIndex
+from app.core.search_cache import CollectionGeneration
+
+VECTOR_SIZE = 4
+
+class FakeEmbeddingGenerator(EmbeddingProvider):
+    """Gera vetores fixos e falha nos lotes que contêm "falha"."""
+
+    def __init__(self):
+        super().__init__("fake", VECTOR_SIZE)
+        self.batch_sizes = []
+        self.available = False
+
+    async def embed(self, texts):
+        self.batch_sizes.append(len(texts))
+        if not self.available and any("falha" in text for text in texts):
+            raise RuntimeError("provedor indisponível")
+        return [[1.0, 0.0, 0.0, 0.0] for _ in texts]
+
+@pytest.mark.unit
+def test_json_array_is_streamed_in_small_reads():
+    """O array JSON é lido aos poucos, mesmo com objetos cortados entre leituras"""
+    documents = [{"id": str(i), "conteudo": f"texto {i} " * 5} for i in range(20)]
+    stream = io.StringIO(json.dumps(documents, indent=2))
+    assert list(_iter_json_array(stream, chunk_size=16)) == documents
+    with pytest.raises(ValueError):
+        list(_iter_json_array(io.StringIO('[{"id": 1}, {"id": '), chunk_size=8))
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_pipeline_ingests_files_and_isolates_failed_batches(tmp_path):
+    """A ingestão grava os trechos em lotes e descarta só os lotes que falham"""
+    path = tmp_path / "docs.jsonl"
+    lines = [{"id": f"doc-{i}", "tipo": "adulto", "conteudo": f"WISC aplicação {i}", "autor": "x"} for i in range(10)]
+    lines.append({"id": "doc-falha", "conteudo": "falha"})
+    lines.append({"id": "sem-texto"})
+    path.write_text("\n".join(json.dumps(line) for line in lines), encoding="utf-8")
+
+    client = AsyncQdrantClient(":memory:")
+    await client.create_collection(
+        collection_name="knowledge_base",
+        vectors_config=models.VectorParams(size=VECTOR_SIZE, distance=models.Distance.COSINE)
+    )
+    generation = CollectionGeneration("knowledge_base")
+    lexical_index = LexicalIndex()
+    generator = FakeEmbeddingGenerator()
+    pipeline = IngestionPipeline(
+        client=client, embedding_generator=generator, lexical_index=lexical_index, generation=generation,
+        batch_size=4, embed_concurrency=2, upsert_concurrency=2, queue_size=1
+    )
+    stats = await pipeline.ingest_files([path])
+
+    assert stats["documents"] == 11 and stats["skipped_documents"] == 1
+    assert stats["chunks"] == 8 and stats["failed_chunks"] == 3
+    assert max(generator.batch_sizes) == 4
+    assert (await client.count("knowledge_base")).count == 8
+    point = (await client.retrieve("knowledge_base", [chunk_point_id("doc-0", 0)]))[0]
+    assert point.payload["id"] == "doc-0"
+    assert point.payload["metadata"] == {
+        "autor": "x", "source": "docs.jsonl", "source_id": "doc-0", "chunk_index": 0, "chunk_count": 1,
+        "char_start": 0, "char_end": 16
+    }
+    assert len(lexical_index) == 8
+    assert generation.local == 1
+    await client.close()
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_interrupted_ingestion_still_bumps_generation(tmp_path, monkeypatch):
+    """Uma ingestão interrompida por um arquivo inválido invalida o cache do que já gravou"""
+    monkeypatch.setattr("app.core.ingestion._READ_BATCH", 2)
+    path = tmp_path / "docs.json"
+    documents = [{"id": f"doc-{i}", "conteudo": f"WISC aplicação {i}"} for i in range(4)]
+    path.write_text(json.dumps(documents)[:-1] + ', {"id": ', encoding="utf-8")
+
+    client = AsyncQdrantClient(":memory:")
+    await client.create_collection(
+        collection_name="knowledge_base",
+        vectors_config=models.VectorParams(size=VECTOR_SIZE, distance=models.Distance.COSINE)
+    )
+    generation = CollectionGeneration("knowledge_base")
+    pipeline = IngestionPipeline(
+        client=client, embedding_generator=FakeEmbeddingGenerator(), generation=generation, batch_size=2
+    )
+    with pytest.raises(ValueError):
+        await pipeline.ingest_files([path])
+
+    assert (await client.count("knowledge_base")).count > 0
+    assert generation.local == 1
+    await client.close()
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_resume_retries_failed_batches_and_skips_committed_documents(tmp_path):
+    """A ingestão retomada refaz os lotes que falharam e pula os documentos já gravados"""
+    path = tmp_path / "docs.jsonl"
+    lines = [{"id": f"doc-{i}", "conteudo": f"WISC aplicação {i}"} for i in range(6)]
+    lines[2]["conteudo"] = "falha"
+    path.write_text("\n".join(json.dumps(line) for line in lines), encoding="utf-8")
+
+    client = AsyncQdrantClient(":memory:")
+    await client.create_collection(
+        collection_name="knowledge_base",
+        vectors_config=models.VectorParams(size=VECTOR_SIZE, distance=models.Distance.COSINE)
+    )
+    checkpoint = IngestCheckpoint(tmp_path / "checkpoint.db")
+    source = str(path.resolve())
+    generator = FakeEmbeddingGenerator()
+
+    def pipeline():
+        return IngestionPipeline(
+            client=client, embedding_generator=generator, checkpoint=checkpoint, batch_size=2, embed_concurrency=2
+        )
+
+    first = await pipeline().ingest_files([path])
+    assert first["chunks"] == 4 and first["failed_batches"] == 1
+    assert checkpoint.progress("knowledge_base", [source]) == {source: {"offset": 6, "completed": True}}
+    [failure] = checkpoint.failures("knowledge_base")
+    assert failure["error"] == "provedor indisponível" and failure["retries"] == 0
+
+    # O provedor continua falhando: a nova tentativa é contada
+    await pipeline().ingest_files([path], resume=True)
+    assert checkpoint.failures("knowledge_base")[0]["retries"] == 1
+
+    generator.available = True
+    resumed = await pipeline().ingest_files([path], resume=True)
+    assert resumed["retried_batches"] == 1 and resumed["chunks"] == 2 and resumed["documents"] == 0
+    assert checkpoint.failures("knowledge_base") == []
+    assert (await client.count("knowledge_base")).count == 6
+
+    # Interrompida depois de 4 documentos: só os seguintes são relidos
+    checkpoint.reset("knowledge_base", [source])
+    checkpoint.save_progress("knowledge_base", {source: (4, False)})
+    partial = await pipeline().ingest_files([path], resume=True)
+    assert partial["documents"] == 2 and partial["chunks"] == 2
+    assert partial["resumed_from"] == {"docs.jsonl": {"offset": 4, "completed": False}}
+    assert (await client.count("knowledge_base")).count == 6
+    await client.close()
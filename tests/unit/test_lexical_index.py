@@ -0,0 +1,53 @@
+import pytest
+
+from app.core.lexical_index import LexicalIndex, tokenize
+
+DOCUMENTOS = [
+    ("doc-1", {"tipo": "infantil", "conteudo": "Interpretação do WISC-IV em avaliação infantil"}, 1),
+    ("doc-2", {"tipo": "adulto", "conteudo": "Aplicação do BFP e do HTP em avaliação de adultos"}, 2),
+    ("doc-3", {"tipo": "infantil", "conteudo": "Laudo de TDAH com escalas de atenção e avaliação"}, 3),
+]
+
+@pytest.fixture
+def index():
+    index = LexicalIndex()
+    index.add_many(DOCUMENTOS)
+    return index
+
+@pytest.mark.unit
+def test_tokenize_folds_accents_and_drops_stopwords():
+    """A tokenização remove acentos, caixa e stopwords e separa siglas hifenizadas"""
+    assert tokenize("Interpretação do WISC-IV, CRP 06/12345") == ["interpretacao", "wisc", "iv", "crp", "06", "12345"]
+
+@pytest.mark.unit
+def test_search_ranks_exact_terms_and_filters_type(index):
+    """Siglas e termos sem acento encontram o documento certo e o filtro por tipo é aplicado"""
+    assert [doc["id"] for doc in index.search("wisc")] == ["doc-1"]
+    assert [doc["id"] for doc in index.search("HTP aplicacao")] == ["doc-2"]
+    assert {doc["id"] for doc in index.search("avaliação")} == {"doc-1", "doc-2", "doc-3"}
+    assert [doc["id"] for doc in index.search("avaliação", tipo_filtro="adulto")] == ["doc-2"]
+    assert index.search("avaliação", tipo_filtro="inexistente") == []
+
+@pytest.mark.unit
+def test_incremental_update_and_remove(index):
+    """Substituir ou remover um documento atualiza o índice sem reconstrução"""
+    index.add("doc-1", {"tipo": "infantil", "conteudo": "Bateria WAIS-III"})
+    assert index.search("wisc") == []
+    assert [doc["id"] for doc in index.search("wais")] == ["doc-1"]
+    assert index.remove("doc-2") is True
+    assert index.search("htp") == []
+    stats = index.stats()
+    assert (stats["documents"], stats["removed_rows"]) == (2, 2)
+
+@pytest.mark.unit
+def test_compaction_keeps_postings_of_live_documents():
+    """A compactação descarta as linhas removidas e preserva as buscas dos documentos restantes"""
+    index = LexicalIndex()
+    index.add_many((f"doc-{i}", {"conteudo": f"avaliação termo{i}"}, i) for i in range(2100))
+    for i in range(1050):
+        index.remove(f"doc-{i}")
+    assert index.stats()["removed_rows"] == 0 and len(index) == 1050
+    [result] = index.search("termo1500")
+    assert (result["id"], result["point_id"]) == ("doc-1500", 1500)
+    assert index.search("termo5") == []
+    assert len(index.search("avaliacao", limit=5000)) == 1050
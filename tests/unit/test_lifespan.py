@@ -0,0 +1,71 @@
+import asyncio
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http import models
+
+# Configurações exigidas na importação dos módulos de autenticação
+for variavel in ("TWILIO_ACCOUNT_SID", "TWILIO_AUTH_TOKEN", "TWILIO_VERIFY_SID"):
+    os.environ.setdefault(variavel, "fake")
+
+from app import main
+from app.core.embedding_cache import EmbeddingCache
+from app.core.embeddings import HashingEmbeddingProvider
+from app.core.lexical_index import LexicalIndex
+from app.core.search_engine import SearchEngine
+
+def _engine_factory(client):
+    """Cria o motor de busca do lifespan com dependências locais."""
+    return lambda: SearchEngine(
+        client=client,
+        embedding_generator=HashingEmbeddingProvider(dimension=8),
+        embedding_cache=EmbeddingCache(model="hashing", redis_client=None),
+        lexical_index=LexicalIndex()
+    )
+
+@pytest.mark.unit
+def test_lifespan_loads_lexical_index(monkeypatch):
+    """A aplicação inicia, carrega o índice BM25 da coleção e continua sem o Qdrant"""
+    monkeypatch.setattr("app.core.search_engine.settings.HYBRID_SEARCH", True)
+    client = AsyncQdrantClient(":memory:")
+
+    async def populate():
+        await client.create_collection(
+            collection_name=main.settings.COLLECTION_NAME,
+            vectors_config=models.VectorParams(size=8, distance=models.Distance.COSINE)
+        )
+        await client.upsert(
+            collection_name=main.settings.COLLECTION_NAME,
+            points=[models.PointStruct(id=1, vector=[1.0] + [0.0] * 7,
+                                       payload={"id": "doc-1", "conteudo": "laudo infantil TDAH"})]
+        )
+    asyncio.run(populate())
+
+    monkeypatch.setattr(main, "SearchEngine", _engine_factory(client))
+    with TestClient(main.app):
+        assert main.app.state.search_engine.lexical_index.stats()["documents"] == 1
+
+    monkeypatch.setattr(main, "SearchEngine", _engine_factory(AsyncQdrantClient(":memory:")))
+    with TestClient(main.app):
+        assert main.app.state.search_engine.lexical_index.stats()["documents"] == 0
+
+@pytest.mark.unit
+def test_search_router_is_mounted():
+    """O roteador de busca é montado no prefixo da API"""
+    paths = {getattr(route, "path", None) for route in main.app.routes}
+    assert f"{main.settings.API_PREFIX}/search/query" in paths
+    assert f"{main.settings.API_PREFIX}/search/browse" in paths
+
+@pytest.mark.unit
+def test_search_routes_require_authentication(monkeypatch):
+    """As rotas de busca recusam requisições sem token"""
+    monkeypatch.setattr(main, "SearchEngine", _engine_factory(AsyncQdrantClient(":memory:")))
+    prefix = f"{main.settings.API_PREFIX}/search"
+    with TestClient(main.app) as client:
+        assert client.post(f"{prefix}/query", json={"query": "laudo"}).status_code == 401
+        assert client.post(f"{prefix}/multi-query", json={"queries": ["laudo"]}).status_code == 401
+        assert client.get(f"{prefix}/types").status_code == 401
+        assert client.get(f"{prefix}/stats").status_code == 401
+        assert client.get(f"{prefix}/browse").status_code == 401
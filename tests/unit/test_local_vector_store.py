@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+
+from app.core.local_vector_store import LocalVectorStore
+
+TIPOS = ["adulto", "infantil", "projetivo"]
+
+@pytest.fixture
+def corpus():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((500, 32)).astype(np.float32)
+    payloads = [{"id": f"doc-{i}", "tipo": TIPOS[i % len(TIPOS)], "conteudo": f"texto {i}"} for i in range(500)]
+    return vectors, payloads
+
+@pytest.fixture
+def store(tmp_path, corpus):
+    vectors, payloads = corpus
+    store = LocalVectorStore.build(tmp_path / "knowledge_base", list(range(len(vectors))), vectors, payloads)
+    yield store
+    store.close()
+
+def _exact_top_k(vectors, query, k, rows=None):
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = normalized @ (query / np.linalg.norm(query))
+    if rows is not None:
+        mask = np.zeros(len(vectors), dtype=bool)
+        mask[rows] = True
+        scores = np.where(mask, scores, -np.inf)
+    return [f"doc-{i}" for i in np.argsort(-scores)[:k]]
+
+@pytest.mark.unit
+def test_search_matches_exact_ranking(store, corpus):
+    """O top-k local é idêntico à ordenação exata por cosseno"""
+    vectors, _ = corpus
+    query = vectors[7] + 0.1
+    results = store.search([query], [10], [None], [-1.0])[0]
+    assert [doc["id"] for doc in results] == _exact_top_k(vectors, query, 10)
+    assert results[0]["conteudo"] == "texto 7"
+
+@pytest.mark.unit
+def test_search_with_tipo_filter(store, corpus):
+    """O filtro por tipo considera apenas as linhas do tipo pedido"""
+    vectors, _ = corpus
+    query = vectors[3]
+    results = store.search([query, query], [5, 5], ["infantil", "inexistente"], [-1.0, -1.0])
+    rows = [i for i in range(len(vectors)) if TIPOS[i % len(TIPOS)] == "infantil"]
+    assert [doc["id"] for doc in results[0]] == _exact_top_k(vectors, query, 5, rows)
+    assert results[1] == []
+
+@pytest.mark.unit
+def test_reopened_store_respects_min_score(store, corpus):
+    """O armazenamento reaberto do disco aplica a pontuação mínima"""
+    vectors, _ = corpus
+    reopened = LocalVectorStore.open_if_exists(store.path)
+    results = reopened.search([vectors[0]], [20], [None], [0.99])[0]
+    reopened.close()
+    assert [doc["id"] for doc in results] == ["doc-0"]
+
+@pytest.mark.unit
+def test_search_with_vectors(store, corpus):
+    """Com with_vectors, cada resultado traz o vetor normalizado"""
+    vectors, _ = corpus
+    result = store.search([vectors[4]], [1], [None], [-1.0], with_vectors=True)[0][0]
+    assert np.allclose(result["vector"], vectors[4] / np.linalg.norm(vectors[4]), atol=1e-5)
+
+@pytest.mark.unit
+def test_export_named_vector_collection(tmp_path, corpus):
+    """A exportação de uma coleção com vetores nomeados usa o vetor completo"""
+    from qdrant_client import QdrantClient
+    from qdrant_client.http import models
+    from app.scripts.local_vector_store import export_collection
+
+    vectors, payloads = corpus
+    client = QdrantClient(":memory:")
+    client.create_collection("knowledge_base", vectors_config={
+        "full": models.VectorParams(size=32, distance=models.Distance.COSINE),
+        "compact": models.VectorParams(size=8, distance=models.Distance.COSINE)
+    })
+    client.upsert("knowledge_base", points=[
+        models.PointStruct(id=i, vector={"full": vectors[i].tolist(), "compact": vectors[i, :8].tolist()},
+                           payload=payloads[i])
+        for i in range(50)
+    ])
+    assert export_collection("knowledge_base", tmp_path / "exportada", "float32", batch_size=20, client=client) == 50
+    store = LocalVectorStore(tmp_path / "exportada")
+    assert store.search([vectors[7]], [1], [None], [-1.0])[0][0]["id"] == "doc-7"
+    store.close()
+
+@pytest.mark.unit
+def test_export_empty_and_changing_collections(tmp_path, corpus):
+    """Uma coleção vazia gera um armazenamento vazio, e uma coleção alterada durante a exportação é recusada"""
+    from qdrant_client import QdrantClient
+    from qdrant_client.http import models
+    from app.scripts.local_vector_store import export_collection
+
+    vectors, payloads = corpus
+    client = QdrantClient(":memory:")
+    client.create_collection("knowledge_base", vectors_config=models.VectorParams(
+        size=32, distance=models.Distance.COSINE
+    ))
+    assert export_collection("knowledge_base", tmp_path / "vazia", "float32", client=client) == 0
+    store = LocalVectorStore(tmp_path / "vazia")
+    assert len(store) == 0
+    store.close()
+
+    client.upsert("knowledge_base", points=[
+        models.PointStruct(id=i, vector=vectors[i].tolist(), payload=payloads[i]) for i in range(10)
+    ])
+    count = client.count
+    # Contagem lida antes de uma escrita concorrente
+    client.count = lambda *args, **kwargs: models.CountResult(count=count(*args, **kwargs).count - 1)
+    with pytest.raises(ValueError, match="mudou durante a exportação"):
+        export_collection("knowledge_base", tmp_path / "alterada", "float32", batch_size=4, client=client)
+    client.count = lambda *args, **kwargs: models.CountResult(count=count(*args, **kwargs).count + 1)
+    with pytest.raises(ValueError, match="mudou durante a exportação"):
+        export_collection("knowledge_base", tmp_path / "alterada", "float32", batch_size=4, client=client)
@@ -0,0 +1,48 @@
+import pytest
+from prometheus_client import REGISTRY, CollectorRegistry, Histogram, generate_latest
+
+from app.core.latency import LatencyTracker
+from app.core.metrics import SearchEngineCollector, track_external
+
+class FakeSearchEngine:
+    """Motor de busca com as métricas de stats() fixas."""
+
+    def stats(self):
+        return {
+            "embedding_cache": {"local_hits": 2, "redis_hits": 1, "misses": 4},
+            "response_cache": {"hits": 3, "misses": 5, "stale": 1},
+            "semantic_cache": None,
+            "reranker": {"budget_fallbacks": 0},
+            "search_log": {"dropped": 0, "queued": 7}
+        }
+
+@pytest.mark.unit
+def test_search_engine_collector_exports_engine_stats():
+    """Os contadores do motor de busca são exportados no formato texto do Prometheus"""
+    registry = CollectorRegistry()
+    registry.register(SearchEngineCollector(FakeSearchEngine()))
+
+    text = generate_latest(registry).decode("utf-8")
+    assert "# TYPE psicollab_cache_hits_total counter" in text
+    assert 'psicollab_cache_hits_total{cache="embedding_local"} 2.0' in text
+    assert 'psicollab_cache_hits_total{cache="response"} 3.0' in text
+    assert 'psicollab_cache_stale_total{cache="response"} 1.0' in text
+    assert "psicollab_search_log_queued 7.0" in text
+    assert "psicollab_embedding_retries" not in text
+
+@pytest.mark.unit
+def test_external_calls_and_stage_latency_are_recorded():
+    """Chamadas externas com exceção contam como erro; etapas da busca vão para o histograma"""
+    labels = {"service": "redis", "operation": "test"}
+    errors = REGISTRY.get_sample_value("psicollab_external_call_errors_total", labels) or 0
+    with pytest.raises(ConnectionError):
+        with track_external("redis", "test"):
+            raise ConnectionError("indisponível")
+    assert REGISTRY.get_sample_value("psicollab_external_call_errors_total", labels) == errors + 1
+
+    registry = CollectorRegistry()
+    histogram = Histogram("test_stage_seconds", "Etapas", ["stage"], registry=registry)
+    tracker = LatencyTracker(histogram=histogram)
+    tracker.record("rerank", 20.0)
+    assert registry.get_sample_value("test_stage_seconds_sum", {"stage": "rerank"}) == pytest.approx(0.02)
+    assert tracker.summary()["rerank"]["count"] == 1
@@ -0,0 +1,34 @@
+import pytest
+
+from app.core.pagination import decode_cursor, encode_cursor, keyset_page, query_fingerprint
+
+RANKING = [
+    {"id": "c", "score": 0.9},
+    {"id": "a", "score": 0.8},
+    {"id": "b", "score": 0.8},
+    {"id": "d", "score": 0.5},
+]
+
+@pytest.mark.unit
+def test_cursor_round_trip_and_fingerprint():
+    """O cursor preserva a fronteira e só vale para a mesma consulta"""
+    fingerprint = query_fingerprint("search", "wisc", None, 0.7)
+    cursor = encode_cursor(fingerprint, s=0.8, i="a")
+    assert decode_cursor(cursor, fingerprint) == {"s": 0.8, "i": "a"}
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, query_fingerprint("search", "wais", None, 0.7))
+    with pytest.raises(ValueError):
+        decode_cursor("não-é-um-cursor", fingerprint)
+
+@pytest.mark.unit
+def test_keyset_pages_cover_ranking_once():
+    """As páginas percorrem a lista uma vez, desempatando pelo id"""
+    page, last = keyset_page(RANKING, 2)
+    assert [doc["id"] for doc in page] == ["c", "a"]
+    page, last = keyset_page(RANKING, 2, last["s"], last["i"])
+    assert [doc["id"] for doc in page] == ["b", "d"]
+    assert last is None
+
+    # Um documento novo acima da fronteira não repete nem pula resultados
+    page, _ = keyset_page(RANKING + [{"id": "e", "score": 0.95}], 2, 0.8, "a")
+    assert [doc["id"] for doc in page] == ["b", "d"]
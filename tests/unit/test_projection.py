@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from app.core.projection import DimensionReducer
+
+@pytest.fixture
+def vectors():
+    rng = np.random.default_rng(0)
+    # Dados com 4 direções dominantes em 32 dimensões
+    basis = rng.standard_normal((4, 32))
+    return rng.standard_normal((300, 4)) @ basis + 0.01 * rng.standard_normal((300, 32))
+
+@pytest.mark.unit
+def test_pca_preserves_neighbours(vectors, tmp_path):
+    """A projeção PCA mantém o vizinho mais próximo e sobrevive a save/load"""
+    reducer = DimensionReducer.fit_pca(vectors, dim=4)
+    reducer.save(tmp_path / "projection.npz")
+    loaded = DimensionReducer.load(tmp_path / "projection.npz")
+    compact = loaded.transform(vectors)
+    assert compact.shape == (300, 4)
+    assert np.allclose(np.linalg.norm(compact, axis=1), 1.0, atol=1e-5)
+
+    full = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    query = 10
+    full_scores, compact_scores = full @ full[query], compact @ compact[query]
+    full_scores[query] = compact_scores[query] = -np.inf
+    assert np.argmax(full_scores) == np.argmax(compact_scores)
+
+@pytest.mark.unit
+def test_truncate_and_named_vectors(vectors):
+    """O truncamento usa as primeiras dimensões e gera os dois vetores nomeados"""
+    reducer = DimensionReducer.truncate(dim=8)
+    named = reducer.named_vectors(vectors[:2].tolist())
+    assert set(named[0]) == {"full", "compact"}
+    assert len(named[0]["full"]) == 32 and len(named[0]["compact"]) == 8
+    with pytest.raises(ValueError):
+        DimensionReducer("pca", 8)
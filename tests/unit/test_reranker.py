@@ -0,0 +1,37 @@
+import time
+
+import pytest
+
+from app.core.reranker import LexicalOverlapReranker, Reranker, RerankTimeout, create_reranker
+
+DOCUMENTOS = [
+    {"id": "doc-1", "score": 0.82, "conteudo": "Critérios gerais de avaliação psicológica"},
+    {"id": "doc-2", "score": 0.80, "conteudo": "Escala de atenção aplicada em crianças com TDAH"},
+    {"id": "doc-3", "score": 0.79, "conteudo": "Atenção concentrada e escala de memória"},
+]
+
+class SlowReranker(Reranker):
+    """Reranker que demora em cada lote, para testar o orçamento de tempo."""
+
+    name = "slow"
+
+    def score_batch(self, query, documents):
+        time.sleep(0.02)
+        return [0.0] * len(documents)
+
+@pytest.mark.unit
+def test_lexical_reranker_promotes_term_and_phrase_matches():
+    """Documentos com os termos e a frase da consulta sobem na ordenação"""
+    reranker = LexicalOverlapReranker(batch_size=2)
+    scores = reranker.score("escala de atenção TDAH", DOCUMENTOS)
+    assert list(scores.argsort()[::-1]) == [1, 2, 0]
+
+@pytest.mark.unit
+def test_deadline_stops_between_batches():
+    """O prazo interrompe o reranking entre lotes"""
+    reranker = SlowReranker(batch_size=1)
+    with pytest.raises(RerankTimeout):
+        reranker.score("consulta", DOCUMENTOS, deadline=time.perf_counter() + 0.01)
+    assert create_reranker("none") is None
+    with pytest.raises(ValueError):
+        create_reranker("inexistente")
@@ -0,0 +1,520 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http import models
+
+from app.core.embedding_cache import EmbeddingCache
+from app.core.embeddings import EmbeddingProvider
+from app.core.ingest_manifest import IngestManifest
+from app.core.knowledge import KnowledgeManager
+from app.core.lexical_index import LexicalIndex
+from app.core.local_vector_store import LocalVectorStore
+from app.core.projection import DimensionReducer
+from app.core.search_cache import CollectionGeneration, SearchResponseCache
+from app.core.search_engine import SearchEngine, maximal_marginal_relevance, reciprocal_rank_fusion
+from app.core.semantic_cache import SemanticCache
+
+VECTOR_SIZE = 8
+
+DOCUMENTOS = [
+    {"id": "doc-1", "tipo": "infantil", "conteudo": "WISC-IV interpretação"},
+    {"id": "doc-2", "tipo": "adulto", "conteudo": "WAIS-III aplicação"},
+    {"id": "doc-3", "tipo": "infantil", "conteudo": "laudo infantil TDAH"},
+]
+
+def _vetor(indice: int) -> list:
+    """Vetor one-hot usado como embedding determinístico nos testes."""
+    vetor = [0.0] * VECTOR_SIZE
+    vetor[indice % VECTOR_SIZE] = 1.0
+    return vetor
+
+class FakeEmbeddingGenerator(EmbeddingProvider):
+    """Provedor de embeddings determinístico para os testes."""
+
+    def __init__(self):
+        super().__init__("fake", VECTOR_SIZE)
+        self.calls = 0
+
+    async def embed(self, texts):
+        self.calls += 1
+        textos = [doc["conteudo"] for doc in DOCUMENTOS]
+        return [_vetor(textos.index(text)) if text in textos else _vetor(7) for text in texts]
+
+@pytest_asyncio.fixture
+async def search_engine():
+    client = AsyncQdrantClient(":memory:")
+    await client.create_collection(
+        collection_name="knowledge_base",
+        vectors_config=models.VectorParams(size=VECTOR_SIZE, distance=models.Distance.COSINE)
+    )
+    await client.upsert(
+        collection_name="knowledge_base",
+        points=[
+            models.PointStruct(id=indice + 1, vector=_vetor(indice), payload=doc)
+            for indice, doc in enumerate(DOCUMENTOS)
+        ]
+    )
+    engine = SearchEngine(
+        client=client,
+        embedding_generator=FakeEmbeddingGenerator(),
+        embedding_cache=EmbeddingCache(model="fake", redis_client=None),
+        response_cache=SearchResponseCache(CollectionGeneration("knowledge_base"))
+    )
+    yield engine
+    await engine.close()
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_search_returns_best_match(search_engine):
+    """A busca retorna o documento mais similar com a pontuação"""
+    results = await search_engine.search("WISC-IV interpretação", limit=3)
+    assert results[0]["id"] == "doc-1"
+    assert results[0]["score"] == pytest.approx(1.0)
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_search_by_type_applies_filter(search_engine):
+    """A busca por tipo não retorna documentos de outros tipos"""
+    results = await search_engine.search_by_type("WAIS-III aplicação", "infantil", limit=3)
+    assert all(result["tipo"] == "infantil" for result in results)
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_repeated_query_uses_embedding_cache(search_engine):
+    """Consultas repetidas (após normalização) não geram novo embedding"""
+    await search_engine.search("WISC-IV interpretação", limit=3)
+    await search_engine.search("  wisc-iv   INTERPRETAÇÃO ", limit=2)
+    assert search_engine.embedding_generator.calls == 1
+    assert search_engine.embedding_cache.stats()["local_hits"] == 1
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_multi_query_batches_and_fuses(search_engine):
+    """A busca múltipla gera os embeddings em lote e combina sem duplicatas"""
+    results = await search_engine.search_multi_query(
+        ["WISC-IV interpretação", "laudo infantil TDAH", "WISC-IV interpretação"],
+        limit_per_query=2,
+        min_score=0.5
+    )
+    ids = [result["id"] for result in results]
+    assert ids == ["doc-1", "doc-3"]
+    assert search_engine.embedding_generator.calls == 1
+
+@pytest.mark.unit
+def test_reciprocal_rank_fusion_prefers_consensus():
+    """Documentos bem posicionados em várias listas sobem no ranking combinado"""
+    fused = reciprocal_rank_fusion([
+        [{"id": "a", "score": 0.9}, {"id": "b", "score": 0.8}],
+        [{"id": "b", "score": 0.85}, {"id": "c", "score": 0.7}],
+    ])
+    assert [doc["id"] for doc in fused] == ["b", "a", "c"]
+    assert fused[0]["score"] == 0.85
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_concurrent_searches_are_coalesced(search_engine):
+    """Buscas concorrentes são executadas em um único lote"""
+    queries = ["WISC-IV interpretação", "WAIS-III aplicação", "laudo infantil TDAH"]
+    results = await asyncio.gather(*(search_engine.search(query, limit=1) for query in queries))
+    assert [result[0]["id"] for result in results] == ["doc-1", "doc-2", "doc-3"]
+    assert search_engine.embedding_generator.calls == 1
+    assert search_engine.batcher.stats()["batch_size_counts"] == {3: 1}
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_single_search_does_not_wait_for_batch_window(search_engine):
+    """Sem outra busca em execução, a busca não espera a janela de agrupamento"""
+    search_engine.batcher.window = 60.0
+    results = await asyncio.wait_for(search_engine.search("WISC-IV interpretação", limit=1), timeout=5)
+    assert results[0]["id"] == "doc-1"
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_response_cache_invalidated_by_new_generation(search_engine, tmp_path):
+    """Respostas em cache não são servidas após uma escrita na coleção"""
+    first = await search_engine.search("WISC-IV interpretação")
+    second = await search_engine.search("WISC-IV interpretação")
+    assert second == first
+    assert search_engine.response_cache.hits == 1
+
+    knowledge_manager = KnowledgeManager(
+        generation=search_engine.response_cache.generation,
+        client=search_engine.client,
+        embedding_generator=search_engine.embedding_generator,
+        manifest=IngestManifest(tmp_path / "ingest_manifest.db")
+    )
+    await knowledge_manager.add_document("Novo documento", doc_id="doc-4", metadata={"tipo": "adulto"})
+    await search_engine.search("WISC-IV interpretação")
+    assert search_engine.response_cache.stale == 1
+    # Uma chamada para a busca e outra para a ingestão; a nova busca usa o cache de embeddings
+    assert search_engine.embedding_generator.calls == 2
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_falls_back_to_local_store_when_qdrant_fails(tmp_path):
+    """Sem a coleção no Qdrant, a busca é atendida pelo armazenamento local"""
+    local_store = LocalVectorStore.build(
+        tmp_path / "knowledge_base",
+        list(range(len(DOCUMENTOS))),
+        [_vetor(indice) for indice in range(len(DOCUMENTOS))],
+        DOCUMENTOS
+    )
+    engine = SearchEngine(
+        client=AsyncQdrantClient(":memory:"),
+        embedding_generator=FakeEmbeddingGenerator(),
+        embedding_cache=EmbeddingCache(model="fake", redis_client=None),
+        response_cache=SearchResponseCache(CollectionGeneration("knowledge_base")),
+        local_store=local_store
+    )
+    results = await engine.search("laudo infantil TDAH", limit=2, tipo_filtro="infantil")
+    await engine.close()
+    assert results[0]["id"] == "doc-3"
+    assert all(result["tipo"] == "infantil" for result in results)
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_type_counts_from_collection(search_engine):
+    """As contagens por tipo vêm da coleção"""
+    assert await search_engine.type_counts() == {"infantil": 2, "adulto": 1}
+
+@pytest.mark.unit
+def test_plan_search_params_by_selectivity():
+    """Filtros seletivos usam busca exata e filtros amplos um ef maior"""
+    engine = SearchEngine(
+        client=AsyncQdrantClient(":memory:"),
+        embedding_generator=FakeEmbeddingGenerator(),
+        embedding_cache=EmbeddingCache(model="fake", redis_client=None)
+    )
+    counts = {"infantil": 10, "adulto": 1_000_000}
+    assert engine._plan_search_params(None, counts) is engine.search_params
+    assert engine._plan_search_params("infantil", counts).exact is True
+    broad = engine._plan_search_params("adulto", counts)
+    assert not broad.exact
+    assert broad.hnsw_ef > engine.search_params.hnsw_ef
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_two_stage_search_rescores_with_full_vector():
+    """A busca em dois estágios filtra pelo vetor compacto e pontua pelo completo"""
+    reducer = DimensionReducer.truncate(dim=4)
+    client = AsyncQdrantClient(":memory:")
+    await client.create_collection(
+        collection_name="knowledge_base",
+        vectors_config={
+            "full": models.VectorParams(size=VECTOR_SIZE, distance=models.Distance.COSINE),
+            "compact": models.VectorParams(size=4, distance=models.Distance.COSINE)
+        }
+    )
+    vectors = reducer.named_vectors([_vetor(indice) for indice in range(len(DOCUMENTOS))])
+    await client.upsert(
+        collection_name="knowledge_base",
+        points=[
+            models.PointStruct(id=indice + 1, vector=vector, payload=doc)
+            for indice, (doc, vector) in enumerate(zip(DOCUMENTOS, vectors))
+        ]
+    )
+    engine = SearchEngine(
+        client=client,
+        embedding_generator=FakeEmbeddingGenerator(),
+        embedding_cache=EmbeddingCache(model="fake", redis_client=None),
+        response_cache=SearchResponseCache(CollectionGeneration("knowledge_base")),
+        reducer=reducer
+    )
+    results = await engine.search_by_type("laudo infantil TDAH", "infantil", limit=2)
+    await engine.close()
+    assert [result["id"] for result in results] == ["doc-3"]
+    assert results[0]["score"] == pytest.approx(1.0)
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_two_stage_without_projection_searches_full_vector(tmp_path, monkeypatch):
+    """Sem a projeção compacta, a busca usa o vetor completo e a ingestão falha com um erro claro"""
+    monkeypatch.setattr("app.core.search_engine.settings.TWO_STAGE_SEARCH", True)
+    monkeypatch.setattr("app.core.search_engine.settings.COMPACT_PROJECTION", "pca")
+    monkeypatch.setattr("app.core.search_engine.settings.COMPACT_PROJECTION_PATH", str(tmp_path / "ausente.npz"))
+    client = AsyncQdrantClient(":memory:")
+    await client.create_collection(
+        collection_name="knowledge_base",
+        vectors_config={
+            "full": models.VectorParams(size=VECTOR_SIZE, distance=models.Distance.COSINE),
+            "compact": models.VectorParams(size=4, distance=models.Distance.COSINE)
+        }
+    )
+    await client.upsert(
+        collection_name="knowledge_base",
+        points=[
+            models.PointStruct(id=indice + 1, vector={"full": _vetor(indice), "compact": [1.0, 0.0, 0.0, 0.0]},
+                               payload=doc)
+            for indice, doc in enumerate(DOCUMENTOS)
+        ]
+    )
+    engine = SearchEngine(
+        client=client,
+        embedding_generator=FakeEmbeddingGenerator(),
+        embedding_cache=EmbeddingCache(model="fake", redis_client=None),
+        response_cache=SearchResponseCache(CollectionGeneration("knowledge_base"))
+    )
+    assert engine.reducer is None
+    results = await engine.search("laudo infantil TDAH", limit=2)
+    assert results[0]["id"] == "doc-3"
+
+    with pytest.raises(RuntimeError, match="fit-projection"):
+        KnowledgeManager(
+            client=client, embedding_generator=FakeEmbeddingGenerator(),
+            manifest=IngestManifest(tmp_path / "ingest_manifest.db")
+        ).pipeline()
+    await engine.close()
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_hybrid_search_finds_exact_terms(search_engine):
+    """A busca híbrida recupera pela sigla o documento que a busca vetorial não encontra"""
+    search_engine.lexical_index = LexicalIndex()
+    search_engine.lexical_index.add_many((doc["id"], doc, indice + 1) for indice, doc in enumerate(DOCUMENTOS))
+    results = await search_engine.search("sobre o TDAH", limit=3)
+    assert [result["id"] for result in results] == ["doc-3"]
+    assert results[0]["score"] == 0.0 and results[0]["lexical_score"] > 0
+    assert results[0]["conteudo"] == "laudo infantil TDAH" and "point_id" not in results[0]
+
+    results = await search_engine.search("laudo infantil TDAH", limit=3)
+    assert results[0]["id"] == "doc-3"
+    assert results[0]["score"] == pytest.approx(1.0)
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_rerank_falls_back_to_first_stage_order(search_engine):
+    """O reranking reordena os primeiros resultados e mantém a ordem original se exceder o orçamento"""
+    results = [dict(doc, score=0.8 - indice * 0.01) for indice, doc in enumerate(DOCUMENTOS)]
+    reranked = await search_engine.rerank_results("laudo TDAH", results)
+    assert reranked[0]["id"] == "doc-3" and "rerank_score" in reranked[0]
+
+    search_engine.rerank_budget = 0.0
+    assert await search_engine.rerank_results("laudo TDAH", results) == results
+    assert search_engine.stats()["reranker"]["budget_fallbacks"] == 1
+    assert search_engine.stats()["latency"]["rerank"]["count"] == 2
+
+@pytest.mark.unit
+def test_maximal_marginal_relevance_skips_near_duplicates():
+    """O MMR troca um quase duplicado por um resultado diferente"""
+    candidates = [[1.0, 0.0, 0.0], [0.99, 0.1, 0.0], [0.7, 0.0, 0.7]]
+    assert maximal_marginal_relevance([1.0, 0.0, 0.0], candidates, k=2, diversity=0.0) == [0, 1]
+    assert maximal_marginal_relevance([1.0, 0.0, 0.0], candidates, k=2, diversity=0.6) == [0, 2]
+    assert maximal_marginal_relevance([1.0, 0.0, 0.0], [], k=2) == []
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_search_diverse_returns_distinct_documents(search_engine):
+    """A busca diversificada não retorna dois trechos quase idênticos"""
+    quase_duplicado = _vetor(0)
+    quase_duplicado[1] = 0.05
+    await search_engine.client.upsert(
+        collection_name="knowledge_base",
+        points=[models.PointStruct(
+            id=4, vector=quase_duplicado,
+            payload={"id": "doc-1b", "tipo": "infantil", "conteudo": "WISC-IV interpretação (cont.)"}
+        )]
+    )
+    results = await search_engine.search_diverse("WISC-IV interpretação", limit=2, min_score=-1.0, diversity=0.7)
+    assert results[0]["id"] == "doc-1"
+    assert results[1]["id"] not in {"doc-1", "doc-1b"}
+    assert all("vector" not in result for result in results)
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_multi_query_stream_yields_each_query(search_engine):
+    """A busca múltipla em streaming entrega os resultados de cada consulta"""
+    consultas = ["WISC-IV interpretação", "WAIS-III aplicação"]
+    entregues = {index: results async for index, results in search_engine.search_multi_query_stream(consultas)}
+    assert entregues[0][0]["id"] == "doc-1"
+    assert entregues[1][0]["id"] == "doc-2"
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_search_page_and_browse_cursors(search_engine):
+    """A busca e a listagem paginadas percorrem todos os documentos sem repetição"""
+    page, cursor, _ = await search_engine.search_page("WISC-IV interpretação", limit=2, min_score=-1.0)
+    assert page[0]["id"] == "doc-1" and cursor is not None
+    rest, cursor_final, depth_limit_reached = await search_engine.search_page(
+        "WISC-IV interpretação", limit=2, min_score=-1.0, cursor=cursor
+    )
+    assert {doc["id"] for doc in page + rest} == {"doc-1", "doc-2", "doc-3"}
+    assert cursor_final is None and not depth_limit_reached
+    with pytest.raises(ValueError):
+        await search_engine.search_page("outra consulta", limit=2, cursor=cursor)
+
+    listados, cursor = await search_engine.browse(tipo_filtro="infantil", limit=1)
+    seguintes, _ = await search_engine.browse(tipo_filtro="infantil", limit=1, cursor=cursor)
+    assert {doc["id"] for doc in listados + seguintes} == {"doc-1", "doc-3"}
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_search_page_fetches_only_up_to_the_page(search_engine, monkeypatch):
+    """Cada página busca os resultados já servidos, a página e um a mais, não SEARCH_PAGE_DEPTH"""
+    limites = []
+    search = search_engine.search
+
+    async def search_espiao(query, limit=5, **kwargs):
+        limites.append(limit)
+        return await search(query, limit=limit, **kwargs)
+
+    monkeypatch.setattr(search_engine, "search", search_espiao)
+    page, cursor, _ = await search_engine.search_page("WISC-IV interpretação", limit=1, min_score=-1.0)
+    rest, _, _ = await search_engine.search_page("WISC-IV interpretação", limit=1, min_score=-1.0, cursor=cursor)
+    assert limites == [2, 3]
+    assert page[0]["id"] != rest[0]["id"]
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_search_projects_payload_fields(search_engine):
+    """Com fields, apenas os campos pedidos são lidos e a resposta completa não vem do cache"""
+    projected = await search_engine.search("WISC-IV interpretação", limit=3, fields=["tipo"])
+    assert projected[0] == {"id": "doc-1", "tipo": "infantil", "score": pytest.approx(1.0)}
+    full = await search_engine.search("WISC-IV interpretação", limit=3)
+    assert full[0]["conteudo"] == "WISC-IV interpretação"
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_semantic_cache_answers_paraphrases(search_engine):
+    """Uma paráfrase com os mesmos filtros recebe a resposta da consulta original"""
+    search_engine.semantic_cache = SemanticCache(dim=VECTOR_SIZE, threshold=0.9)
+    first = await search_engine.search("laudo infantil TDAH", limit=2)
+
+    paraphrase = _vetor(2)
+    paraphrase[0] = 0.1
+
+    async def embed_paraphrase(texts):
+        return [paraphrase for _ in texts]
+
+    search_engine.embedding_generator.embed = embed_paraphrase
+    assert await search_engine.search("TDAH infantil laudo", limit=2) == first
+    assert await search_engine.search("TDAH infantil laudo", limit=2, tipo_filtro="infantil") != []
+    stats = search_engine.stats()["semantic_cache"]
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_load_lexical_index_from_collection(search_engine, monkeypatch):
+    """O índice BM25 é carregado da coleção, e uma coleção indisponível não interrompe a carga"""
+    monkeypatch.setattr("app.core.search_engine.settings.HYBRID_SEARCH", True)
+    search_engine.lexical_index = LexicalIndex()
+    assert await search_engine.load_lexical_index() == 3
+    assert search_engine.lexical_index.stats()["documents"] == 3
+
+    search_engine.collection_name = "inexistente"
+    assert await search_engine.load_lexical_index() == 0
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_lexical_index_reloads_when_generation_changes(search_engine, monkeypatch):
+    """Escritas de outro processo (nova geração) são incluídas no índice BM25 sem reiniciar a API"""
+    monkeypatch.setattr("app.core.search_engine.settings.HYBRID_SEARCH", True)
+    monkeypatch.setattr("app.core.search_engine.settings.LEXICAL_INDEX_REFRESH_INTERVAL", 0)
+    search_engine.lexical_index = LexicalIndex()
+    await search_engine.load_lexical_index()
+    await search_engine.client.upsert(
+        collection_name="knowledge_base",
+        points=[models.PointStruct(id=4, vector=_vetor(5), payload={"id": "doc-4", "conteudo": "escala BFP"})]
+    )
+    await search_engine.generation.bump()
+
+    await search_engine.search("BFP", limit=3)
+    await search_engine._lexical_reload
+    assert search_engine.lexical_index.stats()["documents"] == 4
+    results = await search_engine.search("sobre o BFP", limit=3)
+    assert [result["id"] for result in results] == ["doc-4"]
+    assert results[0]["conteudo"] == "escala BFP"
+
+class FakeRedis:
+    """Redis em memória com as operações usadas pelo contador de geração."""
+
+    def __init__(self):
+        self.values = {}
+        self.gets = 0
+
+    async def get(self, key):
+        self.gets += 1
+        return self.values.get(key)
+
+    async def incr(self, key):
+        self.values[key] = int(self.values.get(key, 0)) + 1
+        return self.values[key]
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    async def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_lexical_index_applies_changed_points(search_engine, monkeypatch):
+    """Com os pontos alterados publicados com a geração, só eles são lidos da coleção"""
+    monkeypatch.setattr("app.core.search_engine.settings.HYBRID_SEARCH", True)
+    monkeypatch.setattr("app.core.search_engine.settings.LEXICAL_INDEX_REFRESH_INTERVAL", 0)
+    monkeypatch.setattr("app.core.search_cache.settings.SEARCH_CACHE_GENERATION_TTL", 0)
+    redis = FakeRedis()
+    search_engine.generation = CollectionGeneration("knowledge_base", redis)
+    search_engine.lexical_index = LexicalIndex()
+    await search_engine.load_lexical_index()
+    await search_engine.client.upsert(
+        collection_name="knowledge_base",
+        points=[models.PointStruct(id=4, vector=_vetor(5), payload={"id": "doc-4", "conteudo": "escala BFP"})]
+    )
+    await search_engine.client.delete(collection_name="knowledge_base", points_selector=models.PointIdsList(points=[1]))
+    await CollectionGeneration("knowledge_base", redis).bump([4, 1])
+
+    async def recarga(*args, **kwargs):
+        raise AssertionError("o índice não deveria ser recarregado")
+
+    monkeypatch.setattr(search_engine.lexical_index, "load_from_collection", recarga)
+    await search_engine.search("BFP", limit=3)
+    await search_engine._lexical_reload
+    assert search_engine._lexical_generation == 1
+    assert search_engine.lexical_index.stats()["documents"] == 3
+    assert [result["id"] for result in search_engine.lexical_index.search("BFP")] == ["doc-4"]
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_memory_cache_sees_generation_bumped_by_other_process(monkeypatch):
+    """Com o backend em memória, a escrita de outro processo (ingestão) invalida o cache pela geração no Redis"""
+    monkeypatch.setattr("app.core.search_cache.settings.SEARCH_CACHE_GENERATION_TTL", 0)
+    redis = FakeRedis()
+    cache = SearchResponseCache(CollectionGeneration("knowledge_base", redis))
+    _, generation = await cache.lookup("laudo", 3, None, 0.5)
+    await cache.store("laudo", 3, None, 0.5, generation, [{"id": "doc-1"}])
+    assert (await cache.lookup("laudo", 3, None, 0.5))[0] == [{"id": "doc-1"}]
+
+    await CollectionGeneration("knowledge_base", redis).bump()
+    assert (await cache.lookup("laudo", 3, None, 0.5))[0] is None
+    assert cache.stats()["backend"] == "memory" and cache.stats()["stale"] == 1
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_generation_is_read_from_redis_once_per_ttl(monkeypatch):
+    """A geração lida do Redis é reaproveitada dentro de SEARCH_CACHE_GENERATION_TTL"""
+    monkeypatch.setattr("app.core.search_cache.settings.SEARCH_CACHE_GENERATION_TTL", 60)
+    redis = FakeRedis()
+    generation = CollectionGeneration("knowledge_base", redis)
+    assert await generation.current() == 0
+    await CollectionGeneration("knowledge_base", redis).bump()
+    assert await generation.current() == 0
+    assert redis.gets == 1
+
+    assert await generation.bump() == 2
+    assert await generation.current() == 2
+    assert redis.gets == 1
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_search_page_reports_depth_limit(search_engine, monkeypatch):
+    """A última página alcançável pelo limite de profundidade é sinalizada, não tratada como fim dos resultados"""
+    monkeypatch.setattr("app.core.search_engine.settings.SEARCH_PAGE_DEPTH", 2)
+    page, cursor, _ = await search_engine.search_page("WISC-IV interpretação", limit=1, min_score=-1.0)
+    rest, cursor_final, depth_limit_reached = await search_engine.search_page(
+        "WISC-IV interpretação", limit=1, min_score=-1.0, cursor=cursor
+    )
+    assert len(page + rest) == 2
+    assert cursor_final is None and depth_limit_reached
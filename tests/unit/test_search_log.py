@@ -0,0 +1,71 @@
+import asyncio
+import uuid
+from datetime import datetime
+
+import pytest
+
+from app.core.search_log import SearchLogSink
+
+def make_entry(query: str, num_results: int, latency_ms: float) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "timestamp": datetime.now().isoformat(),
+        "query": query,
+        "normalized_query": query.lower(),
+        "tipo": None,
+        "num_results": num_results,
+        "user_id": "anonymous",
+        "top_result_id": None,
+        "top_result_score": None,
+        "latency_ms": latency_ms
+    }
+
+@pytest.mark.unit
+def test_sink_writes_batches_and_answers_analytics(tmp_path):
+    """Os registros são gravados em segundo plano e alimentam as consultas de análise"""
+    async def run():
+        sink = SearchLogSink(tmp_path / "log.db", maxsize=100, batch_size=10, flush_interval=0.01)
+        for i in range(20):
+            assert sink.submit(make_entry("WISC" if i % 2 else "htp", 0 if i < 4 else 3, float(i)))
+        await asyncio.sleep(0.2)
+        assert sink.stats()["written"] == 20
+        top = await sink.top_queries(limit=1)
+        zero = await sink.zero_result_queries()
+        latency = await sink.latency_percentiles()
+        await sink.close()
+        return top, zero, latency
+
+    top, zero, latency = asyncio.run(run())
+    assert top[0]["count"] == 10
+    assert {row["query"]: row["count"] for row in zero} == {"htp": 2, "wisc": 2}
+    assert latency["searches"] == 20
+    assert latency["p50_ms"] == pytest.approx(9.5)
+
+@pytest.mark.unit
+def test_sink_drops_on_overflow_and_flushes_on_close(tmp_path):
+    """Com a fila cheia os registros são descartados e contados; close grava o restante"""
+    async def run():
+        sink = SearchLogSink(tmp_path / "log.db", maxsize=3, batch_size=10, flush_interval=0.01)
+        accepted = [sink.submit(make_entry("wais", 1, 1.0)) for _ in range(5)]
+        await sink.close()
+        return sink, accepted
+
+    sink, accepted = asyncio.run(run())
+    assert accepted == [True, True, True, False, False]
+    stats = sink.stats()
+    assert stats["dropped"] == 2
+    assert stats["written"] == 3
+
+@pytest.mark.unit
+def test_close_writes_batch_already_taken_by_writer(tmp_path):
+    """close grava o lote que a tarefa já tirou da fila e ainda não gravou"""
+    async def run():
+        sink = SearchLogSink(tmp_path / "log.db", maxsize=100, batch_size=10, flush_interval=60.0)
+        for _ in range(3):
+            sink.submit(make_entry("htp", 1, 1.0))
+        await asyncio.sleep(0.05)
+        assert sink.stats()["queued"] == 0 and sink.stats()["written"] == 0
+        await sink.close()
+        return sink
+
+    assert asyncio.run(run()).stats()["written"] == 3
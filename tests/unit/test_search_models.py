@@ -0,0 +1,57 @@
+import json
+import os
+
+import pytest
+
+# Configurações exigidas na importação dos módulos de autenticação
+for variavel in ("TWILIO_ACCOUNT_SID", "TWILIO_AUTH_TOKEN", "TWILIO_VERIFY_SID"):
+    os.environ.setdefault(variavel, "fake")
+
+from app.api.endpoints import search as search_api
+
+@pytest.mark.unit
+def test_projected_results_match_response_model():
+    """Resultados projetados (sem conteudo, tipo ou metadata) são respostas válidas"""
+    response = search_api.SearchResponse(
+        results=[{"id": "doc-1", "score": 0.9}, {"id": "doc-2", "score": 0.8, "tipo": "infantil"}],
+        count=2,
+        query="WISC-IV"
+    )
+    assert response.results[0].conteudo is None
+    assert response.results[1].tipo == "infantil"
+
+class FakeSearchEngine:
+    """Motor de busca com resultados fixos e um reranking que inverte a ordem."""
+
+    def __init__(self):
+        self.reranked = False
+        self.logged = []
+
+    def rerank_candidates(self, limit):
+        return limit + 1
+
+    async def search(self, query, limit, tipo_filtro=None, min_score=0.0, fields=None):
+        return [{"id": f"doc-{i}", "score": 0.9 - i * 0.1} for i in range(limit)]
+
+    async def rerank_results(self, query, results):
+        self.reranked = True
+        return list(reversed(results))
+
+    def log_search(self, query, results, **kwargs):
+        self.logged.append((query, results))
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_stream_sends_first_stage_before_reranking():
+    """O streaming envia os resultados da busca antes do reranking e depois a lista reordenada"""
+    engine = FakeSearchEngine()
+    response = await search_api.search_stream(search_api.SearchQuery(query="WISC", limit=2), "ndjson", engine)
+    iterator = response.body_iterator
+    first = json.loads(await iterator.__anext__())
+    assert first == {"event": "result", "id": "doc-0", "score": 0.9}
+    assert not engine.reranked
+
+    events = [json.loads(line) async for line in iterator]
+    assert [event["event"] for event in events] == ["result", "reranked", "done"]
+    assert [result["id"] for result in events[1]["results"]] == ["doc-2", "doc-1"]
+    assert events[2]["count"] == 2
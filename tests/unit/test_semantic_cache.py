@@ -0,0 +1,60 @@
+import pytest
+
+from app.core.semantic_cache import SemanticCache
+
+RESULTS = [{"id": "doc-1", "score": 0.9}]
+
+@pytest.mark.unit
+def test_lookup_requires_similarity_and_same_filters():
+    """Só consultas próximas o bastante e com os mesmos filtros reaproveitam a resposta"""
+    cache = SemanticCache(dim=3, threshold=0.95, maxsize=4, ttl=60)
+    cache.store([1.0, 0.0, 0.0], (5, None), 0, RESULTS)
+    assert cache.lookup([0.99, 0.05, 0.0], (5, None), 0) == RESULTS
+    assert cache.lookup([0.7, 0.7, 0.0], (5, None), 0) is None
+    assert cache.lookup([1.0, 0.0, 0.0], (5, "infantil"), 0) is None
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2
+    assert stats["avg_hit_similarity"] > 0.95
+
+@pytest.mark.unit
+def test_stale_and_expired_entries_are_not_served():
+    """Entradas de outra geração ou além do TTL são descartadas e contadas"""
+    cache = SemanticCache(dim=3, threshold=0.95, maxsize=2, ttl=60)
+    cache.store([1.0, 0.0, 0.0], "f", 0, RESULTS)
+    assert cache.lookup([1.0, 0.0, 0.0], "f", 1) is None
+    assert cache.stats()["stale"] == 1
+
+    expiring = SemanticCache(dim=3, threshold=0.95, maxsize=2, ttl=0)
+    expiring.store([1.0, 0.0, 0.0], "f", 0, RESULTS)
+    assert expiring.lookup([1.0, 0.0, 0.0], "f", 0) is None
+    assert expiring.stats()["expired"] == 1
+
+    # Com o cache cheio, a entrada usada há mais tempo é substituída
+    cache.store([0.0, 1.0, 0.0], "f", 1, RESULTS)
+    cache.store([0.0, 0.0, 1.0], "f", 1, RESULTS)
+    cache.lookup([0.0, 0.0, 1.0], "f", 1)
+    cache.store([0.0, 0.7, 0.7], "f", 1, RESULTS)
+    assert cache.lookup([0.0, 0.0, 1.0], "f", 1) == RESULTS
+    assert cache.lookup([0.0, 1.0, 0.0], "f", 1) is None
+
+@pytest.mark.unit
+def test_fresh_entry_is_served_when_closest_is_stale():
+    """Uma entrada da geração atual acima do limiar é servida mesmo que a mais próxima seja antiga"""
+    cache = SemanticCache(dim=3, threshold=0.95, maxsize=4, ttl=60)
+    fresh = [{"id": "doc-2", "score": 0.8}]
+    cache.store([1.0, 0.0, 0.0], "f", 0, RESULTS)
+    cache.store([0.99, 0.1, 0.0], "f", 1, fresh)
+    assert cache.lookup([1.0, 0.0, 0.0], "f", 1) == fresh
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["stale"] == 1 and stats["size"] == 1
+
+@pytest.mark.unit
+def test_filter_codes_are_bounded_by_entries():
+    """Os códigos de filtros saem do mapa com a última entrada que os usa"""
+    cache = SemanticCache(dim=3, threshold=0.95, maxsize=2, ttl=60)
+    for limit in range(50):
+        cache.store([1.0, 0.0, 0.0], (limit, None), 0, RESULTS)
+    assert len(cache._filter_codes) == 2
+    assert cache.lookup([1.0, 0.0, 0.0], (49, None), 0) == RESULTS
+    assert cache.lookup([1.0, 0.0, 0.0], (49, None), 1) is None
+    assert len(cache._filter_codes) == 1